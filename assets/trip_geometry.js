@@ -0,0 +1,283 @@
+/*
+ * Clientside versions of the trail geometry helpers.
+ * Mirrors float(), round(), float_to_duration() and naismith_rule() from the
+ * Python apps, so the form fields update in the browser without a round trip.
+ */
+(function () {
+    function PyValueError(message) {
+        this.message = message;
+    }
+
+    // float(value): numbers pass through, text has to be a full Python float literal
+    function pyFloat(value) {
+        if (typeof value === "number") {
+            return value;
+        }
+        if (typeof value !== "string") {
+            throw new TypeError("float() argument must be a string or a number");
+        }
+        var text = value.trim().toLowerCase();
+        var match = /^([+-]?)(inf|infinity|nan)$/.exec(text);
+        if (match) {
+            var special = match[2] === "nan" ? NaN : Infinity;
+            return match[1] === "-" ? -special : special;
+        }
+        if (!/^[+-]?(\d+(_\d+)*(\.(\d+(_\d+)*)?)?|\.\d+(_\d+)*)(e[+-]?\d+(_\d+)*)?$/.test(text)) {
+            throw new PyValueError("could not convert string to float: '" + value + "'");
+        }
+        return Number(text.replace(/_/g, ""));
+    }
+
+    function isBlank(value) {
+        return value === null || value === undefined || value === "";
+    }
+
+    // round(x) with Python's round-half-to-even
+    function roundHalfEven(x) {
+        var floor = Math.floor(x);
+        var diff = x - floor;
+        if (diff > 0.5) {
+            return floor + 1;
+        }
+        if (diff < 0.5) {
+            return floor;
+        }
+        return floor % 2 === 0 ? floor : floor + 1;
+    }
+
+    // round(x, digits): toFixed rounds the exact binary value half-up, only exact ties differ from Python
+    function roundDigits(x, digits) {
+        if (!isFinite(x)) {
+            return x;
+        }
+        var exact = Math.abs(x).toFixed(100);
+        var point = exact.indexOf(".");
+        var rest = exact.slice(point + 1 + digits);
+        if (rest.charAt(0) === "5" && /^0*$/.test(rest.slice(1))) {
+            var kept = exact.slice(0, point + 1 + digits);
+            var lastDigit = Number(kept.charAt(kept.length - 1));
+            var rounded = lastDigit % 2 === 0 ? Number(kept) : Number(Math.abs(x).toFixed(digits));
+            return x < 0 ? -rounded : rounded;
+        }
+        return Number(x.toFixed(digits));
+    }
+
+    function degrees(radians) {
+        return radians * (180.0 / Math.PI);
+    }
+
+    // f"{value:02d}"
+    function pad2(value) {
+        var sign = value < 0 ? "-" : "";
+        var digits = String(Math.abs(value));
+        while (sign.length + digits.length < 2) {
+            digits = "0" + digits;
+        }
+        return sign + digits;
+    }
+
+    function floatToDuration(value) {
+        // int(nan) is a ValueError and int(inf) an OverflowError in Python
+        if (isNaN(value)) {
+            throw new PyValueError("cannot convert float NaN to integer");
+        }
+        if (!isFinite(value)) {
+            throw new RangeError("cannot convert float infinity to integer");
+        }
+        var hours = Math.trunc(value);
+        var minutes = roundHalfEven((value - hours) * 60);
+        return pad2(hours) + ":" + pad2(minutes);
+    }
+
+    function naismithRule(distanceKm, ascentM, descentM, paceKph) {
+        var baseTime = distanceKm / paceKph;
+        var avgRestTime = baseTime / 5;
+        var ascentTime = ascentM / 600.0;
+        var descentTime = descentM / 1800.0;
+        var totalTime = baseTime + ascentTime + descentTime + avgRestTime;
+        return floatToDuration(totalTime);
+    }
+
+    function rethrowUnlessValueError(error) {
+        if (!(error instanceof PyValueError)) {
+            throw error;
+        }
+    }
+
+    // Trips Calculation form: same outputs, in the same order, as the Python callback had
+    function trailGeometry(circularInput, inclineValue, declineInput, percentageinInput, kmhInput, trailLength) {
+        var noUpdate = window.dash_clientside.no_update;
+        var inclineDisabled = noUpdate;
+        var declineDisabled = noUpdate;
+        var declineOutput = noUpdate;
+        var inclinedgValue = noUpdate;
+        var declinedgValue = noUpdate;
+        var percentageinDisabled = noUpdate;
+        var percentagedeDisabled = noUpdate;
+        var whrDisabled = noUpdate;
+        var percentageinValue = noUpdate;
+        var percentagedeValue = noUpdate;
+        var walkinghrValue = noUpdate;
+
+        var validTrailLength = false;
+        var trailLengthNum;
+        if (trailLength !== null && trailLength !== undefined) {
+            try {
+                trailLengthNum = pyFloat(trailLength);
+                if (1 < trailLengthNum && trailLengthNum <= 25) {
+                    validTrailLength = true;
+                }
+            } catch (error) {
+                rethrowUnlessValueError(error);
+            }
+        }
+
+        if (circularInput === "Yes") {
+            inclineDisabled = false;
+            declineDisabled = true;
+            percentageinDisabled = true;
+            percentagedeDisabled = true;
+            whrDisabled = true;
+
+            if (!isBlank(inclineValue)) {
+                try {
+                    var inclineNum = pyFloat(inclineValue);
+                    declineOutput = 0 - inclineNum;
+                    var descent = -declineOutput;
+                    percentageinValue = 50;
+                    percentagedeValue = 50;
+                    if (validTrailLength) {
+                        inclinedgValue = roundDigits(degrees(Math.atan(inclineNum / (trailLengthNum * 1000 / 2))), 4);
+                        declinedgValue = -inclinedgValue;
+                        if (!isBlank(kmhInput)) {
+                            walkinghrValue = naismithRule(pyFloat(trailLength), inclineNum, descent, pyFloat(kmhInput));
+                        }
+                    }
+                } catch (error) {
+                    rethrowUnlessValueError(error);
+                    declineOutput = "";
+                }
+            } else {
+                declineOutput = "";
+            }
+        } else if (circularInput === "No") {
+            inclineDisabled = false;
+            declineDisabled = false;
+            percentageinDisabled = false;
+            percentagedeDisabled = false;
+            whrDisabled = true;
+            percentageinValue = "";
+            percentagedeValue = "";
+
+            if (!isBlank(percentageinInput)) {
+                try {
+                    var percentageinNum = pyFloat(percentageinInput);
+                    percentageinValue = percentageinNum;
+                    percentagedeValue = 100 - percentageinNum;
+                } catch (error) {
+                    rethrowUnlessValueError(error);
+                    percentageinValue = "";
+                    percentagedeValue = "";
+                }
+            }
+
+            if (validTrailLength) {
+                try {
+                    if (!isBlank(inclineValue)) {
+                        var inclineNumNo = pyFloat(inclineValue);
+                        var percentageinVal = percentageinValue !== "" ? pyFloat(percentageinValue) : 0;
+                        var inclineAngle = percentageinVal > 0 ? Math.atan(inclineNumNo / (trailLengthNum * 1000 * (percentageinVal / 100))) : 0;
+                        inclinedgValue = degrees(inclineAngle);
+                    } else {
+                        inclinedgValue = "";
+                    }
+
+                    if (!isBlank(declineInput)) {
+                        var declineNum = pyFloat(declineInput);
+                        var percentagedeVal = percentagedeValue !== "" ? pyFloat(percentagedeValue) : 0;
+                        var declineAngle = percentagedeVal > 0 ? Math.atan(declineNum / (trailLengthNum * 1000 * (percentagedeVal / 100))) : 0;
+                        declinedgValue = degrees(declineAngle);
+                    } else {
+                        declinedgValue = "";
+                    }
+
+                    if (!isBlank(inclineValue) && !isBlank(declineInput)) {
+                        var ascent = pyFloat(inclineValue);
+                        var descentNo = -pyFloat(declineInput);
+                        if (!isBlank(kmhInput)) {
+                            walkinghrValue = naismithRule(pyFloat(trailLength), ascent, descentNo, pyFloat(kmhInput));
+                        }
+                    }
+                } catch (error) {
+                    rethrowUnlessValueError(error);
+                    inclinedgValue = "";
+                    declinedgValue = "";
+                    walkinghrValue = noUpdate;
+                }
+            }
+        } else {
+            inclineDisabled = true;
+            declineDisabled = true;
+            percentageinDisabled = true;
+            percentagedeDisabled = true;
+            whrDisabled = true;
+            declineOutput = "";
+            percentageinValue = "";
+            percentagedeValue = "";
+            inclinedgValue = "";
+            declinedgValue = "";
+            walkinghrValue = "";
+        }
+
+        return [
+            inclineDisabled,
+            declineDisabled,
+            percentageinDisabled,
+            percentagedeDisabled,
+            whrDisabled,
+            declineOutput,
+            declinedgValue,
+            inclinedgValue,
+            percentageinValue,
+            percentagedeValue,
+            walkinghrValue
+        ];
+    }
+
+    // Google Sheets editor: walking time of the loaded trip for a new average pace
+    function editorWalkingTime(kph, trailLengthEdit, tripName, records) {
+        var noUpdate = window.dash_clientside.no_update;
+        var row = (records || []).find(function (record) { return record.Trip === tripName; });
+        if (!row) {
+            return noUpdate;
+        }
+        var incRow = row.Incline === undefined ? "" : row.Incline;
+        var decRow = row.Decline === undefined ? "" : row.Decline;
+
+        var distanceKm = trailLengthEdit ? pyFloat(trailLengthEdit) : 0;
+        var paceKph = kph ? pyFloat(kph) : 0;
+        var ascentM = incRow ? pyFloat(incRow) : 0;
+        var descentM = decRow ? pyFloat(decRow) : 0;
+
+        var walkinghrValue = "";
+        if (distanceKm > 0) {
+            if (paceKph > 0) {
+                if (ascentM > 0 && descentM > 0) {
+                    walkinghrValue = naismithRule(distanceKm, ascentM, descentM, paceKph);
+                }
+            } else {
+                walkinghrValue = noUpdate;
+            }
+        }
+        return walkinghrValue;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        trips: {
+            trailGeometry: trailGeometry,
+            editorWalkingTime: editorWalkingTime,
+            floatToDuration: floatToDuration,
+            naismithRule: naismithRule
+        }
+    });
+})();
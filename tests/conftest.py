@@ -0,0 +1,45 @@
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import trip_storage  # noqa: E402
+from trip_cache import DatasetCache  # noqa: E402
+from trip_storage import TRIP_COLUMNS  # noqa: E402
+
+
+class Collection:
+    """
+    A copy of the shipped collection behind a DatasetCache, changed the way the app does it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.cache = DatasetCache(path)
+
+    @property
+    def df(self):
+        return self.cache.get()
+
+    def append(self, name, **changes):
+        # A copy of the first trip under a new name, with the given columns changed
+        def change(df):
+            values = dict(zip(TRIP_COLUMNS, df.iloc[0][TRIP_COLUMNS].tolist()), Trip=name, **changes)
+            row = trip_storage.append_trip(self.path, [values[c] for c in TRIP_COLUMNS], trip_storage.next_index(df))
+            return pd.concat([df, row])
+        return self.cache.update(change)
+
+    def remove(self, name):
+        return self.cache.update(lambda df: trip_storage.remove_trip(self.path, df, name))
+
+
+@pytest.fixture
+def collection_cache(tmp_path, request):
+    path = tmp_path / "Trip_Collection.csv"
+    shutil.copy(request.config.rootpath / "Trip_Collection.csv", path)
+    return Collection(str(path))
@@ -0,0 +1,67 @@
+import importlib
+import os
+import shutil
+
+import pytest
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory, request):
+    # The app reads and writes its data files in the working directory
+    folder = tmp_path_factory.mktemp("app")
+    for name in ("Trip_Collection.csv", "weight_profiles.json"):
+        shutil.copy(request.config.rootpath / name, folder / name)
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        yield importlib.import_module("trip_collection")
+    finally:
+        os.chdir(cwd)
+
+
+def search(app, text, fuzzy):
+    token = context_value.set(AttributeDict(
+        triggered_inputs=[{"prop_id": "global-search.value", "value": text}]))
+    try:
+        result = app.display_filtered_trips(
+            "Area", None, text, fuzzy, 0, 50, [], "", [], 0, 0, None, None, None)
+    finally:
+        context_value.reset(token)
+    return {row["Trip"] for row in result[1]}, result[5]
+
+
+def switch_value(component, switch_id):
+    if getattr(component, "id", None) == switch_id:
+        return component.value
+    children = getattr(component, "children", None)
+    for child in children if isinstance(children, list) else [children]:
+        if child is not None and hasattr(child, "to_plotly_json"):
+            value = switch_value(child, switch_id)
+            if value is not None:
+                return value
+    return None
+
+
+def test_typo_tolerance_is_off_by_default(app):
+    assert switch_value(app.tab3_layout(), "fuzzy-search") is False
+
+
+def test_exact_search_without_typo_tolerance(app):
+    trips, count = search(app, "Yagur", False)
+    assert trips == {"Yagur River"}
+    assert count == "1 Trips"
+
+    trips, count = search(app, "Yagru", False)
+    assert trips == set()
+    assert count == "0 Trips"
+
+
+def test_typo_tolerance_adds_the_closest_names(app):
+    trips, _ = search(app, "Yagru", True)
+    assert "Yagur River" in trips
+
+    # The exact matches are kept
+    exact, _ = search(app, "Yagur", False)
+    assert exact <= search(app, "Yagur", True)[0]
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+
+from trip_bitmaps import BitmapIndex, FacetCatalogue, filters_from_pairs
+from trip_storage import FILTER_COLUMNS
+
+
+def recount(df, column):
+    return df[column].dropna().value_counts().to_dict()
+
+
+def test_facet_counts_match_a_recount(collection_cache):
+    catalogue = FacetCatalogue(collection_cache.cache, FILTER_COLUMNS)
+    for column in FILTER_COLUMNS:
+        counts = catalogue.counts(column)
+        assert counts == recount(collection_cache.df, column)
+        # In order of first appearance, like unique()
+        assert list(counts) == collection_cache.df[column].dropna().unique().tolist()
+    assert catalogue.counts("Trip") == {}
+
+
+@pytest.mark.parametrize("column", ["Area", "Season", "Challenge"])
+def test_facet_counts_follow_appends_and_removals(collection_cache, column):
+    catalogue = FacetCatalogue(collection_cache.cache, FILTER_COLUMNS)
+    before = catalogue.counts(column)
+
+    collection_cache.append("New Trip", **{column: "Somewhere New"})
+    counts = catalogue.counts(column)
+    assert counts == recount(collection_cache.df, column)
+    assert counts["Somewhere New"] == 1
+
+    collection_cache.remove("New Trip")
+    assert catalogue.counts(column) == before == recount(collection_cache.df, column)
+
+    trip = collection_cache.df["Trip"].iloc[0]
+    value = collection_cache.df[column].iloc[0]
+    collection_cache.remove(trip)
+    assert catalogue.counts(column) == recount(collection_cache.df, column)
+    assert catalogue.counts(column).get(value, 0) == before[value] - 1
+
+
+def masked(df, filters):
+    # The plain boolean mask the bitmaps replaced
+    mask = pd.Series(True, index=df.index)
+    for column, values in filters.items():
+        mask &= df[column].isin(values)
+    return df.index[mask]
+
+
+def facets(df, filters, column):
+    others = {other: values for other, values in filters.items() if other != column}
+    return recount(df.loc[masked(df, others)], column)
+
+
+def check_filters(df, index):
+    area, season = df["Area"].iloc[0], df["Season"].iloc[0]
+    cases = [
+        {},
+        {"Area": {area}},
+        {"Area": {area, df["Area"].iloc[-1]}},
+        {"Area": {area}, "Season": {season}},
+        {"Area": {area}, "Season": {"No Such Season"}},
+        {"Challenge": set(df["Challenge"].dropna())},
+    ]
+    for filters in cases:
+        labels, found = index.select(filters, facet_columns=["Area", "Season"])
+        assert labels.tolist() == masked(df, filters).tolist(), filters
+        for column in ["Area", "Season"]:
+            assert found[column] == facets(df, filters, column), (filters, column)
+
+
+def test_bitmap_filters_match_a_boolean_mask(collection_cache):
+    check_filters(collection_cache.df, BitmapIndex(collection_cache.cache))
+
+
+def test_bitmap_filters_follow_appends_and_removals(collection_cache):
+    index = BitmapIndex(collection_cache.cache)
+    collection_cache.append("New Trip", Area="Somewhere New")
+    labels, found = index.select({"Area": {"Somewhere New"}}, facet_columns=["Area"])
+    assert labels.tolist() == collection_cache.df.index[-1:].tolist()
+    check_filters(collection_cache.df, index)
+
+    collection_cache.remove("New Trip")
+    collection_cache.remove(collection_cache.df["Trip"].iloc[0])
+    assert index.select({"Area": {"Somewhere New"}})[0].empty
+    check_filters(collection_cache.df, index)
+
+
+def test_filters_from_pairs():
+    pairs = [
+        {"Filters": "Area", "Sub Filters": "Golan Heights"},
+        {"Filters": "Area", "Sub Filters": "Upper Galilee"},
+        {"Filters": "Season", "Sub Filters": "Spring"},
+        {"Filters": "Season", "Sub Filters": ""},
+        {"Filters": None, "Sub Filters": "Winter"},
+    ]
+    assert filters_from_pairs(pairs) == {"Area": {"Golan Heights", "Upper Galilee"}, "Season": {"Spring"}}
+    assert filters_from_pairs(None) == {}
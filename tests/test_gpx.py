@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import trip_storage
+from trip_geo import EARTH_RADIUS_KM, slope_degrees
+from trip_gpx import GPX_COLUMNS, import_gpx_folder, parse_gpx, trail_metrics
+from trip_scoring import naismith_rule
+
+
+# Points 0.001 degrees apart along a meridian
+STEP_KM = EARTH_RADIUS_KM * math.radians(0.001)
+
+# Flat, up 10 m a point for 16 segments, flat, down 20 m a point for 4 segments, flat.
+# The 5 point smoothing spreads each ramp over 4 more segments.
+ELEVATIONS = [100] * 5 + list(range(110, 261, 10)) + [260] * 6 + list(range(240, 179, -20)) + [180] * 5
+
+
+def gpx(lats, lons, elevations=None, name="Test Trail"):
+    points = []
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        ele = f"<ele>{elevations[i]}</ele>" if elevations is not None else ""
+        points.append(f'<trkpt lat="{lat}" lon="{lon}">{ele}</trkpt>')
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1">'
+        f"<trk><name>{name}</name><trkseg>{''.join(points)}</trkseg></trk></gpx>"
+    )
+
+
+def open_track(elevations=ELEVATIONS, name="Test Trail"):
+    lats = [round(32 + i * 0.001, 3) for i in range(len(ELEVATIONS))]
+    return gpx(lats, [35.0] * len(lats), elevations, name)
+
+
+def loop_track():
+    # Out along the meridian and back along the next one
+    lats = [round(32 + i * 0.001, 3) for i in range(10)]
+    return gpx(lats + lats[::-1], [35.0] * 10 + [35.001] * 10, [100] * 20)
+
+
+def test_parse_gpx():
+    name, lat, lon, ele = parse_gpx(open_track())
+    assert name == "Test Trail"
+    assert len(lat) == len(lon) == len(ele) == len(ELEVATIONS)
+    assert lat[0] == 32.0 and lat[-1] == 32.035
+    assert ele.tolist() == ELEVATIONS
+
+
+def test_open_track_metrics():
+    metrics = trail_metrics(*parse_gpx(open_track())[1:])
+    segments = len(ELEVATIONS) - 1
+    assert metrics["Trail Length"] == round(segments * STEP_KM, 2)
+    assert metrics["Incline"] == 160
+    assert metrics["Decline"] == -80
+    # 20 segments climbing, 8 descending
+    assert metrics["Inc_Pre"] == round(100 * 20 / 28)
+    assert metrics["Dec_Pre"] == 100 - metrics["Inc_Pre"]
+    assert metrics["Incline Degree"] == pytest.approx(slope_degrees(160, 20 * STEP_KM), abs=1e-4)
+    assert metrics["Decline Degree"] == pytest.approx(slope_degrees(-80, 8 * STEP_KM), abs=1e-4)
+    assert metrics["Circular?"] == "No"
+    # The point halfway along the track
+    assert metrics["Coordinates"] == "32.0180000, 35.0000000"
+    assert set(GPX_COLUMNS) <= set(metrics)
+
+
+def test_loop_track_is_circular():
+    metrics = trail_metrics(*parse_gpx(loop_track())[1:])
+    assert metrics["Circular?"] == "Yes"
+    assert metrics["Incline"] == metrics["Decline"] == 0
+
+
+def test_track_without_elevations_is_flat():
+    name, lat, lon, ele = parse_gpx(open_track(elevations=None))
+    assert np.isnan(ele).all()
+    metrics = trail_metrics(lat, lon, ele)
+    assert metrics["Trail Length"] == round((len(lat) - 1) * STEP_KM, 2)
+    assert metrics["Incline"] == metrics["Decline"] == 0
+    assert metrics["Inc_Pre"] == metrics["Dec_Pre"] == 50
+    assert metrics["Incline Degree"] == metrics["Decline Degree"] == 0.0
+
+
+@pytest.mark.parametrize("lats", [[], [32.0]])
+def test_fewer_than_two_points(lats):
+    with pytest.raises(ValueError, match="at least two points"):
+        parse_gpx(gpx(lats, [35.0] * len(lats)))
+
+
+def test_import_gpx_folder(collection_cache, tmp_path):
+    df = collection_cache.df
+    trip = df["Trip"].iloc[0]
+    folder = tmp_path / "gpx"
+    folder.mkdir()
+    # Matched by the track name, whatever the case and the file name
+    (folder / "matched.gpx").write_text(open_track(name=f"  {trip.upper()} "), encoding="utf-8")
+    (folder / "Nowhere Trail.gpx").write_text(open_track(name=""), encoding="utf-8")
+    (folder / "broken.gpx").write_text("<gpx><trk>", encoding="utf-8")
+    (folder / "single.gpx").write_text(gpx([32.0], [35.0], [100]), encoding="utf-8")
+
+    summary = import_gpx_folder(collection_cache.cache, trip_storage, folder)
+    assert summary["files"] == 4
+    assert summary["updated"] == 1
+    assert summary["unmatched"] == ["Nowhere Trail.gpx"]
+    assert summary["errors"] == ["broken.gpx", "single.gpx"]
+
+    stored = trip_storage.read_collection(collection_cache.path)
+    row = stored.loc[df.index[0]]
+    metrics = trail_metrics(*parse_gpx(open_track())[1:])
+    for column in GPX_COLUMNS:
+        assert row[column] == metrics[column]
+    assert row["Walking Hours"] == naismith_rule(
+        metrics["Trail Length"], metrics["Incline"], -metrics["Decline"], float(row["KMH"]))
+    # The trip keeps its own coordinates, and the others are untouched
+    assert row["Coordinates"] == df.loc[df.index[0], "Coordinates"]
+    pd.testing.assert_frame_equal(
+        stored.drop(index=df.index[0])[GPX_COLUMNS], df.drop(index=df.index[0])[GPX_COLUMNS], check_dtype=False)
+    pd.testing.assert_frame_equal(collection_cache.df, stored, check_dtype=False)
@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import trip_storage
+from trip_geo import DRIVE_LABELS, EARTH_RADIUS_KM, distance_labels, load_home, save_home
+from trip_rescore import relocate_collection
+from trip_scoring import COMPONENT_COLUMNS, How_far_from_me, score_trips
+
+
+HOME = {"lat": 32.0853, "lon": 34.7818, "circuity": 1.3, "speed_kmh": 60.0}
+
+
+def drive_label(lat, lon, home):
+    # One trip at a time: haversine, times the circuity, at the average speed
+    if math.isnan(lat) or math.isnan(lon):
+        return None
+    phi, phi0 = math.radians(lat), math.radians(home["lat"])
+    a = math.sin((phi - phi0) / 2) ** 2 + math.cos(phi) * math.cos(phi0) * math.sin(
+        math.radians(lon - home["lon"]) / 2) ** 2
+    hours = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a)) * home["circuity"] / home["speed_kmh"]
+    return next(label for limit, label in DRIVE_LABELS if hours <= limit)
+
+
+def check_relocated(df, before):
+    for label, row in df.iterrows():
+        expected = drive_label(row["lat"], row["lon"], HOME)
+        # Trips without a location keep their Distance
+        assert row["Distance"] == (expected or before.loc[label, "Distance"]), row["Trip"]
+        assert row[COMPONENT_COLUMNS["How Far?"]] == How_far_from_me[row["Distance"]]
+    np.testing.assert_allclose(df["Total Score"], score_trips(df)["Total Score"])
+
+
+def test_distance_labels_match_a_per_trip_computation():
+    # Due north of home, every 10 km up to 400 km, and a trip without a location
+    lat = [HOME["lat"] + math.degrees(km / EARTH_RADIUS_KM) for km in range(0, 401, 10)] + [np.nan]
+    lon = [HOME["lon"]] * (len(lat) - 1) + [np.nan]
+    labels = distance_labels(lat, lon, HOME).tolist()
+    assert labels == [drive_label(a, b, HOME) for a, b in zip(lat, lon)]
+    assert labels[0] == DRIVE_LABELS[0][1]
+    assert labels[-2] == DRIVE_LABELS[-1][1]
+    assert labels[-1] is None
+    # Every label is used along the way
+    assert set(labels[:-1]) == {label for _, label in DRIVE_LABELS}
+
+
+def test_relocate_collection(collection_cache):
+    before = collection_cache.df
+    summary = relocate_collection(collection_cache.cache, trip_storage, HOME)
+    stored = trip_storage.read_collection(collection_cache.path)
+    check_relocated(stored, before)
+    assert summary["distances_changed"] == int((stored["Distance"] != before["Distance"]).sum())
+    pd.testing.assert_frame_equal(collection_cache.df, stored, check_dtype=False)
+
+
+def test_relocate_collection_after_appends_and_removals(collection_cache):
+    collection_cache.append("Far North", Coordinates="33.9, 35.5", lat=33.9, lon=35.5, Distance="Half an hour drive")
+    collection_cache.append("Lost Trip", Coordinates="somewhere", lat=np.nan, lon=np.nan, Distance="2.5 drive hours")
+    collection_cache.remove(collection_cache.df["Trip"].iloc[0])
+    before = collection_cache.df
+
+    relocate_collection(collection_cache.cache, trip_storage, HOME)
+    stored = trip_storage.read_collection(collection_cache.path)
+    check_relocated(stored, before)
+    rows = stored.set_index("Trip")
+    assert rows.loc["Far North", "Distance"] == drive_label(33.9, 35.5, HOME)
+    assert rows.loc["Lost Trip", "Distance"] == "2.5 drive hours"
+
+
+def test_home_location_round_trip(tmp_path):
+    path = str(tmp_path / "home_location.json")
+    assert load_home(path) is None
+    save_home(HOME["lat"], HOME["lon"], circuity=1.5, path=path)
+    assert load_home(path) == {**HOME, "circuity": 1.5}
+    with pytest.raises(ValueError, match="circuity"):
+        save_home(0, 0, circuity=0.9, path=path)
+    with pytest.raises(ValueError, match="speed"):
+        save_home(0, 0, speed_kmh=0, path=path)
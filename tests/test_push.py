@@ -0,0 +1,52 @@
+import shutil
+import threading
+
+import pandas as pd
+from flask import Flask
+
+import trip_storage
+from trip_cache import DatasetCache
+from trip_push import CollectionWatcher, register_event_stream
+
+
+def open_stream(tmp_path, request, **options):
+    path = tmp_path / "Trip_Collection.csv"
+    shutil.copy(request.config.rootpath / "Trip_Collection.csv", path)
+    cache = DatasetCache(str(path))
+    watcher = CollectionWatcher(cache, poll_interval=0.05)
+    server = Flask(__name__)
+    register_event_stream(server, watcher, **options)
+    response = server.test_client().get("/collection-events")
+    return cache, watcher, iter(response.response)
+
+
+def message(chunk):
+    return chunk.decode() if isinstance(chunk, bytes) else chunk
+
+
+def test_a_change_to_the_collection_sends_an_event(tmp_path, request):
+    cache, watcher, events = open_stream(tmp_path, request, keepalive=5)
+    try:
+        assert message(next(events)).startswith("retry:")
+        first = message(next(events))
+        assert first.startswith("data: ")
+
+        # Written by another process: only the file changes, the poller has to notice
+        df = pd.read_csv(cache.path, index_col=0)
+        threading.Timer(0.1, trip_storage.write_collection, [cache.path, df.iloc[:-1]]).start()
+        second = message(next(events))
+        assert second.startswith("data: ")
+        assert second != first
+    finally:
+        watcher.close()
+
+
+def test_streams_end_after_max_duration_and_on_close(tmp_path, request):
+    _, watcher, events = open_stream(tmp_path, request, keepalive=0.05, max_duration=0.2)
+    assert [message(chunk)[:5] for chunk in events][:2] == ["retry", "data:"]
+    watcher.close()
+
+    _, watcher, events = open_stream(tmp_path, request, keepalive=5)
+    next(events), next(events)
+    threading.Timer(0.1, watcher.close).start()
+    assert list(events) == []
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trip_ranges import RangeIndex, SortedColumn, column_values, rows_between
+
+
+def masked(df, column, lo, hi):
+    values = pd.to_numeric(df[column], errors="coerce")
+    return df[(values >= lo) & (values <= hi)]
+
+
+def check_against_pandas(df, index, column):
+    sorted_column = index.column()
+    values = pd.to_numeric(df[column], errors="coerce").dropna()
+    # The same order as a full stable sort
+    expected = values.astype(float).sort_values(kind="stable")
+    np.testing.assert_array_equal(sorted_column.values, expected.to_numpy())
+    np.testing.assert_array_equal(sorted_column.labels, expected.index.to_numpy())
+    assert sorted_column.bounds() == (values.min(), values.max())
+    lo, hi = values.quantile(0.25), values.quantile(0.75)
+    for bounds in [(lo, hi), (values.min(), values.min()), (values.max() + 1, values.max() + 2)]:
+        pd.testing.assert_frame_equal(rows_between(df, [(sorted_column, *bounds)]), masked(df, column, *bounds))
+
+
+@pytest.mark.parametrize("column", ["Trail Length", "Total Score"])
+def test_ranges_follow_appends_and_removals(collection_cache, column):
+    index = RangeIndex(collection_cache.cache, column_values(column))
+    check_against_pandas(collection_cache.df, index, column)
+
+    collection_cache.append("Longest Trip", **{column: 999.0})
+    check_against_pandas(collection_cache.df, index, column)
+    assert index.column().bounds()[1] == 999.0
+
+    collection_cache.append("Shortest Trip", **{column: 0.5})
+    collection_cache.remove("Longest Trip")
+    check_against_pandas(collection_cache.df, index, column)
+
+    collection_cache.remove(collection_cache.df["Trip"].iloc[0])
+    check_against_pandas(collection_cache.df, index, column)
+
+
+def test_several_ranges_intersect_in_frame_order(collection_cache):
+    df = collection_cache.df
+    lengths = RangeIndex(collection_cache.cache, column_values("Trail Length")).column()
+    scores = RangeIndex(collection_cache.cache, column_values("Total Score")).column()
+    length_lo, length_hi = lengths.values[2], lengths.values[-3]
+    score_lo, score_hi = scores.values[1], scores.values[-2]
+    expected = masked(masked(df, "Trail Length", length_lo, length_hi), "Total Score", score_lo, score_hi)
+    found = rows_between(df, [(lengths, length_lo, length_hi), (scores, score_lo, score_hi)])
+    pd.testing.assert_frame_equal(found, expected)
+    assert rows_between(df, []) is df
+
+
+def test_sorted_column_skips_empty_cells():
+    column = SortedColumn(pd.Series([3.0, None, "x", 1.0, 3.0], index=[10, 11, 12, 13, 14]))
+    assert column.values.tolist() == [1.0, 3.0, 3.0]
+    assert column.labels.tolist() == [13, 10, 14]
+    assert column.bounds() == (1.0, 3.0)
+    assert SortedColumn(pd.Series(dtype=float)).bounds() == (0.0, 0.0)
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from trip_scoring import (
+    batch_dec_precentage_score, batch_decline_score, batch_inc_precentage_score, batch_incline_score,
+    batch_trail_length_score, batch_walkinghr_scores, dec_precentage_score, decline_score,
+    inc_precentage_score, incline_score, trail_length_score, walkinghr_scores,
+)
+
+
+# Numbers, numeric text, text the scalar rubrics reject, and empty cells, as a CSV column mixing them ends up
+NUMERIC_VALUES = [
+    None, np.nan, "80%", "", "abc", 0, 1, 2, 5.5, 12.0, 25, 26, 45, 50, 60.5, 99, 100, 101,
+    149, 150, 500, 600, 750.9, 1200, 2500, 2600, -1, -300, -2600,
+    "700", " 80 ", "5.5", "-450", "1e3",
+]
+DURATION_VALUES = [None, np.nan, "", "04:30", "4:30", "0:00", "9:00", "9:01", "3:15", "ab:cd", "4:30:00", 500, 4.5]
+
+SCORERS = [
+    (trail_length_score, batch_trail_length_score, NUMERIC_VALUES),
+    (incline_score, batch_incline_score, NUMERIC_VALUES),
+    (decline_score, batch_decline_score, NUMERIC_VALUES),
+    (inc_precentage_score, batch_inc_precentage_score, NUMERIC_VALUES),
+    (dec_precentage_score, batch_dec_precentage_score, NUMERIC_VALUES),
+    (walkinghr_scores, batch_walkinghr_scores, DURATION_VALUES),
+]
+
+
+def scalar_score(rubric, value):
+    # NaN wherever the scalar rubric raises or falls through without a score
+    try:
+        score = rubric(value)
+    except (ValueError, TypeError, AttributeError):
+        return math.nan
+    return math.nan if score is None else float(score)
+
+
+@pytest.mark.parametrize("rubric, batch, values", SCORERS, ids=[s[0].__name__ for s in SCORERS])
+def test_batch_scorers_match_scalar_rubrics(rubric, batch, values):
+    expected = np.array([scalar_score(rubric, value) for value in values])
+    actual = batch(pd.Series(values, dtype=object))
+    np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("rubric, batch", [(s[0], s[1]) for s in SCORERS[:5]], ids=[s[0].__name__ for s in SCORERS[:5]])
+def test_batch_scorers_on_number_columns(rubric, batch):
+    values = pd.Series([0, 1, 45, 500, 600, 2600, -300], dtype="int64")
+    expected = np.array([scalar_score(rubric, value) for value in values.tolist()])
+    np.testing.assert_array_equal(batch(values), expected)
+    expected = np.array([scalar_score(rubric, value) for value in values.astype(float).tolist() + [math.nan]])
+    np.testing.assert_array_equal(batch(pd.concat([values.astype(float), pd.Series([np.nan])])), expected)
+
+
+def test_mixed_numbers_and_blanks():
+    np.testing.assert_array_equal(batch_incline_score(pd.Series([500, None], dtype=object)), [9, np.nan])
@@ -0,0 +1,91 @@
+import pytest
+
+from trip_search import FuzzyIndex, SearchIndex, _trigrams, _words, word_score
+from trip_storage import FORM_COLUMNS
+
+
+QUERIES = ["a", "RI", "ver", "River", "mount ", "Golan Heights", "&", "-", ".", "no such trip", ""]
+TYPOS = ["Yagru", "golna", "mont", "galile", "riverr", "hermon mont", "kineret"]
+
+
+def contains(df, query):
+    # The plain row by row search the index replaced
+    cells = df[FORM_COLUMNS].astype(str).apply(lambda column: column.str.lower())
+    found = cells.apply(lambda column: column.str.contains(query.lower(), regex=False)).any(axis=1)
+    return set(df.index[found])
+
+
+def best_matches(df, query, columns=("Trip", "Area")):
+    # Every word of the query against the words of the row sharing a trigram with it, row by row
+    scores = {}
+    for label, row in df[list(columns)].iterrows():
+        words = [word for value in row if isinstance(value, str) for word in _words(value)]
+        best = [
+            max([word_score(q, word) for word in words if _trigrams(q) & _trigrams(word)] or [0.0])
+            for q in _words(query)
+        ]
+        if best and all(best):
+            scores[label] = sum(best)
+    return scores
+
+
+def check_search(df, index):
+    for query in QUERIES:
+        assert index.search(query) == contains(df, query), query
+
+
+def check_fuzzy(df, index):
+    for query in TYPOS:
+        expected = best_matches(df, query)
+        found = index.search(query, limit=len(df))
+        assert set(found) == set(expected), query
+        # Best first
+        assert [expected[label] for label in found] == sorted(expected.values(), reverse=True), query
+
+
+def test_search_matches_str_contains(collection_cache):
+    check_search(collection_cache.df, SearchIndex(collection_cache.cache, FORM_COLUMNS))
+
+
+def test_search_follows_appends_and_removals(collection_cache):
+    index = SearchIndex(collection_cache.cache, FORM_COLUMNS)
+    check_search(collection_cache.df, index)
+
+    collection_cache.append("Secret Waterfall", Area="Hidden Valley")
+    assert index.search("waterfall") == set(collection_cache.df.index[-1:])
+    check_search(collection_cache.df, index)
+
+    collection_cache.remove("Secret Waterfall")
+    collection_cache.remove(collection_cache.df["Trip"].iloc[0])
+    assert index.search("waterfall") == set()
+    check_search(collection_cache.df, index)
+
+
+def test_fuzzy_search_finds_typos(collection_cache):
+    df = collection_cache.df
+    index = FuzzyIndex(collection_cache.cache, ["Trip", "Area"])
+    check_fuzzy(df, index)
+    assert df.loc[index.search("Yagru")[0], "Trip"] == "Yagur River"
+    # Too short to allow a typo
+    assert index.search("Yx") == []
+
+
+def test_fuzzy_search_follows_appends_and_removals(collection_cache):
+    index = FuzzyIndex(collection_cache.cache, ["Trip", "Area"])
+    collection_cache.append("Secret Waterfall", Area="Hidden Valley")
+    assert index.search("watrefall") == collection_cache.df.index[-1:].tolist()
+    check_fuzzy(collection_cache.df, index)
+
+    collection_cache.remove("Secret Waterfall")
+    collection_cache.remove("Yagur River")
+    assert index.search("watrefall") == []
+    check_fuzzy(collection_cache.df, index)
+
+
+@pytest.mark.parametrize("limit", [1, 3])
+def test_fuzzy_search_limit_and_labels(collection_cache, limit):
+    index = FuzzyIndex(collection_cache.cache, ["Trip", "Area"])
+    everything = index.search("river", limit=100)
+    assert index.search("river", limit=limit) == everything[:limit]
+    some = set(everything[::2])
+    assert index.search("river", limit=100, labels=some) == [label for label in everything if label in some]
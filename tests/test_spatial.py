@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+import pytest
+
+from trip_geo import EARTH_RADIUS_KM, SpatialIndex
+
+
+def distance_km(lat, lon, lat0, lon0):
+    # Haversine one trip at a time
+    phi, phi0 = math.radians(lat), math.radians(lat0)
+    a = math.sin((phi - phi0) / 2) ** 2 + math.cos(phi) * math.cos(phi0) * math.sin(math.radians(lon - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def located(df):
+    return df[df["lat"].notna() & df["lon"].notna()]
+
+
+def near(df, lat0, lon0, radius_km):
+    distances = {label: distance_km(row.lat, row.lon, lat0, lon0) for label, row in located(df).iterrows()}
+    return {label for label, distance in distances.items() if distance <= radius_km}, distances
+
+
+def inside(df, south, west, north, east):
+    df = located(df)
+    return set(df.index[(df["lat"] >= south) & (df["lat"] <= north) & (df["lon"] >= west) & (df["lon"] <= east)])
+
+
+def check_queries(df, index):
+    lat0, lon0 = float(df["lat"].iloc[0]), float(df["lon"].iloc[0])
+    for radius_km in [0, 5, 20, 50, 150, 500]:
+        expected, distances = near(df, lat0, lon0, radius_km)
+        found = index.within_radius(lat0, lon0, radius_km).tolist()
+        assert set(found) == expected, radius_km
+        # Nearest first
+        assert [distances[label] for label in found] == sorted(distances[label] for label in found)
+
+    south, north = df["lat"].quantile(0.2), df["lat"].quantile(0.8)
+    west, east = df["lon"].quantile(0.1), df["lon"].quantile(0.7)
+    for box in [(south, west, north, east), (29.0, 34.0, 34.0, 36.0), (-100.0, -200.0, 100.0, 200.0),
+                (north, west, south, east), (0.0, 0.0, 1.0, 1.0)]:
+        assert set(index.within_bounds(*box).tolist()) == inside(df, *box), box
+
+
+def test_spatial_queries_match_a_full_scan(collection_cache):
+    check_queries(collection_cache.df, SpatialIndex(collection_cache.cache))
+
+
+def test_spatial_queries_follow_appends_and_removals(collection_cache):
+    index = SpatialIndex(collection_cache.cache)
+    check_queries(collection_cache.df, index)
+
+    # Right on a grid cell corner, and a trip without a location
+    collection_cache.append("Corner Trip", Coordinates="32.5, 35.0", lat=32.5, lon=35.0)
+    collection_cache.append("Lost Trip", Coordinates="somewhere", lat=np.nan, lon=np.nan)
+    corner = collection_cache.df.index[-2]
+    assert index.within_radius(32.5, 35.0, 0.01).tolist() == [corner]
+    assert collection_cache.df.index[-1] not in index.within_bounds(-90, -180, 90, 180)
+    check_queries(collection_cache.df, index)
+
+    collection_cache.remove("Corner Trip")
+    collection_cache.remove(collection_cache.df["Trip"].iloc[0])
+    assert corner not in index.within_radius(32.5, 35.0, 1).tolist()
+    check_queries(collection_cache.df, index)
+
+
+@pytest.mark.parametrize("lat0, lon0", [(89.95, 0.0), (0.0, 179.99), (-89.95, -179.99)])
+def test_radius_near_the_poles_and_the_antimeridian(collection_cache, lat0, lon0):
+    collection_cache.append("Edge Trip", Coordinates=f"{lat0}, {lon0}", lat=lat0, lon=lon0)
+    index = SpatialIndex(collection_cache.cache)
+    assert index.within_radius(lat0, lon0, 1).tolist() == collection_cache.df.index[-1:].tolist()
+    expected, _ = near(collection_cache.df, lat0, lon0, 50)
+    assert set(index.within_radius(lat0, lon0, 50).tolist()) == expected
+
+
+def test_radius_over_the_antimeridian(collection_cache):
+    collection_cache.append("East Edge", Coordinates="0.0, 179.99", lat=0.0, lon=179.99)
+    collection_cache.append("West Edge", Coordinates="0.0, -179.99", lat=0.0, lon=-179.99)
+    east, west = collection_cache.df.index[-2:].tolist()
+    index = SpatialIndex(collection_cache.cache)
+    assert index.within_radius(0.0, 179.995, 5).tolist() == [east, west]
+    assert index.within_radius(0.0, -179.999, 5).tolist() == [west, east]
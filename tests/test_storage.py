@@ -0,0 +1,61 @@
+import shutil
+import threading
+
+import pandas as pd
+import pytest
+
+import trip_storage
+from trip_storage import TRIP_COLUMNS
+
+
+SHIPPED = "Trip_Collection.csv"
+
+
+@pytest.fixture
+def collection(tmp_path, request):
+    path = tmp_path / "Trip_Collection.csv"
+    shutil.copy(request.config.rootpath / SHIPPED, path)
+    return str(path)
+
+
+def new_trip(df, name):
+    values = df.iloc[0][TRIP_COLUMNS].tolist()
+    values[TRIP_COLUMNS.index("Trip")] = name
+    return values
+
+
+def test_shipped_collection_accepts_new_trips(collection):
+    df = trip_storage.read_collection(collection)
+    row = trip_storage.append_trip(collection, new_trip(df, "New Trip"), trip_storage.next_index(df))
+    stored = trip_storage.read_collection(collection)
+    assert len(stored) == len(df) + 1
+    assert stored.iloc[-1]["Trip"] == "New Trip"
+    pd.testing.assert_frame_equal(row, stored.iloc[[-1]], check_dtype=False)
+
+
+def test_duplicate_trip_is_rejected_under_the_lock(collection):
+    # Both saves checked the same cached snapshot, only the first one may append
+    df = trip_storage.read_collection(collection)
+    trip_storage.append_trip(collection, new_trip(df, "Twice"), trip_storage.next_index(df))
+    with pytest.raises(ValueError, match="already in the data"):
+        trip_storage.append_trip(collection, new_trip(df, "Twice"), trip_storage.next_index(df))
+    assert (trip_storage.read_collection(collection)["Trip"] == "Twice").sum() == 1
+
+
+def test_concurrent_saves_of_the_same_trip(collection):
+    df = trip_storage.read_collection(collection)
+    errors = []
+
+    def save():
+        try:
+            trip_storage.append_trip(collection, new_trip(df, "Race"), trip_storage.next_index(df))
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+    assert (trip_storage.read_collection(collection)["Trip"] == "Race").sum() == 1
@@ -0,0 +1,132 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from trip_geo import slope_degrees
+from trip_scoring import float_to_duration, naismith_rule
+
+
+# Parity of assets/trip_geometry.js with the Python helpers it mirrors: the
+# fixtures are generated here, run through node and compared value by value.
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "trip_geometry.js")
+
+RUNNER = r"""
+const fs = require("fs");
+const vm = require("vm");
+const context = {window: {dash_clientside: {no_update: {no_update: true}}}};
+vm.runInNewContext(fs.readFileSync(process.argv[1], "utf8"), context);
+const trips = context.window.dash_clientside.trips;
+const results = JSON.parse(fs.readFileSync(0, "utf8")).map(([name, args]) => {
+    try {
+        return {value: trips[name](...args)};
+    } catch (error) {
+        return {error: error.constructor.name};
+    }
+});
+process.stdout.write(JSON.stringify(results));
+"""
+
+NO_UPDATE = {"no_update": True}
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node isn't installed")
+
+
+def run_js(calls):
+    completed = subprocess.run(
+        ["node", "-e", RUNNER, SCRIPT], input=json.dumps(calls), capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout)
+
+
+def test_float_to_duration():
+    rng = random.Random(0)
+    values = [0, 0.5, 0.999, 1, 2.9999, 4.25, 9.99, 12, 1 / 120, 59.5 / 60] + [rng.uniform(0, 15) for _ in range(500)]
+    results = run_js([["floatToDuration", [value]] for value in values])
+    assert [result["value"] for result in results] == [float_to_duration(value) for value in values]
+
+
+def test_naismith_rule():
+    rng = random.Random(1)
+    cases = [[10, 650, 650, 4], [7.5, 0, 0, 3], [25, 2500, 1200, 14.9]] + [
+        [rng.uniform(1, 25), rng.randint(0, 2500), rng.randint(0, 2500), rng.uniform(0.5, 15)] for _ in range(500)
+    ]
+    results = run_js([["naismithRule", case] for case in cases])
+    assert [result["value"] for result in results] == [naismith_rule(*case) for case in cases]
+
+
+def python_geometry(circular, incline, decline, percentagein, kmh, trail_length):
+    # (decline, declinedg, inclinedg, percentagein, percentagede, walkinghr) from the Python helpers
+    length, inc, pace = float(trail_length), float(incline), float(kmh)
+    if circular == "Yes":
+        # Half the trail climbs, half descends
+        inclinedg = round(slope_degrees(inc, length / 2), 4)
+        return -inc, -inclinedg, inclinedg, 50, 50, naismith_rule(length, inc, inc, pace)
+    dec, pct_in = float(decline), float(percentagein)
+    pct_de = 100 - pct_in
+    inclinedg = slope_degrees(inc, length * pct_in / 100)
+    declinedg = slope_degrees(dec, length * pct_de / 100)
+    return NO_UPDATE, declinedg, inclinedg, pct_in, pct_de, naismith_rule(length, inc, -dec, pace)
+
+
+def test_trail_geometry():
+    rng = random.Random(2)
+    cases = []
+    for _ in range(300):
+        circular = rng.choice(["Yes", "No"])
+        incline = str(rng.randint(1, 2500))
+        decline = str(-rng.randint(1, 2500))
+        percentagein = str(rng.choice([0, 100, rng.randint(1, 99)]))
+        cases.append([circular, incline, decline, percentagein, str(round(rng.uniform(1, 14), 1)),
+                      str(round(rng.uniform(1.1, 25), 2))])
+    results = run_js([["trailGeometry", case] for case in cases])
+    for case, result in zip(cases, results):
+        expected = python_geometry(*case)
+        actual = result["value"][5:]
+        assert actual[0] == expected[0]
+        assert actual[1:3] == pytest.approx(expected[1:3], rel=1e-12, abs=1e-12)
+        assert actual[3:] == list(expected[3:])
+
+
+def test_invalid_input_clears_the_computed_fields():
+    # Where float() raises a ValueError on the server, the fields are emptied instead
+    circular, not_circular = run_js([
+        ["trailGeometry", ["Yes", "abc", "", "", "4", "10"]],
+        ["trailGeometry", ["No", "500", "-400", "abc", "4", "10"]],
+    ])
+    assert circular["value"][5] == ""
+    assert not_circular["value"][8:10] == ["", ""]
+
+
+RECORDS = [
+    {"Trip": "Both Ways", "Incline": 650, "Decline": 420},
+    {"Trip": "Text Values", "Incline": "650", "Decline": "420.5"},
+    {"Trip": "Stored Descent", "Incline": 500, "Decline": -500},
+    {"Trip": "No Elevation", "Incline": "", "Decline": None},
+]
+
+
+@pytest.mark.parametrize("kph, trail_length, trip, expected", [
+    ("4", "10", "Both Ways", naismith_rule(10, 650, 420, 4)),
+    (3.5, "7.25", "Text Values", naismith_rule(7.25, 650, 420.5, 3.5)),
+    ("4", "10", "Stored Descent", ""),
+    ("4", "10", "No Elevation", ""),
+    ("4", "", "Both Ways", ""),
+    ("", "10", "Both Ways", NO_UPDATE),
+    (None, "10", "Both Ways", NO_UPDATE),
+    ("0", "10", "Both Ways", NO_UPDATE),
+    ("4", "10", "Not Stored", NO_UPDATE),
+])
+def test_editor_walking_time(kph, trail_length, trip, expected):
+    # The Sheets editor's walking time for a new pace, the server computed it with naismith_rule
+    assert run_js([["editorWalkingTime", [kph, trail_length, trip, RECORDS]]]) == [{"value": expected}]
+
+
+@pytest.mark.parametrize("kph, trail_length", [("abc", "10"), ("4", "ten")])
+def test_editor_walking_time_rejects_what_float_rejects(kph, trail_length):
+    with pytest.raises(ValueError):
+        naismith_rule(float(trail_length), 650, 420, float(kph))
+    assert run_js([["editorWalkingTime", [kph, trail_length, "Both Ways", RECORDS]]]) == [{"error": "PyValueError"}]
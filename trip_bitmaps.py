@@ -0,0 +1,138 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------------------------------------------------------------
+#  Bitmap indexes for categorical filters
+#  One bitset per distinct value of a column (bit i = row i of the snapshot),
+#  kept as Python ints, so AND/OR of whole columns and popcounts run in C.
+# ---------------------------------------------------------------------------------
+def _bitmap(mask):
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def filters_from_pairs(pairs, column_key="Filters", value_key="Sub Filters"):
+    """
+    {column: set of values} from a list of {Filters, Sub Filters} rows.
+    Several rows on the same column are alternatives (OR), different columns all apply (AND).
+    """
+    filters = {}
+    for pair in pairs or []:
+        column, value = pair.get(column_key), pair.get(value_key)
+        if column and value not in (None, ""):
+            filters.setdefault(column, set()).add(value)
+    return filters
+
+
+class BitmapIndex:
+    """
+    Per-value bitsets of categorical columns, built the first time a column is
+    queried and dropped when the dataset cache generation changes.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._generation = None
+        self._df = pd.DataFrame()
+        self._labels = pd.Index([])
+        self._all = 0
+        self._columns = {}
+
+    def _sync(self):
+        snapshot = self.cache.snapshot()
+        if snapshot.generation != self._generation:
+            self._df = snapshot.df
+            self._labels = snapshot.df.index
+            self._all = (1 << len(snapshot.df)) - 1
+            self._columns = {}
+            self._generation = snapshot.generation
+
+    def _values(self, column):
+        if column not in self._columns:
+            if column not in self._df.columns:
+                self._columns[column] = {}
+            else:
+                codes, uniques = pd.factorize(self._df[column])
+                # NaN gets code -1 and no bitset, like dropna()
+                self._columns[column] = {value: _bitmap(codes == code) for code, value in enumerate(uniques.tolist())}
+        return self._columns[column]
+
+    def _labels_of(self, bitmap):
+        size = len(self._labels)
+        bits = np.unpackbits(
+            np.frombuffer(bitmap.to_bytes((size + 7) // 8, "little"), dtype=np.uint8), bitorder="little"
+        )[:size]
+        return self._labels[np.flatnonzero(bits)]
+
+    def select(self, filters, facet_columns=()):
+        """
+        Rows matching filters ({column: values}, OR within a column, AND across
+        columns) and, in the same pass, facet counts {column: {value: count}} for
+        facet_columns. A column's facets ignore its own filter, so they show what
+        picking another value of it would add.
+        Returns (row labels, facets).
+        """
+        with self._lock:
+            self._sync()
+            selections = {}
+            for column, values in filters.items():
+                bitmaps = self._values(column)
+                bitset = 0
+                for value in values:
+                    bitset |= bitmaps.get(value, 0)
+                selections[column] = bitset
+
+            match = self._all
+            for bitset in selections.values():
+                match &= bitset
+
+            facets = {}
+            for column in facet_columns:
+                others = self._all
+                for other, bitset in selections.items():
+                    if other != column:
+                        others &= bitset
+                counts = {value: (bitset & others).bit_count() for value, bitset in self._values(column).items()}
+                facets[column] = {value: count for value, count in counts.items() if count}
+            return self._labels_of(match), facets
+
+
+# ---------------------------------------------------------------------------------
+#  Facet catalogue (distinct values and counts of the filter columns)
+# ---------------------------------------------------------------------------------
+class FacetCatalogue:
+    """
+    Distinct values of each filter column with their trip counts, in order of
+    first appearance. A column is counted with value_counts the first time
+    it's asked for in a dataset cache generation. The counts aren't patched
+    with the rows a write added or removed: finding those rows means diffing
+    the whole column, which takes longer than counting it again (0.146 s
+    against 0.062 s at 100k rows).
+    """
+
+    def __init__(self, cache, columns):
+        self.cache = cache
+        self.columns = columns
+        self._lock = threading.Lock()
+        self._generation = None
+        self._counts = {}
+
+    def counts(self, column):
+        """
+        {value: number of trips} for the column, empty for a column that isn't catalogued.
+        """
+        if column not in self.columns:
+            return {}
+        snapshot = self.cache.snapshot()
+        with self._lock:
+            if snapshot.generation != self._generation:
+                self._counts, self._generation = {}, snapshot.generation
+            if column not in self._counts:
+                df = snapshot.df
+                # Empty cells (NaN) aren't counted
+                counts = df[column].value_counts(sort=False).to_dict() if column in df.columns else {}
+                self._counts[column] = counts
+            return dict(self._counts[column])
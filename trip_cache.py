@@ -0,0 +1,98 @@
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from trip_storage import collection_lock, collection_signature, read_collection
+
+
+# ---------------------------------------------------------------------------------
+#  Versioned in-process cache of the trip collection
+# ---------------------------------------------------------------------------------
+Snapshot = namedtuple("Snapshot", ["df", "generation", "key"])
+
+
+def content_key(signature, df):
+    """
+    Key of the data itself: the storage signature plus the row count.
+    Every process (gunicorn worker) computes the same key for the same store,
+    unlike the generation, which only counts the reloads of one process.
+    A list, so it comes back unchanged from a dcc.Store.
+    """
+    return [*(signature or [None]), len(df)]
+
+
+class DatasetCache:
+    """
+    Holds one parsed copy of the collection per process.
+    The store is only read again when its signature changes (mtime/size/inode
+    for the CSV), and every reload bumps the generation number so callers can
+    key their own caches on it. reader, signature and lock come from the
+    storage backend module (trip_storage or trip_sqlite). Anything sent to a
+    page to compare later should use the snapshot's key instead of the generation.
+
+    The DataFrame handed out is shared between all callbacks - treat it as
+    read-only and .copy() it before adding or changing columns.
+    """
+
+    def __init__(self, path, reader=read_collection, signature=collection_signature, lock=collection_lock):
+        self.path = path
+        self.reader = reader
+        self.signature = signature
+        self.lock = lock
+        self._lock = threading.Lock()
+        self._signature = None
+        self._snapshot = Snapshot(pd.DataFrame(), 0, content_key(None, pd.DataFrame()))
+        self._loaded = False
+
+    def snapshot(self):
+        signature = self.signature(self.path)
+        if self._loaded and signature == self._signature:
+            return self._snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we were waiting
+            signature = self.signature(self.path)
+            if self._loaded and signature == self._signature:
+                return self._snapshot
+            df = self.reader(self.path)
+            self._publish(df, signature)
+            return self._snapshot
+
+    def get(self):
+        """
+        Shortcut for callbacks that only need the DataFrame.
+        """
+        return self.snapshot().df
+
+    @property
+    def generation(self):
+        return self.snapshot().generation
+
+    def update(self, change):
+        """
+        Runs change(df) -> new_df against an up-to-date snapshot and publishes the
+        result as the next generation, without parsing the file again.
+        The exclusive collection lock is held throughout, so change() can write
+        the file knowing no other worker touched it in between.
+        """
+        with self._lock, self.lock(self.path):
+            signature = self.signature(self.path)
+            if not self._loaded or signature != self._signature:
+                self._publish(self.reader(self.path), signature)
+            df = change(self._snapshot.df)
+            self._publish(df, self.signature(self.path))
+            return self._snapshot
+
+    def invalidate(self):
+        """
+        Forces the next snapshot() call to read the file again.
+        """
+        with self._lock:
+            self._loaded = False
+            self._signature = None
+
+    def _publish(self, df, signature):
+        self._snapshot = Snapshot(df, self._snapshot.generation + 1, content_key(signature, df))
+        self._signature = signature
+        self._loaded = True
@@ -1,3 +1,4 @@
+import base64
 import os
 import re
 import pandas as pd
@@ -17,34 +18,91 @@ import plotly.graph_objects as go
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
-import ast
-import math
 import gpxpy 
 import gpxpy.gpx
 
 
 from pathlib import Path
-from dash import dcc, html, Input, Output, State
+from dash import dcc, html, ClientsideFunction, Input, Output, State
 from dash.exceptions import PreventUpdate
 
+import trip_sqlite
+import trip_storage
+from dash_extensions import EventSource
+from trip_bitmaps import FacetCatalogue
+from trip_cache import DatasetCache
+from trip_figures import FigureCache
+from trip_geo import (
+    CLUSTER_RADIUS, DEFAULT_CIRCUITY, DEFAULT_SPEED_KMH, SpatialIndex, TripFeatures, distance_labels,
+    feature_collection, load_home, parse_coordinate, save_home,
+)
+from trip_gpx import parse_gpx, trail_metrics
+from trip_patches import SentLists, figure_update
+from trip_profiles import DEFAULT_PROFILE, ProfileScores, load_profiles
+from trip_push import CollectionWatcher, register_event_stream
+from trip_ranges import RangeIndex, column_values, rows_between
+from trip_rescore import describe, relocate_collection, rescore_collection
+from trip_search import FUZZY_LIMIT, FuzzyIndex, SearchIndex
+from trip_scoring import (
+    Accessibility, Challenge, Crowdness, Entry_Fee, How_far_from_me, Nearby_attractions, Required_eq,
+    WEIGHTS, Season, Shade, Terrain, View, Water, Weather, area_scores, circular, dec_precentage_score,
+    decline_score, float_to_duration, inc_precentage_score, incline_score, kmh_validity, trail_length_score,
+    walkinghr_scores,
+)
+from trip_storage import FILTER_COLUMNS, FORM_COLUMNS, TRIP_COLUMNS
+from trip_table import PAGE_SIZE, filter_frame, sort_frame, table_page, table_records
 
 
 
 # Initialize the app
 csv_file_path = "Trip_Collection.csv"
-if not os.path.exists(csv_file_path):
-    # If the file doesn't exist, create it with the default columns
-    df_global = pd.DataFrame(columns=[
-        "Trip", "Coordinates", "Trail Link" "Area", "Accessibility","Season", "Challenge",
-        "Terrain", "View", "Shade", "Water","Circular?", "Trail Length", "Incline", "Inc_Pre", "Incline Degree", "Decline", "Dec_Pre", "Decline Degree","KMH", "Walking Hours","Required Equipment",
-        "Weather", "Crowdness", "Nearby Attractions", "Entry Fee", "Distance", "Total Score"
-    ])
-    df_global.to_csv(csv_file_path, index=True)
+
+# Storage backend: "csv" (default) or "sqlite"
+# Import an existing CSV once with: python trip_sqlite.py Trip_Collection.csv Trip_Collection.db
+storage_backend = os.environ.get("TRIP_STORAGE", "csv")
+if storage_backend == "sqlite":
+    storage = trip_sqlite
+    data_path = os.environ.get("TRIP_DB_PATH", "Trip_Collection.db")
 else:
-    df_global = pd.read_csv(csv_file_path,index_col=0)
+    storage = trip_storage
+    data_path = csv_file_path
+
+if storage is trip_storage and not os.path.exists(data_path):
+    # If the file doesn't exist, create it with the default columns
+    storage.write_collection(data_path, pd.DataFrame(columns=TRIP_COLUMNS))
+
+# One parsed copy of the collection shared by every callback
+dataset_cache = DatasetCache(
+    data_path,
+    reader=storage.read_collection,
+    signature=storage.collection_signature,
+    lock=storage.collection_lock,
+)
+# Total Score per named weight profile, recomputed once per collection generation
+profile_scores = ProfileScores(dataset_cache, load_profiles())
 
+# Global search of the Trips Filtering tab, over the columns entered in the form
+search_index = SearchIndex(dataset_cache, FORM_COLUMNS)
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# Typo-tolerant search over trip names and areas, for the search box and the trips dropdowns
+trip_names_index = FuzzyIndex(dataset_cache, ["Trip", "Area"])
+
+# Values and trip counts of every filter column, for the sub filter dropdown
+facet_catalogue = FacetCatalogue(dataset_cache, FILTER_COLUMNS)
+
+
+def profile_total_scores(df, profile):
+    if df.empty:
+        return pd.Series(dtype=float)
+    return profile_scores.apply(df, profile)["Total Score"]
+
+
+# Sorted Trail Length and Total Score (per profile) for the range sliders of the map tab
+length_ranges = RangeIndex(dataset_cache, column_values("Trail Length"))
+score_ranges = RangeIndex(dataset_cache, profile_total_scores)
+
+# Tab contents are rendered on demand, so callbacks may reference components that aren't on the page yet
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
 app.title = "The Trip Collection"
 
 
@@ -73,7 +131,7 @@ Trips Calculation
 def trip_name_val(trip, df):
     if not trip:
         raise ValueError("Please insert a valid trip name.")
-    elif os.path.exists(csv_file_path):
+    elif os.path.exists(data_path):
             if not df.empty:    
                 if trip in df["Trip"].values:
                     raise ValueError("This trip is already in the data!")
@@ -84,7 +142,8 @@ def mid_trail_coordinate(coord,link,season, df):
         raise ValueError("Please insert a coordinate!")
     elif "," not in coord:
         raise ValueError("Invalid coordinate string, a comma is missing")  
-    elif os.path.exists(csv_file_path):
+    parse_coordinate(coord)
+    if os.path.exists(data_path):
             if not df.empty:  
                 if coord in df["Coordinates"].values :
                     if link in df.loc[df["Coordinates"] == coord]["Trail Link"].values and season in df.loc[df["Coordinates"] == coord]["Trail Link"].values:
@@ -99,418 +158,16 @@ def link_validity (link,df):
     return link
     
     
-def float_to_duration(value):
-    hours = int(value)  # Extract the hours
-    minutes = round((value - hours) * 60)  # Calculate the minutes
-    return f"{hours:02d}:{minutes:02d}"  # Format as HH:MM
-
 def duration_to_int(duration):
     hours, minutes = map(int, duration.split(":"))  # Split the duration string into hours and minutes
     return hours + minutes / 60  # Convert to float representing the total hours
 
 
-def naismith_rule(distance_km, ascent_m, descent_m, pace_kph):
-
-    # Base walking time (time for distance only)
-    base_time = distance_km / pace_kph
-    avg_rest_time = base_time/5
-    # Elevation adjustment (1 hour for every 600 meters of ascent)
-    ascent_time = ascent_m / 600.0
-    descent_time = descent_m / 1800.0
-    # Total time
-    total_time = base_time + ascent_time + descent_time + avg_rest_time
-    hr = float_to_duration(total_time)
-    return hr
-
  
 def is_decimal_number(input_value):
     # Check if input is not a string and is a numeric type
     return isinstance(input_value, float) and not isinstance(input_value, (str, bool))
 
-# Dictionaries for scoring
-area_scores = {
-    "Golan Heights - North-East Galilee": 10,
-    "Golan Heights": 9.5,
-    "Upper Galilee": 9.25,
-    "Western Galilee": 9.2,
-    "Galilee Center & The Kinerret":9,
-    "Lower Galilee": 8.75,
-    "Carmel Mountains": 8.25,
-    "Jerusalem Mountains": 8,
-    "The Shfela Mountains": 7.5,
-    "Eilat Mountains": 7,
-    "The Dead Sea Mountains": 6.75,
-    "South Negev Mountains": 6.5,
-    "Arava Mountains": 6,
-    "Northern Negav": 5,
-    "Judea & Samaria Area": 4,
-    "The Northen Coastal Plain": 3.5,
-    "The Center Coastal Plain": 3,
-    "The South Coastal Plain": 2.5
-}
-
-Accessibility = {
-    "Open to All": 10,
-    "Open, But with Army Coordination": 7.5, 
-    "Open Most of The Time, with Some Exceptions": 6,
-    "Closed Most of The Time, with Some Exceptions": 4.5,
-    "A Restricted Military Zone": 0,
-}
-
-Challenge = {
-    "Very Challenging, with Lots of Obstacles in The Way": 10,
-    "There's Some Challenge, but Most of it is in Average Challenge": 8,
-    "There's some challenge, but Most of The Trail is Easy": 6.5,
-    "Medium Challenge": 5,
-    "Easy-Medium": 3.5,   
-    "Easy": 2,   
-    "No Challenge At All!": 0
-}
-
-Terrain = {
-    "Mountainous region with lots of rivers and creeks": 10,
-    "Mostly rivers, with some steep hills": 8,
-    "Mostly high plattos, with some creeks": 6,
-    "A coastly region, with some rivers": 5,
-    "A plain area with some rivers and hills": 4,
-    "A whole plain area": 2
-}
-
-View = {
-    "Snowy mountains, lucious springs and rivers, lots of meadows and green": 13,
-    "Vivid green mountains, lots of streams, and rocks": 10,
-    "Bared Mountains with lots of flowing rivers": 8,
-    "Green mountains, but no water nearby": 7.5,
-    "Bared Mountains & Dry Rivers": 7,
-    "Bared Mountains, but no rivers nearby": 6,
-    "Deset mountains with some creeks": 5,
-    "coastal area, shores and sea": 4,
-    "Some small hills, creeks and open meadows": 3,
-    "Urbanic View": 2
-}
-
-Shade= {
-    "Mostly shaded, cooled and glimpses of sunshine occasionally": 10,
-    "Fully shaded": 9,
-    "Mostly shaded, but could be parts exposed to light": 8,
-    "Half shaded, half exposed to sunlight": 6,
-    "Most of it exposed to sunlight, occasionally shaded": 4,
-    "Fully exposed to sunlight": 2
-}
-
-Entry_Fee = {
-"Free of charge": 10,
-"Free for most of the trail. with some unique locations for extra charge": 8,
-"Low-Medium charge, worths the money": 7,
-"Low-Medium charge, doesn't worth the money": 5.5,
-"High charge, but worth the money": 4,
-"High, mendatory and nothing special":0
-}
-
-Water = {
-"Plenty of water, easy access, with an arranged entrance and many water activities in place": 13,
-"Lots of water, with several entrances, easy access": 10,
-"Some locations rich in waterfalls and pools, with many entry points throught the trail": 9,
-"Lots of locations with water along the trail, but hard to reach easily": 7.5,
-"Few points with water along the trail, not an easy access": 6,
-"Lots of points with dry, dirty pools along the way": 3,
-"Few points with even less water in them": 1.5,
-"None": 0
-}
-
-Nearby_attractions = {
-    "Full of attractions nearby: wineries, viewpoints, food, pubs and resorts": 10,
-    "Some attractions along the way, mostly wineries and restaurants": 8,
-    "Few attractions nearby, mostly restaurants and hostels": 6,
-    "One restaurant & hostel 50KM from the trail": 5,
-    "One winery 50KM from the trail": 4,
-    "Nothing special within 80KM from the trail": 2,
-    "None": 0
-}
-
-"""Trail_length = {
-"10KM, an average of 4-5 walking hours": 10,
-"7-9KM, an average of 3.5-4.5 walking hours": 9,
-"5-7KM, an average of 2.5-3.5 walking hours": 7.5,
-"14-15KM, extensive daytrip, an average of 6-7 walking hours": 7,
-"3-5KM, an average of 1.5-2.5 walking hours": 6,
-"19-20KM, a full day of walking, about 8-9 walking hours": 5.5,
-"Higher than 20KM, more than 9 walking hours": 4,
-"2-3KM, about 1 walking hours": 2,
-"1-2KM, less than half an hour": 0
-}"""
-
-
-def trail_length_score(trail_length):
-    # Attempt to convert to float if the input is a string
-    try:
-        trail_length = float(trail_length)
-    except (ValueError, TypeError):
-        raise ValueError("Please insert a valid decimal number for the trail length.")
-
-    # Validate the range
-    if trail_length < 1 or trail_length > 25:
-        raise ValueError("Not a relevant trail length, sorry :(")
-
-    # Determine the score
-    if 9 <= trail_length <= 12:
-        return 10
-    elif 7 <= trail_length < 9:
-        return 9
-    elif 12 < trail_length <= 15:
-        return 8
-    elif 5 <= trail_length < 7:
-        return 7.5
-    elif 3 <= trail_length < 5:
-        return 6
-    elif 15 < trail_length <= 20:
-        return 5
-    elif 20 < trail_length <= 25:
-        return 4
-    elif 2 <= trail_length < 3:
-        return 2
-    elif 1 <= trail_length < 2:
-        return 1
-    # Default fallback (should not occur)
-    return 0
- 
-circular= {
-     "Yes": 10,
-     "No": 0
- }
-
-def incline_score (incline):
-    try:
-        incline = int(incline)
-    except (ValueError, TypeError):
-        raise ValueError("Please insert a valid number for the incline.")
-        # Validate the range
-    if incline < 1 or incline > 2500:
-        raise ValueError("Not a relevant incline, sorry :(")
-
-    if 550 <= incline <= 750:
-        return 10
-    elif 450 <= incline < 550:
-        return 9
-    elif 750 < incline <= 850:
-        return 8
-    elif 350 <= incline < 450:
-        return 7.5
-    elif 850 < incline <= 1000:
-        return 6
-    elif 250 <= incline < 350:
-        return 5
-    elif 150 <= incline < 250:
-        return 4
-    elif 1000 < incline <= 1200:
-        return 3
-    elif 1200 < incline <=2500:
-        return 2.5
-    elif 1 <= incline < 150:
-        return 2
-    # Default fallback (should not occur)
-    return 0
-
-def decline_score (decline):
-    try:
-        decline = int(decline)
-    except (ValueError, TypeError):
-        raise ValueError("Please insert a valid number for the decline.")
-        # Validate the range
-    if decline < -2500 or decline > 1:
-        raise ValueError("Not a relevant decline, sorry :(")
-
-    if 550 <= decline <= 750:
-        return 10
-    elif 450 <= decline < 550:
-        return 9
-    elif 750 < decline <= 850:
-        return 8
-    elif 350 <= decline < 450:
-        return 7.5
-    elif 850 < decline <= 1000:
-        return 6
-    elif 250 <= decline < 350:
-        return 5
-    elif 150 <= decline < 250:
-        return 4
-    elif 1000 < decline <= 1200:
-        return 3
-    elif 1200 < decline <=2500:
-        return 2.5
-    elif 1 <= decline < 150:
-        return 2
-    # Default fallback (should not occur)
-    return 0 
-
-def inc_precentage_score(incline_pre):
-     if not incline_pre:
-         raise ValueError("Please enter an incline precentage of the trail")
-     elif 40 < incline_pre <=50:
-         return 10
-     elif 50 < incline_pre <=60:
-         return 9
-     elif 60 < incline_pre <=70:
-         return 8
-     elif 30 <= incline_pre <=40:
-         return 7
-     elif 70 < incline_pre <=80: 
-         return 6
-     elif 80 < incline_pre <=90:
-         return 5
-     elif 90 < incline_pre <=100:
-         return 4
-     elif 20 <= incline_pre <30:
-         return 3
-     elif 10 <= incline_pre <20:
-         return 2
-     elif 0<= incline_pre < 10:
-         return 1
-     else:
-         0   
-
-def dec_precentage_score(decline_pre):
-     if not decline_pre:
-         raise ValueError("Please enter an incline precentage of the trail")
-     elif 50 <= decline_pre <60:
-         return 10
-     elif 40 <= decline_pre <50:
-         return 9
-     elif 30 <= decline_pre <40:
-         return 8
-     elif 60 <= decline_pre <=70:
-         return 7
-     elif 20 <= decline_pre <30:
-         return 6
-     elif 10 <= decline_pre <20:
-         return 5
-     elif 0 <= decline_pre <10:
-         return 4
-     elif 70 < decline_pre <=80:
-         return 3
-     elif 80 < decline_pre <90:
-         return 2
-     elif 90 < decline_pre <=100:
-         return 1
-     else:
-        0                
-def kmh_validity(kmh):
-    # Check if kmh is provided
-    if kmh is None or kmh == '':
-        raise ValueError("Please enter an average KMH")
-    try:
-        kmh_float = float(kmh)
-    except ValueError:
-        raise ValueError("Please insert a valid decimal number for kmh.")
-
-    if kmh_float <= 0 or kmh_float >= 15:
-        raise ValueError("Invalid kmh input! Must be greater than 0 and less than 15.")
-
-    return kmh_float
-
-def walkinghr_scores(whr):
-    if not whr:
-        raise ValueError("Please provide a travel time in the format 'hh:mm'")
-    try:
-        # Split the input into hours and minutes
-        hours, minutes = map(int, whr.split(":"))
-    except ValueError:
-        raise ValueError("Invalid format. Please provide time in 'hh:mm' format.")
-
-    # Convert to decimal hours
-    whr_value = hours + minutes / 60
-
-    # Determine the score based on ranges
-    if 4.5 <= whr_value <= 5:
-        return 10
-    elif 4 < whr_value <= 4.5:
-        return 9
-    elif 3.5 <= whr_value <= 4:
-        return 8
-    elif 3 <= whr_value < 3.5:
-        return 7
-    elif 5 < whr_value <= 5.5:
-        return 6.5
-    elif 5.5 < whr_value <= 6.5:
-        return 6
-    elif 6.5 < whr_value <= 7.5:
-        return 5.5
-    elif 2.5 <= whr_value < 3:
-        return 5
-    elif 2 <= whr_value < 2.5:
-        return 4.5
-    elif 7.5 < whr_value <= 8.5:
-        return 4
-    elif 1.5 <= whr_value < 2:
-        return 3
-    elif 1 <= whr_value < 1.5:
-        return 2.5
-    elif 8.5 < whr_value <= 9:
-        return 2
-    elif 0 < whr_value < 1:
-        return 1
-    elif whr_value == 0 or whr_value > 9:
-        return 0
-    else:
-        # Fallback case for unexpected inputs
-        raise ValueError("Unexpected input. Ensure the time is within a valid range.")      
-    
-           
-How_far_from_me = {
-"Half an hour drive": 10,
-"1 drive hour": 8.5,
-"1.5-2 drive hours": 7,
-"2.5 drive hours": 6,
-"2.5-3 drive hours": 4,
-"3.5 drive hours": 3,
-"3.5-4 drive hours": 2,
-"More than 4 drive hours": 0
-}
-
-Required_eq = {
-"Only a small bag with 1.5 liter bottle. hat, casual clothing": 10,
-"Could be a small bag, but packed with 3 liter of water, and food, casual clothing": 8.5,
-"Could be casual clothing, but must have a professional day-trip bagpack, with a hydration pack, small botlle, food and first-aid kit": 7,
-"Hiking clothing required, with a good pack and trekking poles": 6.5,
-"Hiking clothing, a fully load day-trip backpack, with 6 liter of water, kooking kit, food, first-aid kit": 5.5,
-"Fully equipped for a daytrip, including trekking poles": 4,
-"A professional hiking clothing, fully loaded 60 liter professional bagpack": 2.5,
-}
-
-Weather = {
-"Clear, an average of 18-20C": 10,
-"Clear, an average of 22-25C": 9,
-"Cloudly with some rain and snow, 8-10C": 8.5,
-"Cloudly, but dry with 17-20C": 8,
-"Cloudly with light rain, 16-18C": 7.5,
-"Clear, 27-30C": 6,
-"Cloudly with heavy rain, 23-25C": 5,
-"Cloudly with heavy rain, lower then 15C": 3,
-"Clear, 35-40C": 1.5,
-"Lower than 8C or Higher than 40C": 0
-}
-
-Season = {
-    "Winter - Spring": 10,
-    "Winter": 8.5,
-    "Spring": 7,
-    "Autumn - Winter": 5.5,
-    "Autumn": 4,
-    "Spring - Summer": 3,
-    "Summer-Autumn": 2,
-    "Summer": 1
-       
-}
-
-Crowdness = {
-"Not crowded at all": 10,
-"Some hikers along the way, not really affecting the experience": 8.5,
-"Lots of hikers along the trail": 7,
-"Many families along the way, but there's still enough room for all": 6,
-"Not so many people along the way, but feels very crowded": 3,
-"Too many hikers, families and waste along the way, almost can't move": 0 
-}
-
 background_style = {
     "background-image": "url('https://as2.ftcdn.net/v2/jpg/08/97/50/73/1000_F_897507396_zRg90Ih9yJzejFTWpolmh92eQvuZplme.jpg')",
     "background-size": "cover",
@@ -687,7 +344,6 @@ def tab1_layout():
     return html.Div(
         style=background_style,
         children=[
-            dcc.Interval(id='interval-component', interval=1 * 1000, n_intervals=0),
             dcc.Store(id='df-store'),  # Store to hold DataFrame data
             dcc.Store(id='default-values', data={
                 'trip': "",
@@ -782,6 +438,16 @@ def tab1_layout():
                                         id='confirm_remove_trip',
                                         message="Are you sure you want to remove this trip? This action cannot be undone.",
                                     ),
+                                    dcc.Markdown(
+                                        children="### Rescore all trips",
+                                        style={'fontSize': '24px', 'marginTop': '20px', 'textAlign': 'left'}
+                                    ),
+                                    dbc.Button("Rescore", id='rescore_btn', color='success', n_clicks=0, style=button_style3),
+                                    dcc.ConfirmDialog(
+                                        id='confirm_rescore',
+                                        message="Recompute the Total Score of every trip with the current weights?",
+                                    ),
+                                    dcc.Markdown(id='rescore_status', children=""),
                                 ],
                                 width=3
                             ),
@@ -846,6 +512,16 @@ def tab1_layout():
                                                 value="",
                                                 className="form-control"
                                             ),
+                                            html.Br(),
+                                            # A recorded track fills in the trail metrics below
+                                            dcc.Upload(
+                                                id='gpx_upload',
+                                                children=html.Div("Drop a GPX file or click to upload"),
+                                                accept=".gpx",
+                                                style={'border': '1px dashed #666', 'border-radius': '5px',
+                                                       'padding': '8px', 'text-align': 'center', 'cursor': 'pointer'},
+                                            ),
+                                            html.Div(id='gpx_status'),
                                             html.Div([
                                                 html.Br(),
                                                 dbc.Label("Trail Length:"),
@@ -966,33 +642,158 @@ def exclude_empty_all_na(df):
 
 @app.callback(
     [
-        Output("modal-body", "children"),
-        Output("score-modal", "is_open"),
-        Output("confirm_reset", "displayed"),
-        Output('trips_count', 'children'),
-        Output("confirm_remove_trip", "displayed"),
-        Output("trips_list", "options"),
-        Output("trips_list", "value"),
-        Output("trip_name", "value"),
-        Output("coordinate", "value"),
-        Output("trail_link", "value"),        
-        Output("area", "value"),
-        Output("accessibility", "value"),
-        Output("Season","value"),
-        Output("challenge", "value"),
-        Output("terrain", "value"),
-        Output("view", "value"),
-        Output("shade", "value"),
-        Output("water", "value"),
-        Output("trail_length", "value"),
-        Output("circular", "value"),
-        Output("required_eq", "value"),
-        Output("weather", "value"),
-        Output("crowdness", "value"),
-        Output("nearby", "value"),
-        Output("Entry_Fee", "value"),
-        Output("how_far_from_me", "value"),
-        Output("kmh", "value"),  # Added this output to reset kmh to default
+        Output('confirm_rescore', 'displayed'),
+        Output('rescore_status', 'children'),
+    ],
+    [
+        Input('rescore_btn', 'n_clicks'),
+        Input('confirm_rescore', 'submit_n_clicks'),
+    ],
+    prevent_initial_call=True
+)
+def rescore_all_trips(rescore_clicks, confirm_rescore):
+    """
+    Admin action: rescores the whole collection after a weight or rubric change.
+    The new generation reaches the other tabs through the collection event stream.
+    """
+    triggered_id = dash.callback_context.triggered_id
+    if triggered_id == 'rescore_btn':
+        return True, dash.no_update
+    try:
+        summary = rescore_collection(dataset_cache, storage)
+    except Exception as e:
+        return False, f"Rescore failed: {e}"
+    return False, describe(summary)
+
+# ---------------------------------------------------------------------------------
+#  Trips Calculation callbacks
+#  Each one only runs on its own triggers: the trail geometry fields are computed
+#  in the browser and never touch the server, the trips list is refreshed on
+#  collection changes, and save / remove / reset only run on their buttons.
+# ---------------------------------------------------------------------------------
+
+# (component id, key in the default-values store) of every field cleared after a save, remove or reset
+FORM_RESET_FIELDS = [
+    ("trip_name", "trip"),
+    ("coordinate", "mid_trail_coordinate"),
+    ("trail_link", "trail_link"),
+    ("area", "area_scores"),
+    ("accessibility", "Accessibility"),
+    ("Season", "Season"),
+    ("challenge", "Challenge"),
+    ("terrain", "terrain"),
+    ("view", "view"),
+    ("shade", "shade"),
+    ("water", "water"),
+    ("trail_length", "trail_length"),
+    ("circular", "circular"),
+    ("required_eq", "required_eq"),
+    ("weather", "weather"),
+    ("crowdness", "crowdness"),
+    ("nearby", "nearby_attractions"),
+    ("Entry_Fee", "Entry_Fee"),
+    ("how_far_from_me", "how_far_from_me"),
+    ("kmh", "kmh"),
+    ("incline", "incline"),
+    ("decline", "decline"),
+    ("declinedg", "declinedg"),
+    ("inclinedg", "inclinedg"),
+    ("percentagein", "percentagein"),
+    ("percentagede", "percentagede"),
+    ("walkinghr", "walkinghr"),
+]
+
+
+def form_reset_outputs():
+    return [Output(component_id, "value", allow_duplicate=True) for component_id, _ in FORM_RESET_FIELDS]
+
+
+def form_reset_values(defaults):
+    return [defaults[key] for _, key in FORM_RESET_FIELDS]
+
+
+def trips_count_content(df):
+    return f"""  
+    ### Trips Evaluation Count
+    There are **{compute_valid_score_count(df)}** trips.
+    """
+
+
+def fuzzy_trip_options(search_value, df, current):
+    """
+    Dropdown options for the trips of df closest to the typed text, best first,
+    plus the selected trip. The typed text is set as each option's search value,
+    so the dropdown's own filter doesn't hide the misspelled matches.
+    """
+    labels = trip_names_index.search(search_value, limit=FUZZY_LIMIT, labels=set(df.index))
+    trips = list(dict.fromkeys(df.loc[labels, "Trip"].tolist()))
+    options = [{'label': trip, 'value': trip, 'search': search_value} for trip in trips]
+    if current and current not in trips:
+        options.append({'label': current, 'value': current})
+    return options
+
+
+def trips_list_state(df, current):
+    """
+    Options of the trips dropdown, keeping the current selection when it still exists.
+    """
+    if df.empty:
+        return [], None
+    trips_list = df["Trip"].to_list()
+    trips_options = [{'label': trip, 'value': trip} for trip in df["Trip"].unique()]
+    if current in trips_list:
+        return trips_options, current
+    return trips_options, trips_list[0]
+
+
+@app.callback(
+    [
+        Output('gpx_status', 'children'),
+        Output('trip_name', 'value', allow_duplicate=True),
+        Output('coordinate', 'value', allow_duplicate=True),
+        Output('circular', 'value', allow_duplicate=True),
+        Output('trail_length', 'value', allow_duplicate=True),
+        Output('incline', 'value', allow_duplicate=True),
+        Output('decline', 'value', allow_duplicate=True),
+        Output('percentagein', 'value', allow_duplicate=True),
+    ],
+    Input('gpx_upload', 'contents'),
+    [
+        State('gpx_upload', 'filename'),
+        State('trip_name', 'value'),
+    ],
+    prevent_initial_call=True
+)
+def fill_from_gpx(contents, filename, trip_name):
+    """
+    Fills the form's trail metrics from an uploaded GPX track. The degrees and the
+    walking time follow from them in trailGeometry, like typed values.
+    """
+    if not contents:
+        raise PreventUpdate
+    try:
+        name, lat, lon, ele = parse_gpx(base64.b64decode(contents.split(",", 1)[1]).decode("utf-8"))
+        metrics = trail_metrics(lat, lon, ele)
+    except (ValueError, UnicodeDecodeError, gpxpy.gpx.GPXException) as e:
+        return [html.Div(f"Error: {e}", style={'color': 'red'})] + [dash.no_update] * 7
+    return [
+        html.Div(f"{filename}: {metrics['Trail Length']} KM, +{metrics['Incline']} / {metrics['Decline']} M"),
+        trip_name or name or os.path.splitext(filename or "")[0],
+        metrics["Coordinates"],
+        metrics["Circular?"],
+        str(metrics["Trail Length"]),
+        str(metrics["Incline"]),
+        str(metrics["Decline"]),
+        metrics["Inc_Pre"],
+    ]
+
+
+# Runs in the browser: trailGeometry in assets/trip_geometry.js mirrors naismith_rule and
+# float_to_duration from trip_scoring (tests/test_trip_geometry.py keeps them in step),
+# so typing in the form never waits for the server
+app.clientside_callback(
+    ClientsideFunction(namespace="trips", function_name="trailGeometry"),
+    [
         Output('incline', 'disabled'),
         Output('decline', 'disabled'),
         Output('percentagein', 'disabled'),
@@ -1003,21 +804,81 @@ def exclude_empty_all_na(df):
         Output("inclinedg","value"),
         Output("percentagein","value"),
         Output("percentagede","value"),
-        Output("walkinghr","value")  
+        Output("walkinghr","value")
     ],
     [
-        Input("calculate-btn", "n_clicks"),
         Input('circular', 'value'),
-        Input("confirm_remove_trip", "submit_n_clicks"),
-        Input("remove_btn", "n_clicks"),
-        Input("confirm_reset", "submit_n_clicks"),
-        Input("reset-btn", "n_clicks"),
         Input("incline","value"),
         Input("decline","value"),
         Input("percentagein","value"),
         Input("kmh","value"),
-        Input('interval-component', 'n_intervals')
     ],
+    State("trail_length", "value"),
+    prevent_initial_call=True
+)
+
+
+@app.callback(
+    [
+        Output('trips_count', 'children'),
+        Output("trips_list", "options"),
+        Output("trips_list", "value"),
+    ],
+    Input('collection-events', 'message'),
+    State("trips_list", "value"),
+)
+def refresh_trips_list(collection_version, trips_list_value):
+    """
+    Trip count and the remove dropdown, refreshed when the collection changes.
+    """
+    df = dataset_cache.get()
+    trips_options, trip_value = trips_list_state(df, trips_list_value)
+    return trips_count_content(df), trips_options, trip_value
+
+
+@app.callback(
+    Output("trips_list", "options", allow_duplicate=True),
+    Input("trips_list", "search_value"),
+    State("trips_list", "value"),
+    prevent_initial_call=True
+)
+def search_trips_list(search_value, trips_list_value):
+    """
+    Typo-tolerant search in the remove dropdown, the full list comes back once the search is cleared.
+    """
+    df = dataset_cache.get()
+    if not search_value:
+        return trips_list_state(df, trips_list_value)[0]
+    return fuzzy_trip_options(search_value, df, trips_list_value)
+
+
+@app.callback(
+    Output("confirm_remove_trip", "displayed"),
+    Input("remove_btn", "n_clicks"),
+    prevent_initial_call=True
+)
+def ask_remove_trip(remove_clicks):
+    return remove_clicks > 0
+
+
+@app.callback(
+    Output("confirm_reset", "displayed"),
+    Input("reset-btn", "n_clicks"),
+    prevent_initial_call=True
+)
+def ask_reset_collection(reset_clicks):
+    return reset_clicks > 0
+
+
+@app.callback(
+    [
+        Output("modal-body", "children", allow_duplicate=True),
+        Output("score-modal", "is_open", allow_duplicate=True),
+        Output('trips_count', 'children', allow_duplicate=True),
+        Output("trips_list", "options", allow_duplicate=True),
+        Output("trips_list", "value", allow_duplicate=True),
+    ] + form_reset_outputs(),
+    Input("calculate-btn", "n_clicks"),
     [
         State("trip_name", "value"),
         State("coordinate", "value"),
@@ -1035,12 +896,12 @@ def exclude_empty_all_na(df):
         State("trail_length", "value"),
         State("incline","value"),
         State("decline","value"),
-        State("inclinedg","value"), 
+        State("inclinedg","value"),
         State("declinedg","value"),
         State("percentagein","value"),
         State("percentagede","value"),
         State("kmh","value"),
-        State("walkinghr","value"),              
+        State("walkinghr","value"),
         State("weather", "value"),
         State("crowdness", "value"),
         State("nearby", "value"),
@@ -1049,890 +910,235 @@ def exclude_empty_all_na(df):
         State("trips_list", "value"),
         State("default-values", "data")
     ],
-    prevent_initial_call=True 
+    prevent_initial_call=True
 )
-def update_tab1(calculate_clicks, circular_input, confirm_remove_trip, remove_clicks, confirm_reset,
-                reset_clicks, incline_value, decline_input, precentagein_input, kmh_input, n_intervals,
-                trip_name, coordinate,trail_link, area, accessibility, season, challenge, terrain, view, shade, water,
-                required_eq, circular, trail_length, inc, dec, incdeg, decdeg, incpre, decpre, kmh, walkinghours,
-                weather, crowdness, nearby, entry_fee, how_far_from_me, trips_list_value, defaults):
-    ctx = dash.callback_context
-    if not ctx.triggered:
+def save_trip(calculate_clicks, trip_name, coordinate,trail_link, area, accessibility, season, challenge, terrain,
+              view, shade, water, required_eq, circular, trail_length, inc, dec, incdeg, decdeg, incpre, decpre, kmh,
+              walkinghours, weather, crowdness, nearby, entry_fee, how_far_from_me, trips_list_value, defaults):
+    if not calculate_clicks:
         raise PreventUpdate
-    
-    triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
-    
-
-    trip_count_content = dash.no_update
-    modal_content = dash.no_update
-    modal_is_open = dash.no_update
-    confirm_remove_trip_displayed = False
-    confirm_reset_displayed = False
-    trips_options = dash.no_update
-    trip_value = dash.no_update
-    incline_disabled = dash.no_update
-    decline_disabled = dash.no_update
-    decline_output = dash.no_update
-    inclinedg_value = dash.no_update
-    declinedg_value = dash.no_update
-    percentagein_disabled = dash.no_update
-    percentagede_disabled = dash.no_update
-    whr_disabled = dash.no_update
-    percentagein_value = dash.no_update
-    percentagede_value = dash.no_update
-    walkinghr_value = dash.no_update
-
-    trp = trips_list_value
-
-    # Read CSV
-    if os.path.exists(csv_file_path):
-        if os.path.getsize(csv_file_path) > 0:
-            df = pd.read_csv(csv_file_path, index_col=0)
-        else:
-            df = pd.DataFrame()
-    else:
-        df = pd.DataFrame()
-
-    if not df.empty:
-        trips_list = df["Trip"].to_list()
-        trips_options = [{'label': trip, 'value': trip} for trip in df["Trip"].unique()]
-        
-        if trips_list:
-            if trp in trips_list:
-                trip_value = trp  # Keep current selection
-            else:
-                trip_value = trips_list[0]  # Select first if current not available
-        else:
-            trip_value = None
-    else:
-        trips_options = []
-        trip_value = None
-
-    # Update the trip count
-    valid_score_count = compute_valid_score_count(df)
-    trip_count_content = f"""  
-    ### Trips Evaluation Count
-    There are **{valid_score_count}** trips.
-    """
 
     circular_scores = {
         "Yes": 10,
         "No": 0
     }
 
-    # Validate trail_length
-    valid_trail_length = False
-    if trail_length is not None:
-        try:
-            trail_length_num = float(trail_length)
-            if 1 < trail_length_num <= 25:
-                valid_trail_length = True
-        except ValueError:
-            pass
-
-    # Set incline_disabled and decline_disabled based on circular_input
-    if circular_input == "Yes":
-        incline_disabled = False
-        decline_disabled = True
-        percentagein_disabled = True
-        percentagede_disabled = True
-        whr_disabled = True
-
-        if incline_value not in [None, ""]:
-            try:
-                incline_value_num = float(incline_value)
-                decline_output = 0 - incline_value_num
-                decs_value = float(-decline_output)
-                percentagein_value = 50
-                percentagede_value = 50
-                if valid_trail_length:
-                    initial_cal = math.atan(incline_value_num / (trail_length_num * 1000 / 2))
-                    inclinedg_value = round(math.degrees(initial_cal),4)
-                    declinedg_value = -inclinedg_value
-                    if kmh_input not in [None, ""]:
-                        v_kmh= float(kmh_input)
-                        v_trln = float(trail_length)
-                        walkinghr_value= naismith_rule(v_trln,incline_value_num,(decs_value),v_kmh)
-                    else:
-                        walkinghr_value=dash.no_update
-            except ValueError:
-                decline_output = ""
-        else:
-            decline_output = ""
-    elif circular_input == "No":
-        incline_disabled = False
-        decline_disabled = False
-        percentagein_disabled = False
-        percentagede_disabled = False
-        whr_disabled = True
-        percentagein_value = ""
-        percentagede_value = ""
-
-        if precentagein_input not in [None, ""]:
-            try:
-                percentagein_num = float(precentagein_input)
-                percentagein_value = percentagein_num
-                percentagede_value = 100 - percentagein_num
-            except ValueError:
-                percentagein_value = ""
-                percentagede_value = ""
-        else:
-            percentagein_value = ""
-            percentagede_value = ""
-
-        if valid_trail_length:
-            try:
-                if incline_value not in [None, ""]:
-                    incline_value_num = float(incline_value)
-                    percentagein_val = float(percentagein_value) if percentagein_value != "" else 0
-                    initial_cal = math.atan(incline_value_num / (trail_length_num * 1000 * (percentagein_val/100))) if percentagein_val > 0 else 0
-                    inclinedg_value = math.degrees(initial_cal)
-                else:
-                    inclinedg_value = ""
-
-                if decline_input not in [None, ""]:
-                    decline_value_num = float(decline_input)
-                    percentagede_val = float(percentagede_value) if percentagede_value != "" else 0
-                    initial_cal_2 = math.atan(decline_value_num / (trail_length_num * 1000 * (percentagede_val/100))) if percentagede_val > 0 else 0
-                    declinedg_value = math.degrees(initial_cal_2)
-                else:
-                    declinedg_value = ""
-
-                if incline_value not in [None, ""] and decline_input not in [None, ""]:
-                    incline_value_num = float(incline_value)
-                    decline_value_num = -float(decline_input)
-                    if kmh_input not in [None, ""]:
-                        v_kmh= float(kmh_input)
-                        v_trln = float(trail_length)
-                        walkinghr_value= naismith_rule(v_trln,incline_value_num,decline_value_num,v_kmh)
-                    else:
-                        walkinghr_value=dash.no_update
-                else:
-                    if inclinedg_value == "" and declinedg_value == "":
-                        walkinghr_value = dash.no_update
-            except ValueError:
-                inclinedg_value = ""
-                declinedg_value = ""
-                walkinghr_value = dash.no_update
+    # Shared snapshot of the collection, only re-read when the file changes
+    df = dataset_cache.get()
+    try:
+        # With a home location set, the drive time comes from the coordinate instead of the form
+        home = load_home()
+        if home is not None and coordinate and "," in coordinate:
+            lat, lon = parse_coordinate(coordinate)
+            how_far_from_me = distance_labels([lat], [lon], home)[0]
+
+        scores = {
+            "Trip": trip_name_val(trip_name, df),
+            "Coordinates": mid_trail_coordinate(coordinate,trail_link,season, df),
+            "Trail Link": link_validity(trail_link,df),
+            "Area": area_scores.get(area, 0),
+            "Accessibility": Accessibility.get(accessibility, 0),
+            "Season": Season.get(season,0),
+            "Challenge": Challenge.get(challenge, 0),
+            "Terrain": Terrain.get(terrain, 0),
+            "View": View.get(view, 0),
+            "Shade": Shade.get(shade, 0),
+            "Entry Fee": Entry_Fee.get(entry_fee, 0),
+            "Water": Water.get(water, 0),
+            "Nearby Attractions": Nearby_attractions.get(nearby, 0),
+            "Circular?": circular_scores.get(circular, 0),
+            "Trail Length": trail_length_score(trail_length),
+            "Incline": incline_score(inc),
+            "Incline Percentage": inc_precentage_score(incpre),
+            "Incline Degree": incdeg,
+            "Decline": decline_score(dec),
+            "Decline Precentage": dec_precentage_score(decpre),
+            "Decline Degree": decdeg,
+            "KM Per Hour": kmh_validity(kmh),
+            "Walking Hours": walkinghr_scores(walkinghours),
+            "How Far?": How_far_from_me.get(how_far_from_me, 0),
+            "Required EQ": Required_eq.get(required_eq, 0),
+            "Weather": Weather.get(weather, 0),
+            "Crowdness": Crowdness.get(crowdness, 0)
+        }
+
+        # The weights live in trip_scoring.WEIGHTS, shared with the bulk rescore
+        component_scores = {
+            name: scores["Decline Precentage" if name == "Decline Percentage" else name]
+            for name in WEIGHTS
+        }
+        weighted_scores = {name: component_scores[name] * weight for name, weight in WEIGHTS.items()}
+
+        total_score = sum(weighted_scores.values())
+
+        values = [
+            trip_name, coordinate,trail_link, area, accessibility,season, challenge, terrain, view,
+            shade, water,circular, trail_length, inc,incpre,incdeg, dec,decpre,decdeg,
+            kmh, walkinghours, required_eq, weather,
+            crowdness, nearby, entry_fee, how_far_from_me, total_score
+        ]
+        # Per-criterion score columns, in the SCORE_COLUMNS order
+        values += list(component_scores.values()) + list(weighted_scores.values())
+        # Coordinates as numbers (lat, lon), already validated above
+        values += list(parse_coordinate(coordinate))
+
+        # Append just the new row and add it to the cached snapshot
+        def append_new_trip(df_current):
+            new_row = storage.append_trip(data_path, values, storage.next_index(df_current))
+            if df_current.empty:
+                return new_row
+            return pd.concat([df_current, new_row])
+
+        df = dataset_cache.update(append_new_trip).df
+    except ValueError as e:
+        return [html.Div(f"Error: {str(e)}"), True] + [dash.no_update] * (3 + len(FORM_RESET_FIELDS))
+
+    trips_options, trip_value = trips_list_state(df, trips_list_value)
+    modal_content = html.Div([
+        html.H2(f"Total Score: {total_score}"),
+        html.Ul([html.Li(f"{key}: {val}") for key, val in scores.items()])
+    ])
+    return [modal_content, True, trips_count_content(df), trips_options, trip_value] + form_reset_values(defaults)
+
+
+@app.callback(
+    [
+        Output("modal-body", "children", allow_duplicate=True),
+        Output("score-modal", "is_open", allow_duplicate=True),
+        Output('trips_count', 'children', allow_duplicate=True),
+        Output("trips_list", "options", allow_duplicate=True),
+        Output("trips_list", "value", allow_duplicate=True),
+    ] + form_reset_outputs(),
+    Input("confirm_remove_trip", "submit_n_clicks"),
+    [
+        State("trips_list", "value"),
+        State("default-values", "data")
+    ],
+    prevent_initial_call=True
+)
+def remove_selected_trip(confirm_remove_trip, trp, defaults):
+    if not confirm_remove_trip:
+        raise PreventUpdate
+    if trp is None:
+        return ["No Trip Selected", True] + [dash.no_update] * (3 + len(FORM_RESET_FIELDS))
+
+    df = dataset_cache.get()
+    if os.path.exists(data_path) and not df.empty and trp in df["Trip"].values:
+        df = dataset_cache.update(lambda df_current: storage.remove_trip(data_path, df_current, trp)).df
+        modal_content = f"Trip '{trp}' has been removed."
     else:
-        incline_disabled = True
-        decline_disabled = True
-        percentagein_disabled = True
-        percentagede_disabled = True
-        whr_disabled = True
-        incline_value = ""
-        decline_output = ""
-        percentagein_value = ""
-        percentagede_value = ""
-        inclinedg_value = ""
-        declinedg_value = ""
-        walkinghr_value = ""
-
-    # Handle triggers
-    if triggered_id == 'interval-component':
-        # Just update trip count and do not reset user inputs
-        if not df.empty:
-            trips_list = df["Trip"].to_list()
-            trips_options = [{'label': trip, 'value': trip} for trip in df["Trip"].unique()]
-            
-            if trips_list:
-                if trp in trips_list:
-                    trip_value = trp
-                else:
-                    trip_value = trips_list[0]
-            else:
-                trip_value = None
-        else:
-            trips_options = []
-            trip_value = None
+        modal_content = f"Trip '{trp}' not found in data."
 
-        valid_score_count = compute_valid_score_count(df)
-        trip_count_content = f"""  
-        ### Trips Evaluation Count
-        There are **{valid_score_count}** trips.
-        """
+    trips_options, trip_value = trips_list_state(df, trp)
+    return [modal_content, True, trips_count_content(df), trips_options, trip_value] + form_reset_values(defaults)
 
-        return (
-            modal_content,
-            modal_is_open,
-            confirm_reset_displayed,
-            trip_count_content,
-            confirm_remove_trip_displayed,
-            trips_options,
-            trip_value,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            incline_disabled,
-            decline_disabled,
-            percentagein_disabled,
-            percentagede_disabled,
-            whr_disabled,
-            decline_output,
-            declinedg_value,
-            inclinedg_value,
-            percentagein_value,
-            percentagede_value,
-            walkinghr_value
-        )
 
-    elif triggered_id == "reset-btn" and reset_clicks > 0:
-        confirm_reset_displayed = True
-        return (
-            modal_content,
-            modal_is_open,
-            confirm_reset_displayed,
-            trip_count_content,
-            confirm_remove_trip_displayed,
-            trips_options,
-            trip_value,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            incline_disabled,
-            decline_disabled,
-            percentagein_disabled,
-            percentagede_disabled,
-            whr_disabled,
-            decline_output,
-            declinedg_value,
-            inclinedg_value,
-            percentagein_value,
-            percentagede_value,
-            walkinghr_value
-        )
+@app.callback(
+    [
+        Output("modal-body", "children", allow_duplicate=True),
+        Output("score-modal", "is_open", allow_duplicate=True),
+        Output('trips_count', 'children', allow_duplicate=True),
+        Output("trips_list", "options", allow_duplicate=True),
+        Output("trips_list", "value", allow_duplicate=True),
+    ] + form_reset_outputs(),
+    Input("confirm_reset", "submit_n_clicks"),
+    State("default-values", "data"),
+    prevent_initial_call=True
+)
+def reset_collection(confirm_reset, defaults):
+    if not confirm_reset:
+        raise PreventUpdate
 
-    elif triggered_id == "confirm_reset" and confirm_reset > 0:
-        # Handle confirm reset
-        if os.path.exists(csv_file_path) and not df.empty:
-            df = pd.DataFrame()
-            df.to_csv(csv_file_path, index=True)
-            modal_content = html.Div("DataFrame cleared successfully.")
-            modal_is_open = True
-            valid_score_count = compute_valid_score_count(df)
-            trip_count_content = f"""
-            ### Trips Evaluation Count
-            There are **{valid_score_count}** trips.
-            """ 
-            trips_options = []
-            trip_value = None
-            return (
-                    modal_content,                 # "modal-body", "children"
-                    modal_is_open,                 # "score-modal", "is_open"
-                    confirm_reset_displayed,       # "confirm_reset", "displayed"
-                    trip_count_content,            # 'trips_count', 'children'
-                    confirm_remove_trip_displayed, # "confirm_remove_trip", "displayed"
-                    trips_options,                 # "trips_list", "options"
-                    trip_value,                    # "trips_list", "value"
-
-                    # Resetting all fields to defaults:
-                    defaults["trip"],             # "trip_name", "value"
-                    defaults["mid_trail_coordinate"], # "coordinate", "value"
-                    defaults["trail_link"],
-                    defaults["area_scores"],       # "area", "value"
-                    defaults["Accessibility"],     # "accessibility", "value"
-                    defaults["Season"],
-                    defaults["Challenge"],         # "challenge", "value"
-                    defaults["terrain"],           # "terrain", "value"
-                    defaults["view"],              # "view", "value"
-                    defaults["shade"],             # "shade", "value"
-                    defaults["water"],             # "water", "value"
-                    defaults["trail_length"],      # "trail_length", "value"
-                    defaults["circular"],          # "circular", "value"
-                    defaults["required_eq"],       # "required_eq", "value"
-                    defaults["weather"],           # "weather", "value"
-                    defaults["crowdness"],         # "crowdness", "value"
-                    defaults["nearby_attractions"],# "nearby", "value"
-                    defaults["Entry_Fee"],         # "Entry_Fee", "value"
-                    defaults["how_far_from_me"],   # "how_far_from_me", "value"
-                    defaults["kmh"],               # "kmh", "value"
-                    
-                    incline_disabled,              # 'incline', 'disabled'
-                    decline_disabled,              # 'decline', 'disabled'
-                    percentagein_disabled,         # 'percentagein', 'disabled'
-                    percentagede_disabled,         # 'percentagede', 'disabled'
-                    whr_disabled,                  # "walkinghr","disabled"
-                    defaults["incline"],
-                    defaults["decline"],           # "decline","value"
-                    defaults["declinedg"],         # "declinedg","value"
-                    defaults["inclinedg"],         # "inclinedg","value"
-                    defaults["percentagein"],       # "percentagein","value"
-                    defaults["percentagede"],       # "percentagede","value"
-                    defaults["walkinghr"]           # "walkinghr","value"
-                )
+    df = dataset_cache.get()
+    if os.path.exists(data_path) and not df.empty:
+        df = dataset_cache.update(lambda df_current: storage.clear_collection(data_path)).df
+        modal_content = html.Div("DataFrame cleared successfully.")
+        trips_options, trip_value = [], None
+    else:
         modal_content = "No Data to Clear."
-        modal_is_open = True
-        valid_score_count = compute_valid_score_count(df)
-        trip_count_content = f"""
-        ### Trips Evaluation Count
-        There are **{valid_score_count}** trips.
-        """ 
-        return (
-                modal_content,                 # "modal-body", "children"
-                modal_is_open,                 # "score-modal", "is_open"
-                confirm_reset_displayed,       # "confirm_reset", "displayed"
-                trip_count_content,            # 'trips_count', 'children'
-                confirm_remove_trip_displayed, # "confirm_remove_trip", "displayed"
-                trips_options,                 # "trips_list", "options"
-                trip_value,                    # "trips_list", "value"
-
-                # Resetting all fields to defaults:
-                defaults["trip"],             # "trip_name", "value"
-                defaults["mid_trail_coordinate"], # "coordinate", "value"
-                defaults["trail_link"],
-                defaults["area_scores"],       # "area", "value"
-                defaults["Accessibility"],     # "accessibility", "value"
-                defaults["Season"],
-                defaults["Challenge"],         # "challenge", "value"
-                defaults["terrain"],           # "terrain", "value"
-                defaults["view"],              # "view", "value"
-                defaults["shade"],             # "shade", "value"
-                defaults["water"],             # "water", "value"
-                defaults["trail_length"],      # "trail_length", "value"
-                defaults["circular"],          # "circular", "value"
-                defaults["required_eq"],       # "required_eq", "value"
-                defaults["weather"],           # "weather", "value"
-                defaults["crowdness"],         # "crowdness", "value"
-                defaults["nearby_attractions"],# "nearby", "value"
-                defaults["Entry_Fee"],         # "Entry_Fee", "value"
-                defaults["how_far_from_me"],   # "how_far_from_me", "value"
-                defaults["kmh"],               # "kmh", "value"
-                
-                incline_disabled,              # 'incline', 'disabled'
-                decline_disabled,              # 'decline', 'disabled'
-                percentagein_disabled,         # 'percentagein', 'disabled'
-                percentagede_disabled,         # 'percentagede', 'disabled'
-                whr_disabled,                  # "walkinghr","disabled"
-                defaults["incline"],
-                defaults["decline"],           # "decline","value"
-                defaults["declinedg"],         # "declinedg","value"
-                defaults["inclinedg"],         # "inclinedg","value"
-                defaults["percentagein"],       # "percentagein","value"
-                defaults["percentagede"],       # "percentagede","value"
-                defaults["walkinghr"]           # "walkinghr","value"
-            )
+        trips_options, trip_value = dash.no_update, dash.no_update
+    return [modal_content, True, trips_count_content(df), trips_options, trip_value] + form_reset_values(defaults)
 
-    elif triggered_id == "remove_btn" and remove_clicks > 0:
-        confirm_remove_trip_displayed = True
-        return (
-            modal_content,
-            modal_is_open,
-            confirm_reset_displayed,
-            trip_count_content,
-            confirm_remove_trip_displayed,
-            trips_options,
-            trip_value,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,        
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            incline_disabled,
-            decline_disabled,
-            percentagein_disabled,
-            percentagede_disabled,
-            whr_disabled,
-            decline_output,
-            declinedg_value,
-            inclinedg_value,
-            percentagein_value,
-            percentagede_value,
-            walkinghr_value
-        )
 
-    elif triggered_id == "confirm_remove_trip" and confirm_remove_trip > 0:
-        # Handle remove trip confirmation
-        if trp is None:
-            modal_content = "No Trip Selected"
-            modal_is_open = True
-            return (
-                modal_content,
-                modal_is_open,
-                confirm_reset_displayed,
-                trip_count_content,
-                confirm_remove_trip_displayed,
-                trips_options,
-                trip_value,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                dash.no_update,
-                incline_disabled,
-                decline_disabled,
-                percentagein_disabled,
-                percentagede_disabled,
-                whr_disabled,
-                decline_output,
-                declinedg_value,
-                inclinedg_value,
-                percentagein_value,
-                percentagede_value,
-                walkinghr_value
-            )
 
-        if os.path.exists(csv_file_path) and not df.empty:
-            if trp in df["Trip"].values:
-                df = df[df["Trip"] != trp]
-                df.to_csv(csv_file_path, index=True)
-                
-                df_filtered = exclude_empty_all_na(df)
-                trips_list = df_filtered["Trip"].to_list()
-                trips_options = [{'label': trip, 'value': trip} for trip in df_filtered["Trip"].unique()]
-                
-                if trips_list:
-                    if trp in trips_list:
-                        trip_value = trp
-                    else:
-                        trip_value = trips_list[0]
-                else:
-                    trip_value = None
-
-                valid_score_count = compute_valid_score_count(df_filtered)
-                trip_count_content = f"""  
-                ### Trips Evaluation Count
-                There are **{valid_score_count}** trips.
-                """
-                modal_content = f"Trip '{trip_name}' has been removed."
-                modal_is_open = True
-            return (
-                    modal_content,                 # "modal-body", "children"
-                    modal_is_open,                 # "score-modal", "is_open"
-                    confirm_reset_displayed,       # "confirm_reset", "displayed"
-                    trip_count_content,            # 'trips_count', 'children'
-                    confirm_remove_trip_displayed, # "confirm_remove_trip", "displayed"
-                    trips_options,                 # "trips_list", "options"
-                    trip_value,                    # "trips_list", "value"
-
-                    # Resetting all fields to defaults:
-                    defaults["trip"],             # "trip_name", "value"
-                    defaults["mid_trail_coordinate"], # "coordinate", "value"
-                    defaults["trail_link"],
-                    defaults["area_scores"],       # "area", "value"
-                    defaults["Accessibility"],     # "accessibility", "value"
-                    defaults["Season"],
-                    defaults["Challenge"],         # "challenge", "value"
-                    defaults["terrain"],           # "terrain", "value"
-                    defaults["view"],              # "view", "value"
-                    defaults["shade"],             # "shade", "value"
-                    defaults["water"],             # "water", "value"
-                    defaults["trail_length"],      # "trail_length", "value"
-                    defaults["circular"],          # "circular", "value"
-                    defaults["required_eq"],       # "required_eq", "value"
-                    defaults["weather"],           # "weather", "value"
-                    defaults["crowdness"],         # "crowdness", "value"
-                    defaults["nearby_attractions"],# "nearby", "value"
-                    defaults["Entry_Fee"],         # "Entry_Fee", "value"
-                    defaults["how_far_from_me"],   # "how_far_from_me", "value"
-                    defaults["kmh"],               # "kmh", "value"
-                    
-                    incline_disabled,              # 'incline', 'disabled'
-                    decline_disabled,              # 'decline', 'disabled'
-                    percentagein_disabled,         # 'percentagein', 'disabled'
-                    percentagede_disabled,         # 'percentagede', 'disabled'
-                    whr_disabled,                  # "walkinghr","disabled"
-                    defaults["incline"],
-                    defaults["decline"],           # "decline","value"
-                    defaults["declinedg"],         # "declinedg","value"
-                    defaults["inclinedg"],         # "inclinedg","value"
-                    defaults["percentagein"],       # "percentagein","value"
-                    defaults["percentagede"],       # "percentagede","value"
-                    defaults["walkinghr"]           # "walkinghr","value"
-                )
 
-        modal_content = f"Trip '{trip_name}' not found in data."
-        modal_is_open = True
-        return (
-                modal_content,                 # "modal-body", "children"
-                modal_is_open,                 # "score-modal", "is_open"
-                confirm_reset_displayed,       # "confirm_reset", "displayed"
-                trip_count_content,            # 'trips_count', 'children'
-                confirm_remove_trip_displayed, # "confirm_remove_trip", "displayed"
-                trips_options,                 # "trips_list", "options"
-                trip_value,                    # "trips_list", "value"
-
-                # Resetting all fields to defaults:
-                defaults["trip"],             # "trip_name", "value"
-                defaults["mid_trail_coordinate"], # "coordinate", "value"
-                defaults["trail_link"],
-                defaults["area_scores"],       # "area", "value"
-                defaults["Accessibility"],     # "accessibility", "value"
-                defaults["Season"],                
-                defaults["Challenge"],         # "challenge", "value"
-                defaults["terrain"],           # "terrain", "value"
-                defaults["view"],              # "view", "value"
-                defaults["shade"],             # "shade", "value"
-                defaults["water"],             # "water", "value"
-                defaults["trail_length"],      # "trail_length", "value"
-                defaults["circular"],          # "circular", "value"
-                defaults["required_eq"],       # "required_eq", "value"
-                defaults["weather"],           # "weather", "value"
-                defaults["crowdness"],         # "crowdness", "value"
-                defaults["nearby_attractions"],# "nearby", "value"
-                defaults["Entry_Fee"],         # "Entry_Fee", "value"
-                defaults["how_far_from_me"],   # "how_far_from_me", "value"
-                defaults["kmh"],               # "kmh", "value"
-                
-                incline_disabled,              # 'incline', 'disabled'
-                decline_disabled,              # 'decline', 'disabled'
-                percentagein_disabled,         # 'percentagein', 'disabled'
-                percentagede_disabled,         # 'percentagede', 'disabled'
-                whr_disabled,                  # "walkinghr","disabled"
-                defaults["incline"],
-                defaults["decline"],           # "decline","value"
-                defaults["declinedg"],         # "declinedg","value"
-                defaults["inclinedg"],         # "inclinedg","value"
-                defaults["percentagein"],       # "percentagein","value"
-                defaults["percentagede"],       # "percentagede","value"
-                defaults["walkinghr"]           # "walkinghr","value"
-            )
+# GeoJSON features of the located trips, built once per collection generation
+trip_features = TripFeatures(dataset_cache)
 
-    elif triggered_id == "calculate-btn" and calculate_clicks > 0:
-        try:
-            scores = {
-                "Trip": trip_name_val(trip_name, df),
-                "Coordinates": mid_trail_coordinate(coordinate,trail_link,season, df),
-                "Trail Link": link_validity(trail_link,df),
-                "Area": area_scores.get(area, 0),
-                "Accessibility": Accessibility.get(accessibility, 0),
-                "Season": Season.get(season,0),
-                "Challenge": Challenge.get(challenge, 0),
-                "Terrain": Terrain.get(terrain, 0),
-                "View": View.get(view, 0),
-                "Shade": Shade.get(shade, 0),
-                "Entry Fee": Entry_Fee.get(entry_fee, 0),
-                "Water": Water.get(water, 0),
-                "Nearby Attractions": Nearby_attractions.get(nearby, 0),
-                "Circular?": circular_scores.get(circular, 0),
-                "Trail Length": trail_length_score(trail_length),
-                "Incline": incline_score(inc),
-                "Incline Percentage": inc_precentage_score(incpre),
-                "Incline Degree": incdeg,
-                "Decline": decline_score(dec),
-                "Decline Precentage": dec_precentage_score(decpre),
-                "Decline Degree": decdeg,
-                "KM Per Hour": kmh_validity(kmh),
-                "Walking Hours": walkinghr_scores(walkinghours),
-                "How Far?": How_far_from_me.get(how_far_from_me, 0),
-                "Required EQ": Required_eq.get(required_eq, 0),
-                "Weather": Weather.get(weather, 0),
-                "Crowdness": Crowdness.get(crowdness, 0)
-            }
-
-            weighted_scores = {
-                "Area": scores["Area"] * 0.1,
-                "Accessibility": scores["Accessibility"] * 0.05,
-                "Season": scores["Season"] * 0.03,
-                "Challenge": scores["Challenge"] * 0.08,
-                "Terrain": scores["Terrain"] * 0.075,
-                "View": scores["View"] * 0.01,
-                "Shade": scores["Shade"] * 0.075,
-                "Entry Fee": scores["Entry Fee"] * 0.025,
-                "Water": scores["Water"] * 0.05,
-                "Nearby Attractions": scores["Nearby Attractions"] * 0.05,
-                "Circular?": scores["Circular?"] * 0.05,
-                "Trail Length": scores["Trail Length"] * 0.075,
-                "Incline": scores["Incline"] * 0.02,
-                "Decline": scores["Decline"] * 0.015,
-                "Incline Percentage": scores["Incline Percentage"] * 0.015,
-                "Decline Percentage": scores["Decline Precentage"] * 0.01,
-                "Walking Hours": scores["Walking Hours"] * 0.025,
-                "How Far?": scores["How Far?"] * 0.075,
-                "Required EQ": scores["Required EQ"] * 0.075,
-                "Weather": scores["Weather"] * 0.04,
-                "Crowdness": scores["Crowdness"] * 0.05
-            }
-
-            total_score = sum(weighted_scores.values())
-
-            labels = [
-        "Trip", "Coordinates","Trail Link", "Area", "Accessibility","Season", "Challenge",
-        "Terrain", "View", "Shade", "Water","Circular?", "Trail Length", "Incline","Inc_Pre",
-        "Incline Degree", "Decline","Dec_Pre", "Decline Degree", "KMH", "Walking Hours","Required Equipment",
-        "Weather", "Crowdness", "Nearby Attractions", "Entry Fee", "Distance", "Total Score"
-            ]            
-            values = [
-                trip_name, coordinate,trail_link, area, accessibility,season, challenge, terrain, view,
-                shade, water,circular, trail_length, inc,incpre,incdeg, dec,decpre,decdeg,
-                kmh, walkinghours, required_eq, weather,
-                crowdness, nearby, entry_fee, how_far_from_me, total_score
-            ]
-
-            # Append to CSV
-            if os.path.exists(csv_file_path):
-                if os.path.getsize(csv_file_path) > 0:
-                    df_existing = pd.read_csv(csv_file_path, index_col=0)
-                    new_row = pd.DataFrame([values], columns=labels)
-                    
-                    df_existing_filtered = exclude_empty_all_na(df_existing)
-                    new_row_filtered = exclude_empty_all_na(new_row)
-                    
-                    df_combined = pd.concat([df_existing_filtered, new_row_filtered], ignore_index=True)
-                    df_combined.to_csv(csv_file_path, index=True)
-                else:
-                    df_new = pd.DataFrame([values], columns=labels)
-                    df_new.to_csv(csv_file_path, index=True)
-            else:
-                df_new = pd.DataFrame([values], columns=labels)
-                df_new.to_csv(csv_file_path, index=True)
-                
-            df = pd.read_csv(csv_file_path, index_col=0)
-            df_filtered = exclude_empty_all_na(df)
-
-            valid_score_count = compute_valid_score_count(df_filtered)
-            trip_count_content = f"""  
-            ### Trips Evaluation Count
-            There are **{valid_score_count}** checked trips.
-            """
-            
-            trips_list = df_filtered["Trip"].to_list()
-            trips_options = [{'label': trip, 'value': trip} for trip in df_filtered["Trip"].unique()]
-
-            if trips_list:
-                if trp in trips_list:
-                    trip_value = trp
-                else:
-                    trip_value = trips_list[0]
-            else:
-                trip_value = None
-                
-            modal_content = html.Div([
-                html.H2(f"Total Score: {total_score}"),
-                html.Ul([html.Li(f"{key}: {val}") for key, val in scores.items()])
-            ])
-            modal_is_open = True
+# Features shown on the pages, so a changed filter or one new trip is sent as a Patch
+map_layers = SentLists()
 
-            return (
-                modal_content,                 # "modal-body", "children"
-                modal_is_open,                 # "score-modal", "is_open"
-                confirm_reset_displayed,       # "confirm_reset", "displayed"
-                trip_count_content,            # 'trips_count', 'children'
-                confirm_remove_trip_displayed, # "confirm_remove_trip", "displayed"
-                trips_options,                 # "trips_list", "options"
-                trip_value,                    # "trips_list", "value"
-
-                # Resetting all fields to defaults:
-                defaults["trip"],             # "trip_name", "value"
-                defaults["mid_trail_coordinate"], # "coordinate", "value"
-                defaults["trail_link"],                
-                defaults["area_scores"],       # "area", "value"
-                defaults["Accessibility"],     # "accessibility", "value"
-                defaults['Season'],
-                defaults["Challenge"],         # "challenge", "value"
-                defaults["terrain"],           # "terrain", "value"
-                defaults["view"],              # "view", "value"
-                defaults["shade"],             # "shade", "value"
-                defaults["water"],             # "water", "value"
-                defaults["trail_length"],      # "trail_length", "value"
-                defaults["circular"],          # "circular", "value"
-                defaults["required_eq"],       # "required_eq", "value"
-                defaults["weather"],           # "weather", "value"
-                defaults["crowdness"],         # "crowdness", "value"
-                defaults["nearby_attractions"],# "nearby", "value"
-                defaults["Entry_Fee"],         # "Entry_Fee", "value"
-                defaults["how_far_from_me"],   # "how_far_from_me", "value"
-                defaults["kmh"],               # "kmh", "value"
-                
-                incline_disabled,              # 'incline', 'disabled'
-                decline_disabled,              # 'decline', 'disabled'
-                percentagein_disabled,         # 'percentagein', 'disabled'
-                percentagede_disabled,         # 'percentagede', 'disabled'
-                whr_disabled,                  # "walkinghr","disabled"
-                defaults["decline"],           # "decline","value"
-                defaults["declinedg"],         # "declinedg","value"
-                defaults["inclinedg"],         # "inclinedg","value"
-                defaults["percentagein"],       # "percentagein","value"
-                defaults["percentagede"],       # "percentagede","value"
-                defaults["walkinghr"]           # "walkinghr","value"
-            )
-        except ValueError as e:
-            modal_content = html.Div(f"Error: {str(e)}")
-            modal_is_open = True
-        return (
-            modal_content,
-            modal_is_open,
-            confirm_reset_displayed,
-            trip_count_content,
-            confirm_remove_trip_displayed,
-            trips_options,
-            trip_value,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            incline_disabled,
-            decline_disabled,
-            percentagein_disabled,
-            percentagede_disabled,
-            whr_disabled,
-            decline_output,
-            declinedg_value,
-            inclinedg_value,
-            percentagein_value,
-            percentagede_value,
-            walkinghr_value
-        )
+# Grid index over the trip coordinates, for the radius filter and the map viewport
+spatial_index = SpatialIndex(dataset_cache)
 
-    # Default return if none of the above conditions match
-    return (
-        modal_content,
-        modal_is_open,
-        confirm_reset_displayed,
-        trip_count_content,
-        confirm_remove_trip_displayed,
-        trips_options,
-        trip_value,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        dash.no_update,
-        incline_disabled,
-        decline_disabled,
-        percentagein_disabled,
-        percentagede_disabled,
-        whr_disabled,
-        decline_output,
-        declinedg_value,
-        inclinedg_value,
-        percentagein_value,
-        percentagede_value,
-        walkinghr_value
-    )
+# The map gets the trips inside its bounds widened by this share on every side,
+# so a short pan doesn't show an empty edge before the next update
+VIEWPORT_PADDING = 0.25
 
 
+def visible_labels(labels, bounds):
+    """
+    The labels of trips inside the map bounds ([[south, west], [north, east]]), all of them before the map reports any.
+    """
+    if not bounds:
+        return labels
+    (south, west), (north, east) = bounds
+    pad_lat, pad_lon = (north - south) * VIEWPORT_PADDING, (east - west) * VIEWPORT_PADDING
+    inside = spatial_index.within_bounds(south - pad_lat, west - pad_lon, north + pad_lat, east + pad_lon)
+    return labels[labels.isin(inside)]
 
 
+def radius_center(click_data):
+    """
+    (lat, lon) of the last click on the map, or None.
+    """
+    latlng = (click_data or {}).get("latlng")
+    if not latlng:
+        return None
+    return latlng["lat"], latlng["lng"]
+
+
+def map_layer_update(map_token, labels):
+    """
+    Returns (value for the map layer's data, new token) for the trips with the given row labels.
+    """
+    features = trip_features.select(labels)
+    map_layer, map_token = map_layers.update(map_token, features, path=["features"])
+    if isinstance(map_layer, list):
+        map_layer = feature_collection(map_layer)
+    return map_layer, map_token
+
+
+def slider_marks(low, high):
+    """
+    RangeSlider marks at both ends of the range, one mark when they're the same.
+    """
+    style = {'font-size': '17px', 'font-weight': 'bold', 'color': '#333'}
+    return {int(value): {'label': f"{int(value)}", 'style': style} for value in sorted({low, high})}
+
 
 def tab2_layout():
 
     # If CSV exists and has data, read it to get initial min/max for the RangeSliders
-    if os.path.exists(csv_file_path) and os.path.getsize(csv_file_path) > 0:
-        df = pd.read_csv(csv_file_path, index_col=0)
+    if os.path.exists(data_path) and os.path.getsize(data_path) > 0:
+        df = dataset_cache.get()
         if not df.empty:
-            # Create markers
-            markers_israel = []
-            for i, (coord, name) in enumerate(zip(df['Coordinates'], df['Trip'])):
-                try:
-                    position = ast.literal_eval(coord)
-                    if isinstance(position, (list, tuple)) and len(position) == 2:
-                        markers_israel.append(
-                            dl.Marker(
-                                position=position,
-                                children=[dl.Popup(name)],
-                                id="israel-mark-" + str(i)
-                            )
-                        )
-                except (SyntaxError, ValueError):
-                    pass
+            # Features of the map layer
+            markers_israel = trip_features.select(df.index)
         else:
             return "No DF Available"
     else:
         # If CSV doesn't exist or is empty, just build a minimal layout
         df = pd.DataFrame()
-        markers_israel = []
+        markers_israel = {}
+
+    # The drive distances are derived from the home location when one is set
+    home = load_home()
 
     # If df is not empty, define some default range slider values
     if not df.empty:
-        length_min = float(df["Trail Length"].min())
-        length_max = float(df["Trail Length"].max())
-        score_min = float(df["Total Score"].min())
-        score_max = float(df["Total Score"].max())
+        length_min, length_max = length_ranges.column().bounds()
+        score_min, score_max = score_ranges.column(DEFAULT_PROFILE).bounds()
     else:
         # fallback
         length_min, length_max = 0, 0
@@ -1941,8 +1147,8 @@ def tab2_layout():
     return html.Div(
         style=background_style,
         children=[
-            dcc.Interval(id='interval-analysis', interval=1 * 1000, n_intervals=0),
-            dcc.Store(id='trip-data-store'),
+            # Which trips the map shows, see map_layers
+            dcc.Store(id='trip-data-store', data=map_layers.remember(markers_israel)),
             dbc.Container(
                 style=container_style,
                 children=[
@@ -1952,6 +1158,16 @@ def tab2_layout():
                         [
                             dbc.Col(
                                 [
+                                    # ---------- Weight Profile ---------- #
+                                    dbc.Label("Rank by Profile", style={'font-weight': 'bold', 'font-size': '24px'}),
+                                    dcc.Dropdown(
+                                        id='profile_2',
+                                        options=profile_scores.options(),
+                                        value=DEFAULT_PROFILE,
+                                        clearable=False,
+                                        className="form-control"
+                                    ),
+                                    html.Br(),
                                     # ---------- Trail Length Range ---------- #
                                     dbc.Card(
                                         [
@@ -2002,15 +1218,87 @@ def tab2_layout():
                                         }
                                     ),
                                     html.Br(),
+                                    # ---------- Distance From a Map Point ---------- #
+                                    dbc.Card(
+                                        [
+                                            dbc.CardHeader("Distance From a Map Point (in KM)",
+                                                           style={'font-weight': 'bold',
+                                                                  'font-size': '24px',
+                                                                  'color': 'white',
+                                                                  'text-align': 'left'}
+                                                           ),
+                                            dbc.CardBody([
+                                                dcc.Input(
+                                                    id="radius_km",
+                                                    type="number",
+                                                    min=0,
+                                                    debounce=True,
+                                                    placeholder="Any distance",
+                                                    className="form-control",
+                                                ),
+                                                html.Div("Click the map to pick the point",
+                                                         style={'color': 'white', 'margin-top': '5px'}),
+                                            ]),
+                                        ],
+                                        style={
+                                            "background-image": "url('https://www.pixelstalk.net/wp-content/uploads/2016/08/Black-Backgrounds-HD-1920x1080-For-Desktop.jpg')"
+                                        }
+                                    ),
+                                    html.Br(),
+                                    # ---------- Home Location ---------- #
+                                    dbc.Card(
+                                        [
+                                            dbc.CardHeader("Home Location",
+                                                           style={'font-weight': 'bold',
+                                                                  'font-size': '24px',
+                                                                  'color': 'white',
+                                                                  'text-align': 'left'}
+                                                           ),
+                                            dbc.CardBody([
+                                                dcc.Input(
+                                                    id="home_location",
+                                                    type="text",
+                                                    value=f"{home['lat']}, {home['lon']}" if home else "",
+                                                    placeholder="Latitude, Longitude",
+                                                    className="form-control",
+                                                ),
+                                                dbc.Label("Road Circuity Factor", style={'color': 'white'}),
+                                                dcc.Input(
+                                                    id="home_circuity",
+                                                    type="number",
+                                                    min=1,
+                                                    step=0.05,
+                                                    value=home['circuity'] if home else DEFAULT_CIRCUITY,
+                                                    className="form-control",
+                                                ),
+                                                dbc.Button("Update Distances", id='home_btn', color='success', n_clicks=0,
+                                                           style={'margin-top': '5px'}),
+                                                html.Div(id="home_status", style={'color': 'white', 'margin-top': '5px'}),
+                                            ]),
+                                        ],
+                                        style={
+                                            "background-image": "url('https://www.pixelstalk.net/wp-content/uploads/2016/08/Black-Backgrounds-HD-1920x1080-For-Desktop.jpg')"
+                                        }
+                                    ),
+                                    html.Br(),
                                     html.H1("The Trips Map", style={'font-weight': 'bold'}),
                                     dl.Map(
                                         [
                                             dl.TileLayer(),
-                                            dl.LayerGroup(
+                                            # One clustered layer for every trip, the popup is filled in on click
+                                            dl.GeoJSON(
                                                 id="Israel-map-layer",
-                                                children=markers_israel
-                                            )
+                                                data=feature_collection(markers_israel.values()),
+                                                cluster=True,
+                                                zoomToBoundsOnClick=True,
+                                                superClusterOptions={"radius": CLUSTER_RADIUS},
+                                            ),
+                                            dl.LayerGroup(id="trip-map-popup"),
+                                            dl.LayerGroup(id="trip-radius-layer"),
                                         ],
+                                        id="Israel-map",
+                                        # The map reports its bounds, so only the trips in view are sent
+                                        trackViewport=True,
                                         center=(32.2243079, 35.2682359),
                                         zoom=8,
                                         style={"width": "100%", "height": "550px", 'border': '2px solid black'}
@@ -2160,7 +1448,7 @@ def tab2_layout():
 # --------------- Callback --------------- #
 @app.callback(
     [
-        Output("Israel-map-layer", "children"),
+        Output("Israel-map-layer", "data"),
         Output("highest_score", "children"),
         Output("mcv", "children"),
         Output("mcd", "children"),
@@ -2186,39 +1474,53 @@ def tab2_layout():
         Output("trips_list_2", "value"),
         Output("picked_trail_map", "src"),
         Output('trip_details', 'children'),
+        Output('trip-data-store', 'data'),
     ],
     [
-        Input('interval-analysis', 'n_intervals'),
+        Input('collection-events', 'message'),
         Input("length_slider", "value"),
         Input("score_slider", "value"),
         Input("trip_picker", "n_clicks"),
+        Input("profile_2", "value"),
+        Input("radius_km", "value"),
+        Input("Israel-map", "clickData"),
+        Input("Israel-map", "bounds"),
+    ],
+    [
+        State("trips_list_2", "value"),
+        State('trip-data-store', 'data'),
     ],
-    State("trips_list_2", "value"),
     prevent_initial_call=True
 )
-def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_value):
+def update_tab2(collection_version, length_value, score_value, n_clicks, profile, radius_km, map_click, map_bounds,
+                trips_list_value, map_token):
     ctx = dash.callback_context
     if not ctx.triggered:
         raise PreventUpdate
     triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
+    triggered_prop = ctx.triggered[0]["prop_id"].split(".")[-1]
 
-    # Read CSV if available
-    if os.path.exists(csv_file_path):
-        if os.path.getsize(csv_file_path) > 0:
-            df = pd.read_csv(csv_file_path, index_col=0)
-        else:
-            df = pd.DataFrame()
-    else:
-        df = pd.DataFrame()
+    # A new radius center only matters while the radius filter is on
+    center = radius_center(map_click)
+    if triggered_prop == "clickData" and not radius_km:
+        raise PreventUpdate
+
+    # Shared snapshot of the collection, only re-read when the file changes,
+    # with the Total Score of the selected weight profile
+    df = profile_scores.apply(dataset_cache.get(), profile)
+
+    # A new profile has a different score range, start again from the full range
+    if triggered_id == "profile_2":
+        score_value = None
 
     # Prepare default (fallback) returns for an empty df
-    markers_israel = []
     link_trail_src = dash.no_update
     trip_details_div = dash.no_update
 
     if df.empty:
+        map_layer, map_token = map_layer_update(map_token, [])
         return (
-            [],  # Israel-map-layer
+            map_layer,  # Israel-map-layer
             "",  # highest_score
             "",  # mcv
             "",  # mcd
@@ -2241,13 +1543,15 @@ def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_val
             None,   # trips_list_2.value
             "https://israelhiking.osm.org.il/share/lXiAuFiwSa",
             html.Div("No Data Available", style={"color": "white"}),
+            map_token,
         )
 
-    # If we have a non-empty df, define some base references
-    min_length = float(df["Trail Length"].min())
-    max_length = float(df["Trail Length"].max())
-    min_score = float(df["Total Score"].min())
-    max_score = float(df["Total Score"].max())
+    # If we have a non-empty df, define some base references: the sorted indexes
+    # give the bounds as their first and last value, and the ranges by searchsorted
+    lengths = length_ranges.column()
+    scores = score_ranges.column(profile)
+    min_length, max_length = lengths.bounds()
+    min_score, max_score = scores.bounds()
 
     # Ensure length_value and score_value are lists [low, high] and in correct range
     if not length_value or len(length_value) < 2:
@@ -2282,15 +1586,21 @@ def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_val
     }
 
     # Filter by selected range
-    filtered_df = df[
-        (df['Trail Length'] >= length_value[0]) & (df['Trail Length'] <= length_value[1]) &
-        (df['Total Score'] >= score_value[0]) & (df['Total Score'] <= score_value[1])
-    ].copy()
+    filtered_df = rows_between(df, [
+        (lengths, length_value[0], length_value[1]),
+        (scores, score_value[0], score_value[1]),
+    ]).copy()
+
+    # ... and by the distance from the picked point
+    if radius_km and center:
+        nearby = spatial_index.within_radius(center[0], center[1], float(radius_km))
+        filtered_df = filtered_df[filtered_df.index.isin(nearby)]
 
     # If after filtering there's nothing, handle gracefully
     if filtered_df.empty:
+        map_layer, map_token = map_layer_update(map_token, [])
         return (
-            [],             # Israel-map-layer
+            map_layer,      # Israel-map-layer
             "N/A",          # highest_score
             "N/A",          # mcv
             "N/A",          # mcd
@@ -2311,22 +1621,15 @@ def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_val
             None,          # trips_list_2.value
             "https://israelhiking.osm.org.il/share/lXiAuFiwSa",
             html.Div("No Trips match the selected filters", style={"color": "white"}),
+            map_token,
         )
 
-    # Build markers for the map
-    for i, (coord, name) in enumerate(zip(filtered_df['Coordinates'], filtered_df['Trip'])):
-        try:
-            position = ast.literal_eval(coord)
-            if isinstance(position, (list, tuple)) and len(position) == 2:
-                markers_israel.append(
-                    dl.Marker(
-                        position=position,
-                        children=[dl.Popup(name)],
-                        id="israel-mark-" + str(i)
-                    )
-                )
-        except (SyntaxError, ValueError):
-            pass
+    # Features of the map inside its viewport, sent as a patch against the ones the page already shows
+    map_layer, map_token = map_layer_update(map_token, visible_labels(filtered_df.index, map_bounds))
+
+    # A pan or zoom only changes which trips are drawn
+    if triggered_prop == "bounds":
+        return (map_layer,) + (dash.no_update,) * 20 + (map_token,)
 
     # Recompute card info for the filtered DF
     higest_score = filtered_df["Total Score"].max()
@@ -2362,45 +1665,8 @@ def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_val
     top_incline_degree = filtered_df_sorted.iloc[0]["Incline Degree"]
 
     # Build the slider marks
-    length_marks = {}
-    if min_length != max_length:
-        length_marks = {
-            int(min_length): {
-                'label': f"{int(min_length)}",
-                'style': {'font-size': '17px', 'font-weight': 'bold', 'color': '#333'}
-            },
-            int(max_length): {
-                'label': f"{int(max_length)}",
-                'style': {'font-size': '17px', 'font-weight': 'bold', 'color': '#333'}
-            }
-        }
-    else:
-        length_marks = {
-            int(max_length): {
-                'label': f"{int(max_length)}",
-                'style': {'font-size': '17px', 'font-weight': 'bold', 'color': '#333'}
-            }
-        }
-
-    score_marks = {}
-    if min_score != max_score:
-        score_marks = {
-            int(min_score): {
-                'label': f"{int(min_score)}",
-                'style': {'font-size': '17px', 'font-weight': 'bold', 'color': '#333'}
-            },
-            int(max_score): {
-                'label': f"{int(max_score)}",
-                'style': {'font-size': '17px', 'font-weight': 'bold', 'color': '#333'}
-            }
-        }
-    else:
-        score_marks = {
-            int(max_score): {
-                'label': f"{int(max_score)}",
-                'style': {'font-size': '17px', 'font-weight': 'bold', 'color': '#333'}
-            }
-        }
+    length_marks = slider_marks(min_length, max_length)
+    score_marks = slider_marks(min_score, max_score)
 
     # Build trip list for dropdown
     trips_options = [{'label': trip, 'value': trip} for trip in filtered_df["Trip"].unique()]
@@ -2411,13 +1677,15 @@ def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_val
         # If not, choose first or None
         trip_value = filtered_df["Trip"].values[0] if not filtered_df.empty else None
 
-    # --------------- If triggered by the interval (auto refresh) --------------- #
-    if triggered_id == 'interval-analysis':
-        score_value = dash.no_update
+    # --------------- If triggered by a change pushed from the server, a new profile or a slider --------------- #
+    if triggered_id in ('collection-events', 'profile_2', 'length_slider', 'score_slider', 'radius_km', 'Israel-map'):
+        # Never write back a range the user is dragging
+        if triggered_id != 'profile_2':
+            score_value = dash.no_update
         length_value = dash.no_update
         # We basically just return the updated states
         return (
-            markers_israel,                            # Israel-map-layer
+            map_layer,                                 # Israel-map-layer
             f"{trip_hs} : {higest_score}",             # highest_score
             f"{common_view}",                          # mcv
             f"{common_distance}",                      # mcd
@@ -2440,7 +1708,8 @@ def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_val
             trips_options,                             # trips_list_2.options
             trip_value,                                # trips_list_2.value
             link_trail_src,                            # picked_trail_map.src
-            trip_details_div                           # trip_details
+            trip_details_div,                          # trip_details
+            map_token,                                 # trip-data-store
         )
 
     # --------------- If triggered by the trip_picker --------------- #
@@ -2509,7 +1778,7 @@ def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_val
             )
 
             return (
-                markers_israel,
+                map_layer,
                 f"{trip_hs} : {higest_score}",
                 f"{common_view}",
                 f"{common_distance}",
@@ -2530,11 +1799,12 @@ def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_val
                 trip_value,  # keep selection
                 link_trail_src,
                 trip_details_div,
+                map_token,
             )
         else:
             # Trip not found in the filtered set
             return (
-                markers_israel,
+                map_layer,
                 f"{trip_hs} : {higest_score}",
                 f"{common_view}",
                 f"{common_distance}",
@@ -2558,26 +1828,124 @@ def update_tab2(n_intervals, length_value, score_value, n_clicks, trips_list_val
                     "No trip selected.",
                     style={"color": "white", "fontSize": "16px", "fontWeight": "bold"},
                 ),
+                map_token,
             )
 
     # If anything else triggered, do nothing special
     raise PreventUpdate
 
-def tab3_layout():
-    csv_file_path = "Trip_Collection.csv"
-    if os.path.exists(csv_file_path):
-        if os.path.getsize(csv_file_path) > 0:
-            # Load the DataFrame
-            df = pd.read_csv(csv_file_path, index_col=0)
 
+@app.callback(
+    Output("trip-map-popup", "children"),
+    Input("Israel-map-layer", "clickData"),
+    State("profile_2", "value"),
+    prevent_initial_call=True
+)
+def trip_popup(feature, profile):
+    """
+    Popup of a clicked trip, only built when it's clicked. A click on a cluster just zooms in.
+    """
+    if not feature or feature.get("properties", {}).get("cluster"):
+        raise PreventUpdate
+    df = profile_scores.apply(dataset_cache.get(), profile)
+    label = feature["properties"].get("id")
+    if label not in df.index:
+        return []
+    trip = df.loc[label]
+    longitude, latitude = feature["geometry"]["coordinates"]
+    return [
+        dl.Popup(
+            position=[latitude, longitude],
+            children=[
+                html.B(trip["Trip"]),
+                html.Div(f"{trip['Area']}"),
+                html.Div(f"{trip['Trail Length']} KM, {trip['Walking Hours']} Hours"),
+                html.Div(f"Total Score: {trip['Total Score']}"),
+                html.A("Trail Map", href=trip["Trail Link"], target="_blank"),
+            ],
+        )
+    ]
+
+
+@app.callback(
+    Output("home_status", "children"),
+    Input("home_btn", "n_clicks"),
+    State("home_location", "value"),
+    State("home_circuity", "value"),
+    prevent_initial_call=True
+)
+def set_home(n_clicks, location, circuity):
+    """
+    Saves the home location and derives the Distance (and How Far score) of every trip from it in one pass.
+    """
+    if not n_clicks:
+        raise PreventUpdate
+    try:
+        lat, lon = parse_coordinate(location or "")
+        speed_kmh = (load_home() or {}).get("speed_kmh", DEFAULT_SPEED_KMH)
+        home = save_home(lat, lon, float(circuity or DEFAULT_CIRCUITY), speed_kmh)
+    except ValueError as e:
+        return f"Error: {e}"
+    summary = relocate_collection(dataset_cache, storage, home)
+    return f"{summary['distances_changed']} distances changed. " + describe(summary)
+
+
+@app.callback(
+    Output("trip-radius-layer", "children"),
+    Input("radius_km", "value"),
+    Input("Israel-map", "clickData"),
+    prevent_initial_call=True
+)
+def show_radius(radius_km, map_click):
+    """
+    Outline of the radius filter around the picked point.
+    """
+    center = radius_center(map_click)
+    if not radius_km or not center:
+        return []
+    return [dl.Circle(center=list(center), radius=float(radius_km) * 1000, color="#198754", fill=False)]
+
+
+@app.callback(
+    Output("trips_list_2", "options", allow_duplicate=True),
+    Input("trips_list_2", "search_value"),
+    [
+        State("trips_list_2", "value"),
+        State("length_slider", "value"),
+        State("score_slider", "value"),
+        State("profile_2", "value"),
+    ],
+    prevent_initial_call=True
+)
+def search_trips_list_2(search_value, trips_list_value, length_value, score_value, profile):
+    """
+    Typo-tolerant search in the map tab's trips dropdown, among the trips inside the slider ranges.
+    """
+    df = dataset_cache.get()
+    if df.empty:
+        raise PreventUpdate
+    ranges = []
+    if length_value and len(length_value) == 2:
+        ranges.append((length_ranges.column(), length_value[0], length_value[1]))
+    if score_value and len(score_value) == 2:
+        ranges.append((score_ranges.column(profile), score_value[0], score_value[1]))
+    df = rows_between(df, ranges)
+    if not search_value:
+        return [{'label': trip, 'value': trip} for trip in df["Trip"].unique()]
+    return fuzzy_trip_options(search_value, df, trips_list_value)
+
+
+def tab3_layout():
+    if os.path.exists(data_path):
+        if os.path.getsize(data_path) > 0:
             # Extract columns for the `columns` dropdown
-            cols = df.columns[3:11].tolist() + df.columns[21:-1].tolist()
+            cols = FILTER_COLUMNS
             default_column = cols[0]  # Default to the first column in the list
 
             return html.Div(
                 style=background_style4,
                 children=[
-                    dcc.Interval(id='interval-filtering', interval=1 * 1000, n_intervals=0),
+                    # Row label of the selected trip, it stays selected across pages and sorts
                     dcc.Store(id='trip-filter-store'),
                     dcc.Store(id='col_sub-store', storage_type='memory'),
 
@@ -2620,6 +1988,11 @@ def tab3_layout():
                                                 placeholder="Search across all columns...",
                                                 type='text',
                                                 value=''
+                                            ),
+                                            dbc.Switch(
+                                                id='fuzzy-search',
+                                                label="Typo tolerant (trip names and areas)",
+                                                value=False
                                             )
                                         ],
                                         width=3
@@ -2634,7 +2007,7 @@ def tab3_layout():
                                             dash_table.DataTable(
                                                 id='selected_trips',
                                                 columns=[],  # Columns will be dynamically added
-                                                data=[],     # Data will be dynamically added
+                                                data=[],     # Only the visible page is sent
                                                 row_selectable='single',
                                                 style_table={
                                                     'maxHeight': '400px',
@@ -2656,8 +2029,15 @@ def tab3_layout():
                                                     'backgroundColor': '#f4f4f4',
                                                     'fontWeight': 'bold',
                                                 },
-                                                sort_action='native',
+                                                # Paged, sorted and filtered on the server
+                                                page_action='custom',
+                                                page_current=0,
+                                                page_size=PAGE_SIZE,
+                                                sort_action='custom',
                                                 sort_mode='multi',
+                                                sort_by=[],
+                                                filter_action='custom',
+                                                filter_query='',
                                             ),
                                             style={
                                                 'margin': '0px 0px 0px 0x',
@@ -2669,6 +2049,7 @@ def tab3_layout():
                                                 'border': '1px solid #444',
                                                 'borderRadius': '5px',
                                             }),
+                                        html.Div(id='selected_trips_count', style={'font-weight': 'bold'}),
                                         html.Br(),
                                         dbc.Button("Reset All Filters", id='reset_filters', color='success', n_clicks=0, style=button_style7),
                                         dbc.Button("Add To Comparison", id='comp_trip', color='success', n_clicks=0, style=button_style9),
@@ -2746,6 +2127,13 @@ def tab3_layout():
         return "No DF"
 
 
+def sub_filter_options(column):
+    """
+    Options of the sub filter dropdown, straight from the facet catalogue.
+    """
+    return [{'label': f"{value} ({count})", 'value': value} for value, count in facet_catalogue.counts(column).items()]
+
+
 @app.callback(
     [
         Output('col_sub', 'options'),
@@ -2755,55 +2143,49 @@ def tab3_layout():
     [
         Input('columns', 'value'),
         Input('reset_filters', 'n_clicks'),
-        Input('interval-filtering','n_intervals')
+        Input('collection-events', 'message')
     ]
 )
-def update_sub_filter_options(selected_column,n_intervals, n_clicks):
-    csv_file_path = "Trip_Collection.csv"
+def update_sub_filter_options(selected_column, n_clicks, collection_version):
     ctx = dash.callback_context
 
-    # Check if CSV file exists and is not empty
-    if os.path.exists(csv_file_path) and os.path.getsize(csv_file_path) > 0:
-        df = pd.read_csv(csv_file_path, index_col=0)
-
+    if not dataset_cache.get().empty:
         # Handle initial load or no trigger
         if not ctx.triggered:
             # Populate dropdown with default columns during initial layout
-            default_columns = [{'label': str(value), 'value': value} for value in df[selected_column].dropna().unique()]
-            return default_columns, "", selected_column
+            return sub_filter_options(selected_column), "", selected_column
 
         # Determine which input triggered the callback
         triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        if triggered_id == 'interval-filtering':
-            if os.path.exists(csv_file_path) and os.path.getsize(csv_file_path) > 0:
-                df = pd.read_csv(csv_file_path, index_col=0)
-                selected_column = dash.no_update              
-                sub_options = dash.no_update 
-                return selected_column,sub_options, dash.no_update         
-        # Reset filter logic
+        if triggered_id == 'collection-events':
+            # Refresh the values of the current filter, keep the user's selection
+            if selected_column not in FILTER_COLUMNS:
+                raise PreventUpdate
+            return sub_filter_options(selected_column), dash.no_update, dash.no_update
+        # Reset filter logic: back to the Area filter
         elif triggered_id == 'reset_filters':
-            if selected_column == 'Area':
-                sub_options = [{'label': str(value), 'value': value} for value in df[selected_column].dropna().unique()]
-                return sub_options, "", 'Area'  # Reset sub_options selection to ""
-            else:
-                default_columns = df.columns[3:11].tolist() + df.columns[21:-1].tolist()
-                selected_column = 'Area'
-                sub_options = [{'label': str(value), 'value': value} for value in df[selected_column].dropna().unique()]
-                return sub_options, "", 'Area'
+            return sub_filter_options('Area'), "", 'Area'  # Reset sub_options selection to ""
 
         # Generate sub-options based on selected column
-        elif triggered_id == 'columns' and selected_column in df.columns:
-            sub_options = [{'label': str(value), 'value': value} for value in df[selected_column].dropna().unique()]
-            return sub_options, "", selected_column
+        elif triggered_id == 'columns' and selected_column in FILTER_COLUMNS:
+            return sub_filter_options(selected_column), "", selected_column
 
     # Default return (empty options)
     return [], "", ""
 
 
+COMPARISON_COLUMNS = ['Trip', 'Area', 'Accessibility', 'Challenge', 'View', 'Shade', 'Water', 'Walking Hours', "Circular?", 'Distance', 'Total Score']
+
+
 @app.callback(
     [
         Output('selected_trips', 'columns'),
         Output('selected_trips', 'data'),
+        Output('selected_trips', 'page_count'),
+        Output('selected_trips', 'page_current'),
+        Output('selected_trips', 'selected_rows'),
+        Output('selected_trips_count', 'children'),
+        Output('trip-filter-store', 'data'),
         Output('picked_trek_map', 'src'),  # Update the iframe
         Output('multi_trips_selection', 'columns'),
         Output('multi_trips_selection', 'data'),
@@ -2812,80 +2194,111 @@ def update_sub_filter_options(selected_column,n_intervals, n_clicks):
         Input('columns', 'value'),
         Input('col_sub', 'value'),
         Input('global-search', 'value'),
+        Input('fuzzy-search', 'value'),
+        Input('selected_trips', 'page_current'),
+        Input('selected_trips', 'page_size'),
+        Input('selected_trips', 'sort_by'),
+        Input('selected_trips', 'filter_query'),
         Input('selected_trips', 'selected_rows'),
         Input('comp_trip', 'n_clicks'),
         Input('reset_table', 'n_clicks')
     ],
     [
+        State('selected_trips', 'data'),
+        State('trip-filter-store', 'data'),
         State('multi_trips_selection', 'data')
     ]
 )
-def display_filtered_trips(columns, col_sub, global_search, selected_rows, compare_clicks, reset_clicks, multi_trips_data):
-    csv_file_path = "Trip_Collection.csv"
+def display_filtered_trips(columns, col_sub, global_search, fuzzy_search, page_current, page_size, sort_by, filter_query,
+                           selected_rows, compare_clicks, reset_clicks, page_data, selected_trip, multi_trips_data):
+    """
+    Filters and sorts the collection on the server and sends only the visible page
+    of the selected_trips table. Rows carry their row label as "id", and the
+    selected trip is kept by that id, so it survives paging and sorting.
+    """
     ctx = dash.callback_context
-    triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
-
-    if not os.path.exists(csv_file_path) or os.path.getsize(csv_file_path) == 0:
-        return [], [], "", [], []
-
-    # Read the CSV file
-    df4 = pd.read_csv(csv_file_path)
-
-    # Apply Global Search Filter (if user typed something)
+    triggered_prop = ctx.triggered[0]["prop_id"] if ctx.triggered else None
+    triggered_id = triggered_prop.split(".")[0] if triggered_prop else None
+
+    df_all = dataset_cache.get()
+    if df_all.empty:
+        return [], [], 1, 0, [], "0 Trips", None, "", [], []
+
+    # A row picked on the current page, by its stable id
+    if triggered_prop == 'selected_trips.selected_rows' and selected_rows and page_data:
+        if selected_rows[0] < len(page_data):
+            selected_trip = page_data[selected_rows[0]].get('id')
+    if selected_trip not in df_all.index:
+        selected_trip = None
+
+    df4 = df_all
+    # Apply Global Search Filter (if user typed something), answered from the search index,
+    # plus the closest trip names and areas when typos are tolerated
     if global_search:
-        df4 = df4[df4.apply(
-            lambda row: row.astype(str).str.contains(global_search, case=False).any(),
-            axis=1
-        )]
+        matches = search_index.search(global_search)
+        if fuzzy_search:
+            matches |= set(trip_names_index.search(global_search))
+        df4 = df4[df4.index.isin(matches)]
 
     # Apply Column-based Filter (if a valid column is chosen and sub-filter is not empty)
-    if columns in df4.columns[3:-1].tolist() and col_sub:
+    if columns in FORM_COLUMNS[3:-1] and col_sub:
         df4 = df4[df4[columns] == col_sub]
 
-    if "Total Score" in df4.columns:
-        df4 = df4.sort_values(by="Total Score", ascending=False)
+    # Filters typed into the table header, then the table's sort (by Total Score until the user picks one)
+    df4 = filter_frame(df4, filter_query)
+    df4 = sort_frame(df4, sort_by, default=[{'column_id': 'Total Score', 'direction': 'desc'}])
 
-    # Define columns for the selected_trips DataTable
-    if not df4.empty:
-        selected_trips_columns = [
-            {'name': 'Trip', 'id': 'Trip'},
-            {'name': columns, 'id': columns},
-            {'name': 'Total Score', 'id': 'Total Score'},
-            {'name': 'Trail Link', 'id': 'Trail Link'},
-        ]
+    # New filters or sorting start again from the first page
+    if triggered_prop not in ('selected_trips.page_current', 'selected_trips.selected_rows', 'comp_trip.n_clicks', 'reset_table.n_clicks'):
+        page_current = 0
 
-        # Convert the DataFrame to dictionary for DataTable
-        selected_trips_data = df4[['Trip', columns, 'Total Score', 'Trail Link']].to_dict('records')
-
-        # Handle row selection safely
-        selected_trip_link = ""
-        if selected_rows and len(selected_rows) > 0:
-            selected_row_index = selected_rows[0]
-            if selected_row_index < len(df4):  # Ensure the index is within bounds
-                selected_trip_link = df4.iloc[selected_row_index]['Trail Link']
-            
-            if triggered_id == 'comp_trip' and compare_clicks > 0:
-                # Add selected row to multi_trips_selection
-                selected_row = df4.iloc[selected_row_index][
-                    ['Trip', 'Area', 'Accessibility', 'Challenge', 'View', 'Shade', 'Water', 'Walking Hours', "Circular?", 'Distance', 'Total Score']
-                ]
-                selected_row_dict = selected_row.to_dict()
-                if selected_row_dict not in multi_trips_data:  # Avoid duplicate rows
-                    multi_trips_data = multi_trips_data or []  # Ensure it's a list if None
-                    multi_trips_data.append(selected_row_dict)
-
-        # Define columns for the multi_trips_selection DataTable
-        multi_trips_columns = [
-            {'name': col, 'id': col} for col in ['Trip', 'Area', 'Accessibility', 'Challenge', 'View', 'Shade', 'Water', 'Walking Hours', "Circular?", 'Distance', 'Total Score']
-        ]
+    # Define columns for the multi_trips_selection DataTable
+    multi_trips_columns = [{'name': col, 'id': col} for col in COMPARISON_COLUMNS]
 
-        if triggered_id == 'reset_table' and reset_clicks > 0:
-            multi_trips_data = []
+    if triggered_id == 'comp_trip' and compare_clicks > 0 and selected_trip is not None:
+        # Add selected row to multi_trips_selection
+        selected_row_dict = df_all.loc[selected_trip, COMPARISON_COLUMNS].to_dict()
+        multi_trips_data = multi_trips_data or []  # Ensure it's a list if None
+        if selected_row_dict not in multi_trips_data:  # Avoid duplicate rows
+            multi_trips_data.append(selected_row_dict)
 
-        return selected_trips_columns, selected_trips_data, selected_trip_link, multi_trips_columns, multi_trips_data
+    if triggered_id == 'reset_table' and reset_clicks > 0:
+        multi_trips_data = []
 
-    # Return empty data if no rows match the filters
-    return [], [], "", [], []
+    selected_trip_link = df_all.loc[selected_trip, 'Trail Link'] if selected_trip is not None else ""
+
+    if df4.empty:
+        # Return empty data if no rows match the filters
+        return [], [], 1, 0, [], "0 Trips", selected_trip, selected_trip_link, multi_trips_columns, multi_trips_data
+
+    # Define columns for the selected_trips DataTable
+    selected_trips_columns = [
+        {'name': 'Trip', 'id': 'Trip'},
+        {'name': columns, 'id': columns},
+        {'name': 'Total Score', 'id': 'Total Score'},
+        {'name': 'Trail Link', 'id': 'Trail Link'},
+    ]
+    page, page_count, page_current = table_page(df4, page_current, page_size)
+    selected_trips_data = table_records(page, ['Trip', columns, 'Total Score', 'Trail Link'])
+
+    # Highlight the selected trip if it's on this page
+    page_ids = page.index.tolist()
+    page_rows = [page_ids.index(selected_trip)] if selected_trip in page_ids else []
+    if page_rows == (selected_rows or []):
+        page_rows = dash.no_update
+
+    return (
+        selected_trips_columns,
+        selected_trips_data,
+        page_count,
+        page_current,
+        page_rows,
+        f"{len(df4)} Trips",
+        selected_trip,
+        selected_trip_link,
+        multi_trips_columns,
+        multi_trips_data,
+    )
 
 
 
@@ -2988,285 +2401,79 @@ def create_scatter_plot(df5):
 
     
 def tab4_layout():
-    csv_file_path = "Trip_Collection.csv"
-
-    if not os.path.exists(csv_file_path) or os.path.getsize(csv_file_path) == 0:
-        return [], [], ""
-    else:
-        # Read the CSV file
-        df5 = pd.read_csv(csv_file_path)
-        df_sorted = df5.sort_values(by='Total Score', ascending=False)
-        df_sorted=df_sorted.head(20)
-        # Create the bar chart
-        bar_chart1 = px.bar(
-            df_sorted,
-            x='Trip',
-            y='Total Score',
-            color = 'Total Score',
-            color_discrete_sequence=px.colors.qualitative.Bold  # Use the 'bold' color palette
-        )
-
-        # Add values to each bar
-        bar_chart1.update_traces(
-            text=round(df_sorted['Total Score'],3),
-            textposition='outside'
-        )
-
-                # Adjust the layout to remove the color scale and set font sizes
-        bar_chart1.update_layout(
-            font=dict(size=24),  # Set global font size
-            yaxis=dict(
-                range=[0, df_sorted['Total Score'].max() + 1],
-                title=dict(text="Total Score", font=dict(size=22)),  # Y-axis title font size
-                tickfont=dict(size=18),  # Y-axis tick font size
-                tick0=0,  # Starting tick value
-                dtick=0.5,
-            ),
-            xaxis=dict(
-                title=dict(text="Trip", font=dict(size=22)),  # X-axis title font size
-                tickfont=dict(size=18)  # X-axis tick font size
-            ),
-            title=dict(text="Top 20 Trips by Total Score", font=dict(size=32)),  # Chart title font size
-            coloraxis_showscale=False,  # Disable the color scale
-            showlegend=False,  # Hide the legend
-            width=1200,  # Set chart width
-            height=800,  # Set chart height
-            plot_bgcolor="rgba(0,0,0,0)",  # Transparent plot background
-            paper_bgcolor="rgba(0,0,0,0)", # Transparent overall chart background
-            hoverlabel=dict(font=dict(size=20 ))
-        )
-
-        df_grouped = df5.groupby('Season')['Trip']
-        df_pie = df_grouped.value_counts().reset_index()
-        df_pie.columns = ['Season','Trip','Count']
-        
-        pie_chart1 = px.pie(df_pie, 
-             names='Season', 
-             values='Count', 
-             title='Travelled Season', 
-             color_discrete_sequence=px.colors.qualitative.Plotly, 
-             hole=0.0)  # Optional for donut chart
-    
-        
-        pie_chart1.update_layout(
-            font=dict(size=18),
-            title=dict(font=dict(size=32)),
-            width=720,  # Set chart width
-            height=800, 
-            plot_bgcolor="rgba(0,0,0,0)",  # Transparent background inside the plot area
-            paper_bgcolor="rgba(0,0,0,0)",
-            hoverlabel=dict(font=dict(size=20 ))
-            )
-        
-        pie_chart1.update_traces(
-            textfont=dict(size=24)
-        )
-        
-        
-        area_df= df5['Area'].value_counts().reset_index()
-        area_df.columns=['Area','Count']
-        pie_chart2 = px.pie(area_df, 
-             names='Area', 
-             values='Count', 
-             title='Trips by Area', 
-             color_discrete_sequence=px.colors.qualitative.Prism_r, 
-             hole=0.0)  # Optional for donut chart
-    
-        
-        pie_chart2.update_layout(
-            font=dict(size=18),
-            title=dict(font=dict(size=32)),
-            width=870,  # Set chart width
-            height=800, 
-            plot_bgcolor="rgba(0,0,0,0)",  # Transparent background inside the plot area
-            paper_bgcolor="rgba(0,0,0,0)",
-            hoverlabel=dict(font=dict(size=20 ))
-            )
-        
-        pie_chart2.update_traces(
-            textfont=dict(size=24)
-        )
-        
-        
-        
-        df_length = df5.sort_values(by='Trail Length', ascending=False)
-        df_length = df_length.head(20)
-        # Create the bar chart
-        bar_chart2 = px.bar(
-        df_length,
-        x='Trip',
-        y='Trail Length',
-        color='Trail Length',
-        color_continuous_scale=px.colors.sequential.Electric
-    )
-        bar_chart2.update_traces(
-            text=round(df_length['Trail Length'], 3),
-            textposition='outside'
-        )
-        bar_chart2.update_layout(
-            font=dict(size=24),
-            yaxis=dict(
-                range=[0, df_length['Trail Length'].max() + 1],
-                title=dict(text="Trail Length", font=dict(size=22)),
-                tickfont=dict(size=18),
-                tick0=0,
-                dtick=1
-            ),
-            xaxis=dict(
-                title=dict(text="Trip", font=dict(size=22)),
-                tickfont=dict(size=18)
-            ),
-            title=dict(text="Top 20 Trips by Trail Length", font=dict(size=32)),
-            coloraxis_showscale=False,
-            showlegend=False,
-            width=1200,
-            height=800,
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            hoverlabel=dict(font=dict(size=20))
-        )
-
-        
-        df5['Walking Hours (hours)'] = df5['Walking Hours'].str.split(':').apply(
-            lambda x: round(int(x[0]) + int(x[1]) / 60, 2) if isinstance(x, list) and len(x) == 2 else None
-        )
-
+    # The figures update_figures sends, the store gets their version so the
+    # first update_figures call on the page has nothing to send
+    version, figures = dashboard_figures.get(DEFAULT_PROFILE)
+    if figures is None:
+        figures = [{}] * 6
+    bar_chart1, pie_chart1, pie_chart2, bar_chart2, histogram_plot, scatter_plot = figures
 
-        df5['Total Score'] = pd.to_numeric(df5['Total Score'], errors='coerce')
-
-        def create_histogram(df5):
-            # Calculate histogram data
-            hist_data = np.histogram(df5['Trail Length'], bins=5)
-            bin_edges = hist_data[1]
-            bin_counts = hist_data[0]
-
-            # Define colors for each bin
-            colors = px.colors.qualitative.Prism_r
-
-            # Create the figure
-            fig = go.Figure()
-
-            # Add histogram bars with different colors for each bin
-            for i in range(len(bin_counts)):
-                fig.add_trace(go.Bar(
-                    x=[(bin_edges[i] + bin_edges[i + 1]) / 2],  # Bin center
-                    y=[bin_counts[i]],
-                    width=[bin_edges[i + 1] - bin_edges[i]],  # Bin width
-                    marker_color=colors[i % len(colors)],
-                    text=[bin_counts[i]],  # Add the bin value
-                    textposition='outside',  # Position text above the bar
-                    name=f'Bin {i + 1}',
-                    hovertext=f'Bin {i + 1}: {bin_counts[i]}',  # Customize hover text
-                    hoverinfo='text'  # Use the hovertext property for hover info
-                ))
-
-            # Add a line over the bins
-            bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-            fig.add_trace(go.Scatter(
-                x=bin_centers,
-                y=bin_counts,
-                mode='lines+markers',
-                line=dict(color='black', width=2),
-                name='Frequency Line'
-            ))
-
-            # Update layout with font size adjustments
-            fig.update_layout(
-                title=dict(
-                    text='Histogram of Trail Length',
-                    font=dict(size=32)  # Font size for title
-                ),
-                xaxis=dict(
-                    title=dict(
-                        text='Trail Length (in KM)',
-                        font=dict(size=22)  # Font size for x-axis title
-                    ),
-                    tickfont=dict(size=22)  # Font size for x-axis ticks
-                ),
-                yaxis=dict(
-                    dtick=0.5,
-                    title=dict(
-                        text='Count',
-                        font=dict(size=22),
+    return html.Div(
+        style=background_style4,
+        children=[
+            dcc.Store(id='trip-dashboard-store', data=version),
+            dbc.Container(
+                style=container_style,
+                children=[
+                    html.H1("Trips Dashboard", style=heading_style),
+                    html.Hr(),
+                    dbc.Row(
+                        dbc.Col(
+                            [
+                                dbc.Label("Rank by Profile", style={'font-weight': 'bold', 'font-size': '24px'}),
+                                dcc.Dropdown(
+                                    id='profile_4',
+                                    options=profile_scores.options(),
+                                    value=DEFAULT_PROFILE,
+                                    clearable=False,
+                                    className="form-control"
+                                ),
+                            ],
+                            width=3
+                        )
                     ),
-                    tickfont=dict(size=22),
-                    range=[0, bin_counts.max() + 2]
-                ),
-
-                barmode='overlay',  # Overlay bars for seamless display
-                showlegend=False,
-                plot_bgcolor="rgba(0,0,0,0)",  # Transparent plot background
-                paper_bgcolor="rgba(0,0,0,0)",
-                hoverlabel=dict(
-                    font=dict(size=22)  # Font size for hover labels
-                )
+                    dbc.Row([
+                        dbc.Col(
+                            dcc.Graph(id='area_pie',figure=pie_chart2)
+                        ),
+                        dbc.Col(
+                            dcc.Graph(id='length_hist',figure=histogram_plot)
+                        ),
+                        dbc.Col(
+                            dcc.Graph(id='season_pie',figure=pie_chart1)
+                        ),
+                    ]),
+                    dbc.Row([
+                        dbc.Col(
+                            dcc.Graph(id='length_chart',figure=bar_chart2)
+                        ),
+
+                        dbc.Col(
+                            dcc.Graph(id='trips_chart',figure=bar_chart1)
+                        ),
+                    ]),
+                    dbc.Row(
+                        dbc.Col(
+                                dcc.Graph(id='scatter_plot',figure=scatter_plot)
+                            )
+                    )
+                ]
             )
+        ]
+    )
 
-            return fig
-        # Generate plots as variables
-        histogram_plot = create_histogram(df5)
-        scatter_plot = create_scatter_plot(df5)
-
-
-
-        return html.Div(
-            style=background_style4,
-            children=[
-                dcc.Interval(id='interval-dashboard', interval=1 * 1000, n_intervals=0),
-                dcc.Store(id='trip-dashboard-store'),
-                dbc.Container(
-                    style=container_style,
-                    children=[
-                        html.H1("Trips Dashboard", style=heading_style),
-                        html.Hr(),
-                        dbc.Row([
-                            dbc.Col(
-                                dcc.Graph(id='area_pie',figure=pie_chart2)
-                            ),
-                            dbc.Col(
-                                dcc.Graph(id='length_hist',figure=histogram_plot)
-                            ),
-                            dbc.Col(
-                                dcc.Graph(id='season_pie',figure=pie_chart1)
-                            ),
-                        ]),
-                        dbc.Row([
-                            dbc.Col(
-                                dcc.Graph(id='length_chart',figure=bar_chart2)
-                            ),
 
-                            dbc.Col(
-                                dcc.Graph(id='trips_chart',figure=bar_chart1)
-                            ),
-                        ]),
-                        dbc.Row(
-                            dbc.Col(
-                                    dcc.Graph(id='scatter_plot',figure=scatter_plot)
-                                )
-                        )
-                    ]
-                )
-            ]
-        )
-@app.callback(
-    [
-        Output('trips_chart', 'figure'),
-        Output('season_pie', 'figure'),
-        Output('area_pie', 'figure'),
-        Output('length_chart', 'figure'),
-        Output('length_hist', 'figure'),
-        Output('scatter_plot', 'figure'),
-    ],
-    [Input('interval-dashboard', 'n_intervals')]
-)
-def update_figures(n_intervals):
-    csv_file_path = "Trip_Collection.csv"
-
-    if not os.path.exists(csv_file_path) or os.path.getsize(csv_file_path) == 0:
-        raise dash.exceptions.PreventUpdate  # Prevent updating if file does not exist or is empty
+def build_dashboard_figures(df, profile):
+    """
+    The six dashboard figures for one snapshot and profile, or None if there are no trips.
+    Only called by dashboard_figures, once per collection version and profile.
+    """
+    df_c = profile_scores.apply(df, profile)
+    if df_c.empty:
+        return None
 
-    # Reload the CSV file
-    df_c = pd.read_csv(csv_file_path)
+    # The snapshot is shared, work on a copy since columns are added below
+    df_c = df_c.copy()
     df_c['Walking Hours (hours)'] = df_c['Walking Hours'].str.split(':').apply(
         lambda x: round(int(x[0]) + int(x[1]) / 60, 2) if isinstance(x, list) and len(x) == 2 else None
     )
@@ -3392,41 +2599,111 @@ def update_figures(n_intervals):
 
     return bar_chart1, pie_chart1, pie_chart2, bar_chart2, histogram_plot, scatter_plot
 
-        
-# Define the main layout with tabs
-app.layout = html.Div(
+
+dashboard_figures = FigureCache(dataset_cache, build_dashboard_figures)
+
+
+@app.callback(
     [
-        dcc.Tabs(
-            [
-                dcc.Tab(
-                    label='Trips Calculation',
-                    children=tab1_layout(),
-                    style=tab_style,
-                    selected_style=selected_tab_style
-                ),
-                dcc.Tab(
-                    label='Trips Analysis',
-                    children=tab2_layout(),
-                    style=tab_style,
-                    selected_style=selected_tab_style
-                ),
-                dcc.Tab(
-                    label='Trips Filtering',
-                    children=tab3_layout(),
-                    style=tab_style,
-                    selected_style=selected_tab_style
-                ),
-                dcc.Tab(
-                    label='Trips Dashboard',
-                    children=tab4_layout(),
-                    style=tab_style,
-                    selected_style=selected_tab_style
-                )
-            ]
-        )
-    ]
+        Output('trips_chart', 'figure'),
+        Output('season_pie', 'figure'),
+        Output('area_pie', 'figure'),
+        Output('length_chart', 'figure'),
+        Output('length_hist', 'figure'),
+        Output('scatter_plot', 'figure'),
+        Output('trip-dashboard-store', 'data'),
+    ],
+    [
+        Input('collection-events', 'message'),
+        Input('profile_4', 'value'),
+    ],
+    State('trip-dashboard-store', 'data')
+)
+def update_figures(collection_version, profile, shown_version):
+    """
+    Sends the dashboard figures only when the page doesn't already show this
+    data version and profile. The figures themselves come from dashboard_figures.
+    When this worker still has the figures of the version the page shows, only
+    a patch with the values that changed is sent (one trip added or removed).
+    Versions are content keys, so a cached entry is exactly what the page got,
+    whichever worker sent it. Anything else gets the full figures.
+    """
+    profile = profile or DEFAULT_PROFILE
+    # One snapshot for the comparison and the figures sent
+    version, figures = dashboard_figures.get(profile)
+    if shown_version == version:
+        return [dash.no_update] * 7
+    if figures is None:
+        raise dash.exceptions.PreventUpdate  # Prevent updating if file does not exist or is empty
+
+    shown = dashboard_figures.cached(shown_version) if shown_version else None
+    if shown is None or len(shown) != len(figures):
+        return list(figures) + [version]
+    return [figure_update(old, new) for old, new in zip(shown, figures)] + [version]
+
+        
+# ---------------------------------------------------------------------------------
+#  Layout
+#  Built per page load. Only the selected tab is rendered up front, the other
+#  tabs are rendered from the shared cache the first time they're opened.
+# ---------------------------------------------------------------------------------
+TABS = [
+    ("tab1", 'Trips Calculation', tab1_layout),
+    ("tab2", 'Trips Analysis', tab2_layout),
+    ("tab3", 'Trips Filtering', tab3_layout),
+    ("tab4", 'Trips Dashboard', tab4_layout),
+]
+DEFAULT_TAB = "tab1"
+
+
+def serve_layout():
+    return html.Div(
+        [
+            EventSource(id='collection-events', url='/collection-events'),
+            dcc.Store(id='rendered-tabs', data=[DEFAULT_TAB]),
+            dcc.Tabs(
+                id='tabs',
+                value=DEFAULT_TAB,
+                children=[
+                    dcc.Tab(
+                        id=f"{value}-content",
+                        label=label,
+                        value=value,
+                        children=layout() if value == DEFAULT_TAB else None,
+                        style=tab_style,
+                        selected_style=selected_tab_style
+                    )
+                    for value, label, layout in TABS
+                ]
+            )
+        ]
+    )
+
+
+@app.callback(
+    [Output(f"{value}-content", "children") for value, _, _ in TABS] + [Output('rendered-tabs', 'data')],
+    Input('tabs', 'value'),
+    State('rendered-tabs', 'data'),
+    prevent_initial_call=True
 )
+def render_tab(selected_tab, rendered_tabs):
+    """
+    Renders a tab the first time it's selected. Tabs that are already on the
+    page keep their content (and whatever the user typed into it).
+    """
+    rendered_tabs = rendered_tabs or []
+    if selected_tab in rendered_tabs:
+        raise PreventUpdate
+    contents = [layout() if value == selected_tab else dash.no_update for value, _, layout in TABS]
+    return contents + [rendered_tabs + [selected_tab]]
+
+
+# Pushes the collection generation to every open page whenever the data changes,
+# instead of each tab polling the server every second
+collection_watcher = CollectionWatcher(dataset_cache)
+register_event_stream(app.server, collection_watcher)
 
+app.layout = serve_layout
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import base64
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.io as pio
+
+
+# ---------------------------------------------------------------------------------
+#  Figure cache keyed by the collection content
+# ---------------------------------------------------------------------------------
+def _plain(value):
+    # Plotly serializes numpy arrays as base64 typed arrays, turned back into
+    # lists here so a figure can be compared value by value (see trip_patches)
+    if isinstance(value, dict):
+        if "bdata" in value and "dtype" in value:
+            array = np.frombuffer(base64.b64decode(value["bdata"]), dtype=value["dtype"])
+            if "shape" in value:
+                array = array.reshape([int(n) for n in str(value["shape"]).split(",")])
+            if array.dtype.kind == "f":
+                # NaN is sent as null, like Plotly does for plain lists
+                array = np.where(np.isnan(array), None, array.astype(object))
+            return array.tolist()
+        return {key: _plain(v) for key, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def plain_figure(fig):
+    """
+    The figure as a JSON-ready dict of plain lists and values.
+    """
+    return _plain(json.loads(pio.to_json(fig, validate=False)))
+
+
+class FigureCache:
+    """
+    Figures built by build(df, *params), cached per (snapshot key, params).
+    The snapshot key is the same in every worker, so a version a page got from
+    one worker means the same figures in another.
+    Each figure is serialized once when it's built and kept as the plain
+    JSON-ready dict, so every viewer of the same version gets it without Plotly
+    building or validating anything again. Recent versions stay cached, so a
+    page still showing one of them can be sent a patch instead.
+    """
+
+    def __init__(self, cache, build, max_entries=16):
+        self.cache = cache
+        self.build = build
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def cached(self, version):
+        """
+        Figures of an earlier version if they're still cached, otherwise None.
+        """
+        with self._lock:
+            return self._entries.get(json.dumps(version))
+
+    def get(self, *params):
+        """
+        Returns (version, figures). figures is None when build() had nothing to draw.
+        """
+        snapshot = self.cache.snapshot()
+        version = [snapshot.key, *params]
+        key = json.dumps(version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return version, self._entries[key]
+
+            figures = self.build(snapshot.df, *params)
+            if figures is not None:
+                figures = tuple(plain_figure(fig) for fig in figures)
+
+            self._entries[key] = figures
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return version, figures
@@ -0,0 +1,338 @@
+import json
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------------------------------------------------------------
+#  Trip coordinates
+#  The Coordinates column is free text ("32.7332204,35.0711382", "32.979411, 35.471878",
+#  "[32.97, 35.47]"), so it is parsed once into the float64 lat / lon columns
+#  when a trip is saved, and in one vectorised pass for collections saved before.
+# ---------------------------------------------------------------------------------
+GEO_COLUMNS = ["lat", "lon"]
+
+_NUMBER = r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)"
+_COORDINATE = rf"^\s*[\[(]?\s*(?P<lat>{_NUMBER})\s*,\s*(?P<lon>{_NUMBER})\s*[\])]?\s*$"
+
+
+def parse_coordinates(coordinates):
+    """
+    (lat, lon) float64 arrays for a Series of coordinate strings.
+    Text that isn't a "lat, lon" pair, or is out of range, gives NaN.
+    """
+    parts = coordinates.astype(str).str.extract(_COORDINATE)
+    lat = pd.to_numeric(parts["lat"], errors="coerce").to_numpy(dtype=float)
+    lon = pd.to_numeric(parts["lon"], errors="coerce").to_numpy(dtype=float)
+    valid = (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    lat[~valid] = np.nan
+    lon[~valid] = np.nan
+    return lat, lon
+
+
+def parse_coordinate(text):
+    """
+    (lat, lon) of a single coordinate string, raises a ValueError when it can't be read.
+    """
+    lat, lon = parse_coordinates(pd.Series([text]))
+    if np.isnan(lat[0]):
+        raise ValueError("Invalid coordinate, expected \"latitude, longitude\" (e.g. 32.7332, 35.0711).")
+    return float(lat[0]), float(lon[0])
+
+
+def coordinate_arrays(df):
+    """
+    (lat, lon) float64 arrays for the rows of df, from the lat / lon columns when
+    the frame has them (the collection does), otherwise parsed from Coordinates.
+    """
+    if all(column in df.columns for column in GEO_COLUMNS):
+        return df["lat"].to_numpy(dtype=float), df["lon"].to_numpy(dtype=float)
+    if "Coordinates" not in df.columns:
+        return np.full(len(df), np.nan), np.full(len(df), np.nan)
+    return parse_coordinates(df["Coordinates"])
+
+
+def locate_frame(df):
+    """
+    Returns a copy of df with the lat / lon columns parsed from Coordinates.
+    """
+    located = df.copy()
+    located["lat"], located["lon"] = parse_coordinates(df["Coordinates"]) if len(df) else ([], [])
+    located[GEO_COLUMNS] = located[GEO_COLUMNS].astype(float)
+    return located
+
+
+def needs_geo_columns(df):
+    """
+    True for collections saved before the lat / lon columns existed, or with
+    trips whose coordinates were never parsed into them.
+    """
+    if "Coordinates" not in df.columns:
+        return False
+    if any(column not in df.columns for column in GEO_COLUMNS):
+        return True
+    lat, _ = parse_coordinates(df["Coordinates"])
+    return bool((df["lat"].isna().to_numpy() & ~np.isnan(lat)).any())
+
+
+def locate_collection(cache, storage):
+    """
+    Fills the lat / lon columns of every stored trip and writes the collection
+    back in one batch. Returns the number of trips with a readable coordinate.
+    """
+    located = {}
+
+    def apply(df_current):
+        df_new = locate_frame(df_current)
+        located["trips"] = int(df_new["lat"].notna().sum())
+        storage.write_collection(cache.path, df_new)
+        return df_new
+
+    cache.update(apply)
+    return located["trips"]
+
+
+# ---------------------------------------------------------------------------------
+#  GeoJSON map layer
+#  One Point feature per located trip, drawn (and clustered) by a single
+#  dl.GeoJSON component. Popups are built on click, see trip_popup in the apps.
+# ---------------------------------------------------------------------------------
+# Superclusters merge points within this many pixels
+CLUSTER_RADIUS = 60
+
+
+def feature_collection(features):
+    return {"type": "FeatureCollection", "features": list(features)}
+
+
+class TripFeatures:
+    """
+    GeoJSON features of the located trips keyed by row label, built once per
+    dataset cache generation. Only the trip name goes along (as the tooltip).
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._generation = None
+        self._features = {}
+
+    def features(self):
+        """
+        {label: (key, feature)}. The key is the label plus what the feature shows,
+        so a row label handed out again (after a reset) never matches the old marker.
+        """
+        snapshot = self.cache.snapshot()
+        with self._lock:
+            if snapshot.generation == self._generation:
+                return self._features
+            df = snapshot.df
+            features = {}
+            if "Trip" in df.columns:
+                lat, lon = coordinate_arrays(df)
+                located = ~(np.isnan(lat) | np.isnan(lon))
+                for label, latitude, longitude, name in zip(
+                    df.index[located].tolist(), lat[located].tolist(), lon[located].tolist(), df["Trip"][located]
+                ):
+                    features[label] = (f"{label}:{latitude!r},{longitude!r}:{name}", {
+                        "type": "Feature",
+                        "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+                        "properties": {"id": label, "tooltip": str(name)},
+                    })
+            self._features, self._generation = features, snapshot.generation
+            return features
+
+    def select(self, labels):
+        """
+        {key: feature} of the given rows that have a location, in the order of labels.
+        """
+        features = self.features()
+        return dict(features[label] for label in labels if label in features)
+
+
+# ---------------------------------------------------------------------------------
+#  Spatial index (radius and bounding box queries)
+#  A fixed grid of CELL_DEGREES cells: the located trips are sorted by cell key,
+#  so each grid row a query touches is one searchsorted range, and only the
+#  trips in those cells are checked exactly.
+# ---------------------------------------------------------------------------------
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 0.1
+# Grid columns per grid row (360 / CELL_DEGREES, rounded up)
+_CELLS_PER_ROW = 4096
+
+
+def haversine_km(lat, lon, lat0, lon0):
+    """
+    Great-circle distance in km from (lat0, lon0) to each of the lat / lon arrays.
+    """
+    lat, lon = np.radians(lat), np.radians(lon)
+    lat0, lon0 = np.radians(lat0), np.radians(lon0)
+    a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat) * np.cos(lat0) * np.sin((lon - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def slope_degrees(rise_m, run_km):
+    """
+    Mean gradient in degrees of a rise (meters) over a run (km), 0 without a run.
+    The trail form computes the same in the browser (trailGeometry in assets/trip_geometry.js).
+    """
+    if not run_km > 0:
+        return 0.0
+    return math.degrees(math.atan(rise_m / (run_km * 1000)))
+
+
+def _cell(lat, lon):
+    row = np.floor((np.asarray(lat) + 90) / CELL_DEGREES).astype(np.int64)
+    column = np.floor((np.asarray(lon) + 180) / CELL_DEGREES).astype(np.int64)
+    return row, column
+
+
+class SpatialIndex:
+    """
+    Grid index over the lat / lon of the trips, built once per dataset cache generation.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._generation = None
+        self._keys = np.empty(0, dtype=np.int64)
+        self._labels = np.empty(0)
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+
+    def _sync(self):
+        snapshot = self.cache.snapshot()
+        with self._lock:
+            if snapshot.generation == self._generation:
+                return
+            lat, lon = coordinate_arrays(snapshot.df)
+            located = ~(np.isnan(lat) | np.isnan(lon))
+            lat, lon = lat[located], lon[located]
+            row, column = _cell(lat, lon)
+            keys = row * _CELLS_PER_ROW + column
+            order = np.argsort(keys, kind="mergesort")
+            self._keys, self._lat, self._lon = keys[order], lat[order], lon[order]
+            self._labels = snapshot.df.index.to_numpy()[located][order]
+            self._generation = snapshot.generation
+
+    def _candidates(self, south, west, north, east):
+        # Positions (in cell order) of the trips in the grid cells the box touches
+        (row0, row1), (column0, column1) = _cell([south, north], [west, east])
+        keys = self._keys
+        slices = []
+        for row in range(int(row0), int(row1) + 1):
+            start = np.searchsorted(keys, row * _CELLS_PER_ROW + column0, side="left")
+            stop = np.searchsorted(keys, row * _CELLS_PER_ROW + column1, side="right")
+            if stop > start:
+                slices.append(np.arange(start, stop))
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def within_bounds(self, south, west, north, east):
+        """
+        Row labels of the trips inside the box (the map's [[south, west], [north, east]] bounds).
+        """
+        self._sync()
+        south, north = max(south, -90.0), min(north, 90.0)
+        west, east = max(west, -180.0), min(east, 180.0)
+        if south > north or west > east:
+            return self._labels[:0]
+        found = self._candidates(south, west, north, east)
+        lat, lon = self._lat[found], self._lon[found]
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return self._labels[found[inside]]
+
+    def within_radius(self, lat0, lon0, radius_km):
+        """
+        Row labels of the trips within radius_km of (lat0, lon0), nearest first.
+        """
+        self._sync()
+        dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+        # Longitude degrees shrink with the cosine of the latitude, use the widest row of the circle
+        widest = min(89.9, abs(lat0) + dlat)
+        dlon = min(180.0, dlat / np.cos(np.radians(widest)))
+        south, north = max(lat0 - dlat, -90.0), min(lat0 + dlat, 90.0)
+        spans = [(max(lon0 - dlon, -180.0), min(lon0 + dlon, 180.0))]
+        # A circle over the antimeridian goes on at the other edge of the grid
+        if lon0 - dlon < -180.0:
+            spans.append((lon0 - dlon + 360.0, 180.0))
+        if lon0 + dlon > 180.0:
+            spans.append((-180.0, lon0 + dlon - 360.0))
+        found = np.unique(np.concatenate([self._candidates(south, west, north, east) for west, east in spans]))
+        distance = haversine_km(self._lat[found], self._lon[found], lat0, lon0)
+        inside = distance <= radius_km
+        order = np.argsort(distance[inside], kind="mergesort")
+        return self._labels[found[inside][order]]
+
+
+# ---------------------------------------------------------------------------------
+#  Drive distance from home
+#  The Distance column holds a drive time label (the How_far_from_me rubric).
+#  With a home location set, it is derived for every trip from the straight line
+#  distance times a road circuity factor, at an average driving speed.
+# ---------------------------------------------------------------------------------
+HOME_PATH = os.environ.get("TRIP_HOME_LOCATION", "home_location.json")
+DEFAULT_CIRCUITY = 1.3
+DEFAULT_SPEED_KMH = 60.0
+
+# (longest drive in hours, Distance label), the last label is for anything longer
+DRIVE_LABELS = [
+    (0.75, "Half an hour drive"),
+    (1.25, "1 drive hour"),
+    (2.25, "1.5-2 drive hours"),
+    (2.5, "2.5 drive hours"),
+    (3.25, "2.5-3 drive hours"),
+    (3.5, "3.5 drive hours"),
+    (4.0, "3.5-4 drive hours"),
+    (np.inf, "More than 4 drive hours"),
+]
+
+
+def load_home(path=HOME_PATH):
+    """
+    {"lat", "lon", "circuity", "speed_kmh"} of the home location, or None when it isn't set.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        home = json.load(f)
+    return {
+        "lat": float(home["lat"]),
+        "lon": float(home["lon"]),
+        "circuity": float(home.get("circuity", DEFAULT_CIRCUITY)),
+        "speed_kmh": float(home.get("speed_kmh", DEFAULT_SPEED_KMH)),
+    }
+
+
+def save_home(lat, lon, circuity=DEFAULT_CIRCUITY, speed_kmh=DEFAULT_SPEED_KMH, path=HOME_PATH):
+    if circuity < 1:
+        raise ValueError("The circuity factor can't be below 1 (roads are never shorter than a straight line).")
+    if speed_kmh <= 0:
+        raise ValueError("The average driving speed has to be above 0.")
+    home = {"lat": float(lat), "lon": float(lon), "circuity": float(circuity), "speed_kmh": float(speed_kmh)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(home, f, indent=4)
+    return home
+
+
+def drive_hours(lat, lon, home):
+    """
+    Estimated drive time in hours from home to each of the lat / lon arrays.
+    """
+    return haversine_km(lat, lon, home["lat"], home["lon"]) * home["circuity"] / home["speed_kmh"]
+
+
+def distance_labels(lat, lon, home):
+    """
+    Distance label of every trip, None where the trip has no location.
+    """
+    hours = drive_hours(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float), home)
+    limits = np.array([limit for limit, _ in DRIVE_LABELS])
+    labels = np.array([label for _, label in DRIVE_LABELS], dtype=object)
+    result = labels[np.minimum(np.searchsorted(limits, hours, side="left"), len(labels) - 1)]
+    result[np.isnan(hours)] = None
+    return result
@@ -0,0 +1,202 @@
+import argparse
+import os
+from pathlib import Path
+
+import gpxpy
+import numpy as np
+import pandas as pd
+
+import trip_sqlite
+import trip_storage
+from trip_cache import DatasetCache
+from trip_geo import haversine_km, slope_degrees
+from trip_scoring import WEIGHTS, float_to_duration, naismith_hours, rescore_frame
+
+
+# ---------------------------------------------------------------------------------
+#  GPX import
+#  Trail metrics (length, ascent / descent, share of the distance spent climbing,
+#  mean gradients, loop flag and midpoint) computed with NumPy over the track points,
+#  for the Trips Calculation form (upload) or for stored trips (batch folder).
+# ---------------------------------------------------------------------------------
+# Start and end closer than this make a circular trail
+LOOP_KM = 0.25
+# Points in the moving average over the elevations, against GPS noise adding up to fake ascent
+ELEVATION_SMOOTHING = 5
+
+# Collection columns filled in from a track
+GPX_COLUMNS = [
+    "Trail Length", "Incline", "Decline", "Inc_Pre", "Dec_Pre", "Incline Degree", "Decline Degree", "Circular?"
+]
+
+
+def parse_gpx(text):
+    """
+    (name, lat, lon, ele) of a GPX document. The points of every track segment
+    are joined in order, routes are used when there's no track.
+    ele is NaN where a point has no elevation.
+    """
+    gpx = gpxpy.parse(text)
+    points = [point for track in gpx.tracks for segment in track.segments for point in segment.points]
+    if not points:
+        points = [point for route in gpx.routes for point in route.points]
+    if len(points) < 2:
+        raise ValueError("The GPX file has no track with at least two points.")
+
+    name = next((track.name for track in gpx.tracks if track.name), None) or gpx.name
+    lat = np.array([p.latitude for p in points], dtype=float)
+    lon = np.array([p.longitude for p in points], dtype=float)
+    ele = np.array([np.nan if p.elevation is None else p.elevation for p in points], dtype=float)
+    return name, lat, lon, ele
+
+
+def read_gpx_file(path):
+    """
+    parse_gpx of a .gpx file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_gpx(f.read())
+
+
+def _smooth(values, window=ELEVATION_SMOOTHING):
+    if window <= 1 or len(values) < window:
+        return values
+    padded = np.pad(values, (window // 2, window - 1 - window // 2), mode="edge")
+    return np.convolve(padded, np.ones(window) / window, mode="valid")
+
+
+def trail_metrics(lat, lon, ele):
+    """
+    The GPX_COLUMNS values of a track, plus "Coordinates" (the point halfway
+    along it), in the units the form uses: km, meters (Decline is negative),
+    percentages of the distance and degrees.
+    """
+    step_km = haversine_km(lat[1:], lon[1:], lat[:-1], lon[:-1])
+    length_km = float(step_km.sum())
+    if length_km == 0:
+        raise ValueError("The GPX track doesn't go anywhere.")
+
+    # Segments without an elevation count as flat
+    rise = np.nan_to_num(np.diff(_smooth(ele)))
+    climbing, descending = rise > 0, rise < 0
+    ascent = float(rise[climbing].sum())
+    descent = float(rise[descending].sum())
+    climb_km = float(step_km[climbing].sum())
+    descent_km = float(step_km[descending].sum())
+    sloped_km = climb_km + descent_km
+    inc_pre = round(100 * climb_km / sloped_km) if sloped_km else 50
+
+    # Mean gradient over the climbing (descending) part, like the form's atan(rise / run)
+    incline_degree = slope_degrees(ascent, climb_km)
+    decline_degree = slope_degrees(descent, descent_km)
+
+    distance = np.concatenate([[0.0], np.cumsum(step_km)])
+    middle = int(np.searchsorted(distance, length_km / 2))
+    circular = haversine_km(lat[0], lon[0], lat[-1], lon[-1]) <= LOOP_KM
+
+    return {
+        "Coordinates": f"{lat[middle]:.7f}, {lon[middle]:.7f}",
+        "Trail Length": round(length_km, 2),
+        "Incline": int(round(ascent)),
+        "Decline": int(round(descent)),
+        "Inc_Pre": inc_pre,
+        "Dec_Pre": 100 - inc_pre,
+        "Incline Degree": round(incline_degree, 4),
+        "Decline Degree": round(decline_degree, 4),
+        "Circular?": "Yes" if circular else "No",
+    }
+
+
+# ---------------------------------------------------------------------------------
+#  Batch import into the stored trips
+# ---------------------------------------------------------------------------------
+def gpx_frame(folder):
+    """
+    One row of trail metrics per .gpx file in the folder, with the "Trip" it
+    belongs to (the track name, or the file name when the track has none).
+    Files that can't be read are listed under "error".
+    """
+    rows = []
+    for path in sorted(Path(folder).glob("*.gpx")):
+        try:
+            name, lat, lon, ele = read_gpx_file(path)
+            rows.append({"file": path.name, "Trip": name or path.stem, **trail_metrics(lat, lon, ele)})
+        except (ValueError, gpxpy.gpx.GPXException) as e:
+            rows.append({"file": path.name, "Trip": path.stem, "error": str(e)})
+    return pd.DataFrame(rows)
+
+
+def import_gpx_folder(cache, storage, folder, weights=WEIGHTS):
+    """
+    Replaces the trail metrics (and Walking Hours, from each trip's KMH) of the
+    stored trips that have a .gpx file in the folder, matched by trip name
+    (case-insensitive), then rescores the collection and writes it back in one batch.
+    The trips keep their own Coordinates. Returns a summary dict.
+    """
+    tracks = gpx_frame(folder)
+    summary = {"files": len(tracks), "updated": 0, "unmatched": [], "errors": []}
+    if tracks.empty:
+        return summary
+    if "error" in tracks:
+        summary["errors"] = tracks.loc[tracks["error"].notna(), "file"].tolist()
+        tracks = tracks[tracks["error"].isna()]
+
+    def apply(df_current):
+        if df_current.empty:
+            summary["unmatched"] = tracks["file"].tolist()
+            return df_current
+        names = df_current["Trip"].astype(str).str.strip().str.lower()
+        keys = tracks["Trip"].astype(str).str.strip().str.lower()
+        summary["unmatched"] = tracks.loc[~keys.isin(names), "file"].tolist()
+        matched = tracks[keys.isin(names)].assign(key=keys).drop_duplicates("key", keep="last").set_index("key")
+        if matched.empty:
+            return df_current
+
+        rows = names[names.isin(matched.index)]
+        updated = df_current.copy()
+        for column in GPX_COLUMNS:
+            updated.loc[rows.index, column] = matched.loc[rows.to_numpy(), column].to_numpy()
+        hours = naismith_hours(
+            updated.loc[rows.index, "Trail Length"].to_numpy(dtype=float),
+            updated.loc[rows.index, "Incline"].to_numpy(dtype=float),
+            -updated.loc[rows.index, "Decline"].to_numpy(dtype=float),
+            pd.to_numeric(updated.loc[rows.index, "KMH"], errors="coerce").to_numpy(dtype=float),
+        )
+        # Trips without a usable KMH get no walking time
+        updated.loc[rows.index, "Walking Hours"] = [None if np.isnan(h) else float_to_duration(h) for h in hours]
+
+        rescored, result = rescore_frame(updated, weights)
+        summary.update(result, updated=len(rows))
+        storage.write_collection(cache.path, rescored)
+        return rescored
+
+    cache.update(apply)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill in the trail metrics of stored trips from a folder of GPX files.")
+    parser.add_argument("folder", help="Folder with one <trip name>.gpx per trip")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default=os.environ.get("TRIP_STORAGE", "csv"))
+    parser.add_argument("path", nargs="?", help="Trip_Collection.csv or the SQLite database")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        storage = trip_sqlite
+        path = args.path or os.environ.get("TRIP_DB_PATH", "Trip_Collection.db")
+    else:
+        storage = trip_storage
+        path = args.path or "Trip_Collection.csv"
+
+    cache = DatasetCache(
+        path,
+        reader=storage.read_collection,
+        signature=storage.collection_signature,
+        lock=storage.collection_lock,
+    )
+    summary = import_gpx_folder(cache, storage, args.folder)
+    print(f"Updated {summary['updated']} of {summary['files']} GPX files' trips.")
+    if summary["unmatched"]:
+        print(f"No trip named like: {', '.join(summary['unmatched'])}")
+    if summary["errors"]:
+        print(f"Couldn't read: {', '.join(summary['errors'])}")
@@ -0,0 +1,164 @@
+import difflib
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import dash
+from dash import Patch
+
+
+# ---------------------------------------------------------------------------------
+#  Incremental updates with Dash Patch
+#  A single added or removed trip only touches a few values of a figure or a few
+#  markers of a map layer, so only those operations are sent to the page.
+# ---------------------------------------------------------------------------------
+# Above this many values a full property is cheaper than the patch operations
+MAX_PATCH_VALUES = 200
+
+
+def _size(value):
+    if isinstance(value, dict):
+        return 1 + sum(_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return 1 + sum(_size(v) for v in value)
+    return 1
+
+
+def _hashable(value):
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    return json.dumps(value, sort_keys=True)
+
+
+def _diff_list(old, new, path, ops, item=None):
+    """
+    Inserts, deletes and replacements turning old into new. item(j) gives the
+    value to send for new[j], by default new[j] itself.
+    """
+    item = item or (lambda j: new[j])
+    matcher = difflib.SequenceMatcher(None, [_hashable(v) for v in old], [_hashable(v) for v in new], autojunk=False)
+    # Operations are applied one after the other, so later indexes are shifted
+    offset = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if tag == "replace" and i2 - i1 == j2 - j1:
+            for k in range(i2 - i1):
+                ops.append(("set", path + [i1 + offset + k], item(j1 + k)))
+            continue
+        for _ in range(i2 - i1):
+            ops.append(("delete", path + [i1 + offset]))
+        for k in range(j2 - j1):
+            ops.append(("insert", path, i1 + offset + k, item(j1 + k)))
+        offset += (j2 - j1) - (i2 - i1)
+
+
+def _diff(old, new, path, ops):
+    if old == new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append(("delete", path + [key]))
+        for key, value in new.items():
+            if key in old:
+                _diff(old[key], value, path + [key], ops)
+            else:
+                ops.append(("set", path + [key], value))
+    elif isinstance(old, list) and isinstance(new, list):
+        if len(old) == len(new) and all(isinstance(v, dict) for v in old + new):
+            # Traces and annotations, compared one by one
+            for i, (a, b) in enumerate(zip(old, new)):
+                _diff(a, b, path + [i], ops)
+        else:
+            _diff_list(old, new, path, ops)
+    else:
+        ops.append(("set", path, new))
+
+
+def _location(patch, path):
+    for key in path:
+        patch = patch[key]
+    return patch
+
+
+def _to_patch(ops):
+    patch = Patch()
+    for op in ops:
+        if op[0] == "set":
+            _location(patch, op[1][:-1])[op[1][-1]] = op[2]
+        elif op[0] == "delete":
+            del _location(patch, op[1][:-1])[op[1][-1]]
+        else:
+            _location(patch, op[1]).insert(op[2], op[3])
+    return patch
+
+
+def _cost(ops):
+    return sum(_size(op[-1]) if op[0] != "delete" else 1 for op in ops)
+
+
+def figure_update(old, new, max_values=MAX_PATCH_VALUES):
+    """
+    What to send for a figure the page shows as old and should show as new:
+    no_update, a Patch with the changed values, or new itself when the
+    patch would be about as big as the figure.
+    """
+    ops = []
+    _diff(old, new, [], ops)
+    if not ops:
+        return dash.no_update
+    if _cost(ops) > max_values:
+        return new
+    return _to_patch(ops)
+
+
+# ---------------------------------------------------------------------------------
+#  Keyed component lists (map marker layers)
+# ---------------------------------------------------------------------------------
+class SentLists:
+    """
+    Remembers the item keys sent to pages, under a token the page keeps in a dcc.Store.
+    The token is a hash of the keys, so pages showing the same items share an entry,
+    and a page whose token was evicted (or came from another worker) just gets
+    the full list again.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def remember(self, keys):
+        keys = list(keys)
+        token = hashlib.sha1(json.dumps(keys).encode("utf-8")).hexdigest()
+        with self._lock:
+            self._entries[token] = keys
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return token
+
+    def update(self, token, items, max_values=MAX_PATCH_VALUES, path=()):
+        """
+        items: {key: component} in display order.
+        path: where the list sits inside the property (e.g. ["features"] of GeoJSON data).
+        Returns (value to send for the property, new token). A full value is the
+        plain list, for the caller to put back at path.
+        """
+        keys = list(items)
+        with self._lock:
+            shown = self._entries.get(token)
+        new_token = self.remember(keys)
+        if shown is None:
+            return list(items.values()), new_token
+        if shown == keys:
+            return dash.no_update, new_token
+
+        ops = []
+        _diff_list(shown, keys, list(path), ops, item=lambda j: items[keys[j]])
+        # Every inserted component counts as one value
+        if len(ops) > max_values:
+            return list(items.values()), new_token
+        return _to_patch(ops), new_token
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+
+import pandas as pd
+
+from trip_scoring import WEIGHTS, component_scores, weighted_total
+
+
+# ---------------------------------------------------------------------------------
+#  Named weight profiles
+#  Loaded from weight_profiles.json (or $TRIP_WEIGHT_PROFILES). Each profile only
+#  lists the weights it changes, everything else keeps the WEIGHTS default, and
+#  the result is rescaled to the default total so scores stay on the same 0-10 scale.
+# ---------------------------------------------------------------------------------
+DEFAULT_PROFILE = "Default"
+PROFILES_PATH = os.environ.get("TRIP_WEIGHT_PROFILES", "weight_profiles.json")
+
+
+def load_profiles(path=PROFILES_PATH):
+    """
+    Returns {profile name: weights dict}, always starting with the Default profile.
+    A missing file just means there are no other profiles.
+    """
+    profiles = {DEFAULT_PROFILE: dict(WEIGHTS)}
+    if not os.path.exists(path):
+        return profiles
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    for name, overrides in config.items():
+        unknown = [criterion for criterion in overrides if criterion not in WEIGHTS]
+        if unknown:
+            raise ValueError(f"Weight profile '{name}' has unknown criteria: {unknown}")
+        weights = dict(WEIGHTS)
+        weights.update({criterion: float(weight) for criterion, weight in overrides.items()})
+        scale = sum(WEIGHTS.values()) / sum(weights.values())
+        profiles[name] = {criterion: weight * scale for criterion, weight in weights.items()}
+    return profiles
+
+
+class ProfileScores:
+    """
+    Total Score of every trip under every profile, cached per dataset generation.
+    The component scores are computed once per generation and each profile is
+    only a weighted sum over them, so switching profiles never rescans the data.
+    """
+
+    def __init__(self, cache, profiles):
+        self.cache = cache
+        self.profiles = profiles
+        self._lock = threading.Lock()
+        self._generation = None
+        self._totals = pd.DataFrame()
+
+    def totals(self):
+        """
+        DataFrame with one Total Score column per profile, on the collection's index.
+        """
+        snapshot = self.cache.snapshot()
+        if snapshot.generation == self._generation:
+            return self._totals
+        with self._lock:
+            if snapshot.generation != self._generation:
+                components, valid = component_scores(snapshot.df)
+                self._totals = pd.DataFrame(
+                    {name: weighted_total(components, valid, weights) for name, weights in self.profiles.items()},
+                    index=snapshot.df.index,
+                )
+                self._generation = snapshot.generation
+            return self._totals
+
+    def apply(self, df, profile):
+        """
+        Returns df with "Total Score" replaced by the given profile's scores.
+        The Default profile keeps the stored scores and df is returned as is.
+        """
+        if not profile or profile == DEFAULT_PROFILE or profile not in self.profiles or df.empty:
+            return df
+        df = df.copy()
+        df["Total Score"] = self.totals()[profile].reindex(df.index)
+        return df
+
+    def options(self):
+        return [{'label': name, 'value': name} for name in self.profiles]
@@ -0,0 +1,144 @@
+import atexit
+import os
+import threading
+import time
+
+from flask import Response
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # Without watchdog (inotify) changes are picked up by polling only
+    Observer = None
+
+
+# ---------------------------------------------------------------------------------
+#  Change-driven push of the collection generation (server-sent events)
+# ---------------------------------------------------------------------------------
+class CollectionWatcher:
+    """
+    Watches the data store and wakes every open event stream when the collection changes.
+    File events come from watchdog (inotify) when it's installed; a single polling
+    thread per process covers everything else, including in-process writes that
+    update the dataset cache directly.
+    """
+
+    def __init__(self, cache, poll_interval=1.0):
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self._changed = threading.Condition()
+        self._generation = None
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._observer = None
+
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        self.check()
+        if Observer is not None:
+            self._start_observer()
+        threading.Thread(target=self._poll, name="collection-watcher", daemon=True).start()
+        atexit.register(self.close)
+
+    def close(self):
+        """
+        Stops the polling thread and the file observer, and ends every open stream.
+        """
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+        with self._changed:
+            self._changed.notify_all()
+
+    @property
+    def closed(self):
+        return self._stop.is_set()
+
+    def check(self):
+        """
+        Compares the cache generation with the last one seen and wakes the
+        streams if it moved. Returns the current generation.
+        """
+        generation = self.cache.generation
+        with self._changed:
+            if generation != self._generation:
+                self._generation = generation
+                self._changed.notify_all()
+        return generation
+
+    def wait_for_change(self, seen, timeout):
+        """
+        Blocks until the generation differs from seen, the timeout passes or the watcher is closed.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._generation != seen or self.closed, timeout)
+            return self._generation
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error checking the collection for changes: {e}")
+
+    def _start_observer(self):
+        path = os.path.abspath(self.cache.path)
+        watcher = self
+
+        class StoreEventHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # Covers the CSV, its os.replace temp file rename and SQLite's -wal file
+                touched = [event.src_path, getattr(event, "dest_path", "") or ""]
+                if any(os.path.abspath(p).startswith(path) for p in touched if p):
+                    watcher.check()
+
+        observer = Observer()
+        observer.schedule(StoreEventHandler(), os.path.dirname(path), recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+
+
+def register_event_stream(server, watcher, route="/collection-events", keepalive=15, max_duration=300):
+    """
+    Adds an SSE endpoint to the Flask server behind the Dash app.
+    Each client gets the current generation on connect, and then one message per change.
+
+    An open stream holds a worker thread for as long as it lasts, so the app has
+    to run on threaded or async workers (e.g. gunicorn --worker-class gthread
+    --threads 16, or gevent), not plain sync workers. Streams end after
+    max_duration seconds and the browser reconnects (retry), so no connection
+    holds its thread for good.
+    """
+    @server.route(route)
+    def collection_events():
+        watcher.start()
+
+        def stream():
+            yield "retry: 3000\n\n"
+            seen = watcher.check()
+            yield f"data: {seen}\n\n"
+            deadline = time.monotonic() + max_duration
+            while not watcher.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                generation = watcher.wait_for_change(seen, min(keepalive, remaining))
+                if generation != seen:
+                    seen = generation
+                    yield f"data: {generation}\n\n"
+                elif not watcher.closed and time.monotonic() < deadline:
+                    yield ": keepalive\n\n"
+
+        return Response(
+            stream(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return collection_events
@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------------------------------------------------------------
+#  Sorted range indexes for the numeric sliders
+#  Values are kept sorted with their row labels, so [lo, hi] is two searchsorted
+#  calls and the slider bounds are the first and last value.
+# ---------------------------------------------------------------------------------
+class SortedColumn:
+    """
+    Values of one numeric column in ascending order, with the row label of each.
+    Empty cells (NaN) are left out, like the comparisons of a boolean mask.
+    """
+
+    def __init__(self, series):
+        series = pd.to_numeric(series, errors="coerce").dropna()
+        values = series.to_numpy(dtype=float)
+        order = np.argsort(values, kind="stable")
+        self.values = values[order]
+        self.labels = series.index.to_numpy()[order]
+
+    def bounds(self):
+        """
+        (min, max) of the column, (0, 0) when it has no values.
+        """
+        if not len(self.values):
+            return 0.0, 0.0
+        return float(self.values[0]), float(self.values[-1])
+
+    def between(self, lo, hi):
+        """
+        Row labels with lo <= value <= hi, in value order.
+        """
+        start = np.searchsorted(self.values, lo, side="left")
+        stop = np.searchsorted(self.values, hi, side="right")
+        return self.labels[start:stop]
+
+
+class RangeIndex:
+    """
+    SortedColumn of values(df, *params) per params (a column, or the Total Score of
+    a weight profile), sorted again once per dataset cache generation. The sorted
+    arrays aren't patched with the rows a write added or removed: finding those
+    rows means diffing the whole column, and with the np.insert calls that took
+    longer than a stable argsort (0.075 s against 0.024 s at 200k rows).
+    """
+
+    def __init__(self, cache, values, max_entries=8):
+        self.cache = cache
+        self.values = values
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def column(self, *params):
+        snapshot = self.cache.snapshot()
+        with self._lock:
+            entry = self._entries.get(params)
+            if entry is None or entry[0] != snapshot.generation:
+                self._entries[params] = (snapshot.generation, SortedColumn(self.values(snapshot.df, *params)))
+            self._entries.move_to_end(params)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return self._entries[params][1]
+
+
+def column_values(name):
+    """
+    values function for a RangeIndex over a plain column.
+    """
+    def values(df):
+        return df[name] if name in df.columns else pd.Series(dtype=float)
+    return values
+
+
+def rows_between(df, ranges):
+    """
+    Rows of df inside every (SortedColumn, lo, hi) range, in the order of df.
+    The labels of each range are looked up once and the positions intersected.
+    """
+    positions = None
+    for column, lo, hi in ranges:
+        found = df.index.get_indexer(column.between(lo, hi))
+        found = np.unique(found[found >= 0])
+        positions = found if positions is None else np.intersect1d(positions, found, assume_unique=True)
+    if positions is None:
+        return df
+    return df.iloc[positions]
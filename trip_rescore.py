@@ -0,0 +1,98 @@
+import argparse
+import os
+
+import pandas as pd
+
+import trip_sqlite
+import trip_storage
+from trip_cache import DatasetCache
+from trip_geo import coordinate_arrays, distance_labels, locate_collection, needs_geo_columns
+from trip_scoring import WEIGHTS, rescore_frame
+
+
+# ---------------------------------------------------------------------------------
+#  Bulk rescore of the whole collection
+#  Run after changing a weight or a rubric in trip_scoring.py, and once for
+#  collections saved before the score and lat / lon columns existed.
+# ---------------------------------------------------------------------------------
+def rescore_collection(cache, storage, weights=WEIGHTS):
+    """
+    Rescores every trip (Total Score and the per-criterion score columns) in
+    one vectorised pass and writes the result back in a
+    single batch (one atomic file replace for the CSV, one transaction for SQLite).
+    The store is left untouched when no score moved. Returns the summary dict
+    from rescore_frame.
+    """
+    summary = {}
+
+    def apply(df_current):
+        rescored, result = rescore_frame(df_current, weights)
+        summary.update(result)
+        if not (result["scores_changed"] or result["components_changed"] or result["columns_added"]):
+            return df_current
+        storage.write_collection(cache.path, rescored)
+        return rescored
+
+    cache.update(apply)
+    return summary
+
+
+def relocate_collection(cache, storage, home, weights=WEIGHTS):
+    """
+    Derives the Distance label of every located trip from the home location,
+    rescores the collection with it and writes both back in one batch.
+    Trips without a location keep their Distance. Returns the rescore summary
+    with the number of changed Distance labels as "distances_changed".
+    """
+    summary = {}
+
+    def apply(df_current):
+        if df_current.empty:
+            summary.update(rescore_frame(df_current, weights)[1], distances_changed=0)
+            return df_current
+        lat, lon = coordinate_arrays(df_current)
+        labels = pd.Series(distance_labels(lat, lon, home), index=df_current.index)
+        relocated = df_current.copy()
+        relocated["Distance"] = labels.where(labels.notna(), df_current["Distance"])
+        rescored, result = rescore_frame(relocated, weights)
+        summary.update(result, distances_changed=int((relocated["Distance"].fillna("") != df_current["Distance"].fillna("")).sum()))
+        storage.write_collection(cache.path, rescored)
+        return rescored
+
+    cache.update(apply)
+    return summary
+
+
+def describe(summary):
+    return (
+        f"Rescored {summary['trips']} trips: {summary['scores_changed']} scores changed, "
+        f"{summary['rankings_changed']} rankings changed, {summary['components_changed']} trips with new "
+        f"component scores, {summary['unscored']} could not be scored."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recompute the Total Score of every stored trip and fill in missing lat / lon columns."
+    )
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default=os.environ.get("TRIP_STORAGE", "csv"))
+    parser.add_argument("path", nargs="?", help="Trip_Collection.csv or the SQLite database")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        storage = trip_sqlite
+        path = args.path or os.environ.get("TRIP_DB_PATH", "Trip_Collection.db")
+    else:
+        storage = trip_storage
+        path = args.path or "Trip_Collection.csv"
+
+    cache = DatasetCache(
+        path,
+        reader=storage.read_collection,
+        signature=storage.collection_signature,
+        lock=storage.collection_lock,
+    )
+    print(describe(rescore_collection(cache, storage)))
+    # After the score columns, so the file keeps the TRIP_COLUMNS order
+    if needs_geo_columns(cache.get()):
+        print(f"Located {locate_collection(cache, storage)} of {len(cache.get())} trips.")
@@ -0,0 +1,773 @@
+import numpy as np
+import pandas as pd
+
+
+# Dictionaries for scoring
+area_scores = {
+    "Golan Heights - North-East Galilee": 10,
+    "Golan Heights": 9.5,
+    "Upper Galilee": 9.25,
+    "Western Galilee": 9.2,
+    "Galilee Center & The Kinerret":9,
+    "Lower Galilee": 8.75,
+    "Carmel Mountains": 8.25,
+    "Jerusalem Mountains": 8,
+    "The Shfela Mountains": 7.5,
+    "Eilat Mountains": 7,
+    "The Dead Sea Mountains": 6.75,
+    "South Negev Mountains": 6.5,
+    "Arava Mountains": 6,
+    "Northern Negav": 5,
+    "Judea & Samaria Area": 4,
+    "The Northen Coastal Plain": 3.5,
+    "The Center Coastal Plain": 3,
+    "The South Coastal Plain": 2.5
+}
+
+Accessibility = {
+    "Open to All": 10,
+    "Open, But with Army Coordination": 7.5, 
+    "Open Most of The Time, with Some Exceptions": 6,
+    "Closed Most of The Time, with Some Exceptions": 4.5,
+    "A Restricted Military Zone": 0,
+}
+
+Challenge = {
+    "Very Challenging, with Lots of Obstacles in The Way": 10,
+    "There's Some Challenge, but Most of it is in Average Challenge": 8,
+    "There's some challenge, but Most of The Trail is Easy": 6.5,
+    "Medium Challenge": 5,
+    "Easy-Medium": 3.5,   
+    "Easy": 2,   
+    "No Challenge At All!": 0
+}
+
+Terrain = {
+    "Mountainous region with lots of rivers and creeks": 10,
+    "Mostly rivers, with some steep hills": 8,
+    "Mostly high plattos, with some creeks": 6,
+    "A coastly region, with some rivers": 5,
+    "A plain area with some rivers and hills": 4,
+    "A whole plain area": 2
+}
+
+View = {
+    "Snowy mountains, lucious springs and rivers, lots of meadows and green": 13,
+    "Vivid green mountains, lots of streams, and rocks": 10,
+    "Bared Mountains with lots of flowing rivers": 8,
+    "Green mountains, but no water nearby": 7.5,
+    "Bared Mountains & Dry Rivers": 7,
+    "Bared Mountains, but no rivers nearby": 6,
+    "Deset mountains with some creeks": 5,
+    "coastal area, shores and sea": 4,
+    "Some small hills, creeks and open meadows": 3,
+    "Urbanic View": 2
+}
+
+Shade= {
+    "Mostly shaded, cooled and glimpses of sunshine occasionally": 10,
+    "Fully shaded": 9,
+    "Mostly shaded, but could be parts exposed to light": 8,
+    "Half shaded, half exposed to sunlight": 6,
+    "Most of it exposed to sunlight, occasionally shaded": 4,
+    "Fully exposed to sunlight": 2
+}
+
+Entry_Fee = {
+"Free of charge": 10,
+"Free for most of the trail. with some unique locations for extra charge": 8,
+"Low-Medium charge, worths the money": 7,
+"Low-Medium charge, doesn't worth the money": 5.5,
+"High charge, but worth the money": 4,
+"High, mendatory and nothing special":0
+}
+
+Water = {
+"Plenty of water, easy access, with an arranged entrance and many water activities in place": 13,
+"Lots of water, with several entrances, easy access": 10,
+"Some locations rich in waterfalls and pools, with many entry points throught the trail": 9,
+"Lots of locations with water along the trail, but hard to reach easily": 7.5,
+"Few points with water along the trail, not an easy access": 6,
+"Lots of points with dry, dirty pools along the way": 3,
+"Few points with even less water in them": 1.5,
+"None": 0
+}
+
+Nearby_attractions = {
+    "Full of attractions nearby: wineries, viewpoints, food, pubs and resorts": 10,
+    "Some attractions along the way, mostly wineries and restaurants": 8,
+    "Few attractions nearby, mostly restaurants and hostels": 6,
+    "One restaurant & hostel 50KM from the trail": 5,
+    "One winery 50KM from the trail": 4,
+    "Nothing special within 80KM from the trail": 2,
+    "None": 0
+}
+
+"""Trail_length = {
+"10KM, an average of 4-5 walking hours": 10,
+"7-9KM, an average of 3.5-4.5 walking hours": 9,
+"5-7KM, an average of 2.5-3.5 walking hours": 7.5,
+"14-15KM, extensive daytrip, an average of 6-7 walking hours": 7,
+"3-5KM, an average of 1.5-2.5 walking hours": 6,
+"19-20KM, a full day of walking, about 8-9 walking hours": 5.5,
+"Higher than 20KM, more than 9 walking hours": 4,
+"2-3KM, about 1 walking hours": 2,
+"1-2KM, less than half an hour": 0
+}"""
+
+
+def trail_length_score(trail_length):
+    # Attempt to convert to float if the input is a string
+    try:
+        trail_length = float(trail_length)
+    except (ValueError, TypeError):
+        raise ValueError("Please insert a valid decimal number for the trail length.")
+
+    # Validate the range
+    if trail_length < 1 or trail_length > 25:
+        raise ValueError("Not a relevant trail length, sorry :(")
+
+    # Determine the score
+    if 9 <= trail_length <= 12:
+        return 10
+    elif 7 <= trail_length < 9:
+        return 9
+    elif 12 < trail_length <= 15:
+        return 8
+    elif 5 <= trail_length < 7:
+        return 7.5
+    elif 3 <= trail_length < 5:
+        return 6
+    elif 15 < trail_length <= 20:
+        return 5
+    elif 20 < trail_length <= 25:
+        return 4
+    elif 2 <= trail_length < 3:
+        return 2
+    elif 1 <= trail_length < 2:
+        return 1
+    # Default fallback (should not occur)
+    return 0
+ 
+circular= {
+     "Yes": 10,
+     "No": 0
+ }
+
+def incline_score (incline):
+    try:
+        incline = int(incline)
+    except (ValueError, TypeError):
+        raise ValueError("Please insert a valid number for the incline.")
+        # Validate the range
+    if incline < 1 or incline > 2500:
+        raise ValueError("Not a relevant incline, sorry :(")
+
+    if 550 <= incline <= 750:
+        return 10
+    elif 450 <= incline < 550:
+        return 9
+    elif 750 < incline <= 850:
+        return 8
+    elif 350 <= incline < 450:
+        return 7.5
+    elif 850 < incline <= 1000:
+        return 6
+    elif 250 <= incline < 350:
+        return 5
+    elif 150 <= incline < 250:
+        return 4
+    elif 1000 < incline <= 1200:
+        return 3
+    elif 1200 < incline <=2500:
+        return 2.5
+    elif 1 <= incline < 150:
+        return 2
+    # Default fallback (should not occur)
+    return 0
+
+def decline_score (decline):
+    try:
+        decline = int(decline)
+    except (ValueError, TypeError):
+        raise ValueError("Please insert a valid number for the decline.")
+        # Validate the range
+    if decline < -2500 or decline > 1:
+        raise ValueError("Not a relevant decline, sorry :(")
+
+    if 550 <= decline <= 750:
+        return 10
+    elif 450 <= decline < 550:
+        return 9
+    elif 750 < decline <= 850:
+        return 8
+    elif 350 <= decline < 450:
+        return 7.5
+    elif 850 < decline <= 1000:
+        return 6
+    elif 250 <= decline < 350:
+        return 5
+    elif 150 <= decline < 250:
+        return 4
+    elif 1000 < decline <= 1200:
+        return 3
+    elif 1200 < decline <=2500:
+        return 2.5
+    elif 1 <= decline < 150:
+        return 2
+    # Default fallback (should not occur)
+    return 0 
+
+def inc_precentage_score(incline_pre):
+     if not incline_pre:
+         raise ValueError("Please enter an incline precentage of the trail")
+     elif 40 < incline_pre <=50:
+         return 10
+     elif 50 < incline_pre <=60:
+         return 9
+     elif 60 < incline_pre <=70:
+         return 8
+     elif 30 <= incline_pre <=40:
+         return 7
+     elif 70 < incline_pre <=80: 
+         return 6
+     elif 80 < incline_pre <=90:
+         return 5
+     elif 90 < incline_pre <=100:
+         return 4
+     elif 20 <= incline_pre <30:
+         return 3
+     elif 10 <= incline_pre <20:
+         return 2
+     elif 0<= incline_pre < 10:
+         return 1
+     else:
+         0   
+
+def dec_precentage_score(decline_pre):
+     if not decline_pre:
+         raise ValueError("Please enter an incline precentage of the trail")
+     elif 50 <= decline_pre <60:
+         return 10
+     elif 40 <= decline_pre <50:
+         return 9
+     elif 30 <= decline_pre <40:
+         return 8
+     elif 60 <= decline_pre <=70:
+         return 7
+     elif 20 <= decline_pre <30:
+         return 6
+     elif 10 <= decline_pre <20:
+         return 5
+     elif 0 <= decline_pre <10:
+         return 4
+     elif 70 < decline_pre <=80:
+         return 3
+     elif 80 < decline_pre <90:
+         return 2
+     elif 90 < decline_pre <=100:
+         return 1
+     else:
+        0                
+def kmh_validity(kmh):
+    # Check if kmh is provided
+    if kmh is None or kmh == '':
+        raise ValueError("Please enter an average KMH")
+    try:
+        kmh_float = float(kmh)
+    except ValueError:
+        raise ValueError("Please insert a valid decimal number for kmh.")
+
+    if kmh_float <= 0 or kmh_float >= 15:
+        raise ValueError("Invalid kmh input! Must be greater than 0 and less than 15.")
+
+    return kmh_float
+
+def walkinghr_scores(whr):
+    if not whr:
+        raise ValueError("Please provide a travel time in the format 'hh:mm'")
+    try:
+        # Split the input into hours and minutes
+        hours, minutes = map(int, whr.split(":"))
+    except ValueError:
+        raise ValueError("Invalid format. Please provide time in 'hh:mm' format.")
+
+    # Convert to decimal hours
+    whr_value = hours + minutes / 60
+
+    # Determine the score based on ranges
+    if 4.5 <= whr_value <= 5:
+        return 10
+    elif 4 < whr_value <= 4.5:
+        return 9
+    elif 3.5 <= whr_value <= 4:
+        return 8
+    elif 3 <= whr_value < 3.5:
+        return 7
+    elif 5 < whr_value <= 5.5:
+        return 6.5
+    elif 5.5 < whr_value <= 6.5:
+        return 6
+    elif 6.5 < whr_value <= 7.5:
+        return 5.5
+    elif 2.5 <= whr_value < 3:
+        return 5
+    elif 2 <= whr_value < 2.5:
+        return 4.5
+    elif 7.5 < whr_value <= 8.5:
+        return 4
+    elif 1.5 <= whr_value < 2:
+        return 3
+    elif 1 <= whr_value < 1.5:
+        return 2.5
+    elif 8.5 < whr_value <= 9:
+        return 2
+    elif 0 < whr_value < 1:
+        return 1
+    elif whr_value == 0 or whr_value > 9:
+        return 0
+    else:
+        # Fallback case for unexpected inputs
+        raise ValueError("Unexpected input. Ensure the time is within a valid range.")      
+    
+           
+How_far_from_me = {
+"Half an hour drive": 10,
+"1 drive hour": 8.5,
+"1.5-2 drive hours": 7,
+"2.5 drive hours": 6,
+"2.5-3 drive hours": 4,
+"3.5 drive hours": 3,
+"3.5-4 drive hours": 2,
+"More than 4 drive hours": 0
+}
+
+Required_eq = {
+"Only a small bag with 1.5 liter bottle. hat, casual clothing": 10,
+"Could be a small bag, but packed with 3 liter of water, and food, casual clothing": 8.5,
+"Could be casual clothing, but must have a professional day-trip bagpack, with a hydration pack, small botlle, food and first-aid kit": 7,
+"Hiking clothing required, with a good pack and trekking poles": 6.5,
+"Hiking clothing, a fully load day-trip backpack, with 6 liter of water, kooking kit, food, first-aid kit": 5.5,
+"Fully equipped for a daytrip, including trekking poles": 4,
+"A professional hiking clothing, fully loaded 60 liter professional bagpack": 2.5,
+}
+
+Weather = {
+"Clear, an average of 18-20C": 10,
+"Clear, an average of 22-25C": 9,
+"Cloudly with some rain and snow, 8-10C": 8.5,
+"Cloudly, but dry with 17-20C": 8,
+"Cloudly with light rain, 16-18C": 7.5,
+"Clear, 27-30C": 6,
+"Cloudly with heavy rain, 23-25C": 5,
+"Cloudly with heavy rain, lower then 15C": 3,
+"Clear, 35-40C": 1.5,
+"Lower than 8C or Higher than 40C": 0
+}
+
+Season = {
+    "Winter - Spring": 10,
+    "Winter": 8.5,
+    "Spring": 7,
+    "Autumn - Winter": 5.5,
+    "Autumn": 4,
+    "Spring - Summer": 3,
+    "Summer-Autumn": 2,
+    "Summer": 1
+       
+}
+
+Crowdness = {
+"Not crowded at all": 10,
+"Some hikers along the way, not really affecting the experience": 8.5,
+"Lots of hikers along the trail": 7,
+"Many families along the way, but there's still enough room for all": 6,
+"Not so many people along the way, but feels very crowded": 3,
+"Too many hikers, families and waste along the way, almost can't move": 0 
+}
+
+
+# ---------------------------------------------------------------------------------
+#  Batch scoring
+#  The same rubrics as the scalar functions above, applied to a whole DataFrame
+#  of raw trip attributes at once.
+# ---------------------------------------------------------------------------------
+WEIGHTS = {
+    "Area": 0.1,
+    "Accessibility": 0.05,
+    "Season": 0.03,
+    "Challenge": 0.08,
+    "Terrain": 0.075,
+    "View": 0.01,
+    "Shade": 0.075,
+    "Entry Fee": 0.025,
+    "Water": 0.05,
+    "Nearby Attractions": 0.05,
+    "Circular?": 0.05,
+    "Trail Length": 0.075,
+    "Incline": 0.02,
+    "Decline": 0.015,
+    "Incline Percentage": 0.015,
+    "Decline Percentage": 0.01,
+    "Walking Hours": 0.025,
+    "How Far?": 0.075,
+    "Required EQ": 0.075,
+    "Weather": 0.04,
+    "Crowdness": 0.05
+}
+
+# Stored next to every trip: the 0-10 score of each criterion and its weighted contribution
+COMPONENT_COLUMNS = {name: f"{name} Score" for name in WEIGHTS}
+CONTRIBUTION_COLUMNS = {name: f"{name} Weighted" for name in WEIGHTS}
+SCORE_COLUMNS = list(COMPONENT_COLUMNS.values()) + list(CONTRIBUTION_COLUMNS.values())
+
+# Score component -> (Trip_Collection.csv column, rubric dictionary)
+LABEL_COMPONENTS = {
+    "Area": ("Area", area_scores),
+    "Accessibility": ("Accessibility", Accessibility),
+    "Season": ("Season", Season),
+    "Challenge": ("Challenge", Challenge),
+    "Terrain": ("Terrain", Terrain),
+    "View": ("View", View),
+    "Shade": ("Shade", Shade),
+    "Entry Fee": ("Entry Fee", Entry_Fee),
+    "Water": ("Water", Water),
+    "Nearby Attractions": ("Nearby Attractions", Nearby_attractions),
+    "Circular?": ("Circular?", circular),
+    "How Far?": ("Distance", How_far_from_me),
+    "Required EQ": ("Required Equipment", Required_eq),
+    "Weather": ("Weather", Weather),
+    "Crowdness": ("Crowdness", Crowdness),
+}
+
+_INTEGER_TEXT = r"\s*[+-]?\d+\s*"
+_DURATION_TEXT = r"^\s*([+-]?\d+)\s*:\s*([+-]?\d+)\s*$"
+
+
+def _column(df, column):
+    if column in df.columns:
+        return df[column].reset_index(drop=True)
+    return pd.Series([np.nan] * len(df), dtype=object)
+
+
+def lookup_scores(labels, rubric):
+    """
+    Vectorised rubric.get(label, 0): the labels become categorical codes that
+    index an array of scores, unknown labels (code -1) land on a trailing 0.
+    """
+    codes = pd.Categorical(labels, categories=list(rubric.keys())).codes
+    table = np.append(np.array(list(rubric.values()), dtype=float), 0.0)
+    return table[codes]
+
+
+def _as_float(values):
+    # float(x) for every value, returns the numbers and a mask of what float() would reject
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    rejected = np.isnan(numbers) & (values.notna().to_numpy() | np.equal(values.to_numpy(dtype=object), None))
+    return numbers, rejected
+
+
+def _is_text(values):
+    # Only the str elements, an object column can mix text with numbers and None
+    if values.dtype != object:
+        return np.zeros(len(values), dtype=bool)
+    return np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+
+
+def _as_percentage(values):
+    # The percentage scorers compare the raw value, so text never scores
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    numbers[_is_text(values)] = np.nan
+    return numbers
+
+
+def _as_int(values):
+    # int(x) for every value: numbers are truncated, text has to be a whole number
+    numbers, rejected = _as_float(values)
+    is_text = _is_text(values)
+    if is_text.any():
+        whole = values.astype(str).str.fullmatch(_INTEGER_TEXT).to_numpy(dtype=bool)
+        rejected |= is_text & ~whole
+    rejected |= np.isnan(numbers)
+    return np.trunc(numbers), rejected
+
+
+def batch_trail_length_score(values):
+    x, rejected = _as_float(values)
+    conditions = [
+        (9 <= x) & (x <= 12),
+        (7 <= x) & (x < 9),
+        (12 < x) & (x <= 15),
+        (5 <= x) & (x < 7),
+        (3 <= x) & (x < 5),
+        (15 < x) & (x <= 20),
+        (20 < x) & (x <= 25),
+        (2 <= x) & (x < 3),
+        (1 <= x) & (x < 2),
+    ]
+    scores = np.select(conditions, [10, 9, 8, 7.5, 6, 5, 4, 2, 1], default=0.0)
+    scores[rejected | (x < 1) | (x > 25)] = np.nan
+    return scores
+
+
+def _elevation_ladder(x):
+    conditions = [
+        (550 <= x) & (x <= 750),
+        (450 <= x) & (x < 550),
+        (750 < x) & (x <= 850),
+        (350 <= x) & (x < 450),
+        (850 < x) & (x <= 1000),
+        (250 <= x) & (x < 350),
+        (150 <= x) & (x < 250),
+        (1000 < x) & (x <= 1200),
+        (1200 < x) & (x <= 2500),
+        (1 <= x) & (x < 150),
+    ]
+    return np.select(conditions, [10, 9, 8, 7.5, 6, 5, 4, 3, 2.5, 2], default=0.0)
+
+
+def batch_incline_score(values):
+    x, rejected = _as_int(values)
+    scores = _elevation_ladder(x)
+    scores[rejected | (x < 1) | (x > 2500)] = np.nan
+    return scores
+
+
+def batch_decline_score(values):
+    x, rejected = _as_int(values)
+    scores = _elevation_ladder(x)
+    scores[rejected | (x < -2500) | (x > 1)] = np.nan
+    return scores
+
+
+def batch_inc_precentage_score(values):
+    x = _as_percentage(values)
+    conditions = [
+        (40 < x) & (x <= 50),
+        (50 < x) & (x <= 60),
+        (60 < x) & (x <= 70),
+        (30 <= x) & (x <= 40),
+        (70 < x) & (x <= 80),
+        (80 < x) & (x <= 90),
+        (90 < x) & (x <= 100),
+        (20 <= x) & (x < 30),
+        (10 <= x) & (x < 20),
+        (0 <= x) & (x < 10),
+    ]
+    scores = np.select(conditions, [10, 9, 8, 7, 6, 5, 4, 3, 2, 1], default=np.nan)
+    # The scalar version rejects 0 and returns None outside every range
+    scores[x == 0] = np.nan
+    return scores
+
+
+def batch_dec_precentage_score(values):
+    x = _as_percentage(values)
+    conditions = [
+        (50 <= x) & (x < 60),
+        (40 <= x) & (x < 50),
+        (30 <= x) & (x < 40),
+        (60 <= x) & (x <= 70),
+        (20 <= x) & (x < 30),
+        (10 <= x) & (x < 20),
+        (0 <= x) & (x < 10),
+        (70 < x) & (x <= 80),
+        (80 < x) & (x < 90),
+        (90 < x) & (x <= 100),
+    ]
+    scores = np.select(conditions, [10, 9, 8, 7, 6, 5, 4, 3, 2, 1], default=np.nan)
+    scores[x == 0] = np.nan
+    return scores
+
+
+def duration_hours(values):
+    """
+    "hh:mm" strings to decimal hours, NaN where the format is invalid.
+    """
+    parts = values.astype(object).where(values.notna(), "").astype(str).str.extract(_DURATION_TEXT)
+    hours = parts[0].astype(float).to_numpy()
+    minutes = parts[1].astype(float).to_numpy()
+    return hours + minutes / 60
+
+
+def float_to_duration(value):
+    """
+    Decimal hours to "hh:mm", the format of the Walking Hours column.
+    """
+    hours = int(value)  # Extract the hours
+    minutes = round((value - hours) * 60)  # Calculate the minutes
+    return f"{hours:02d}:{minutes:02d}"  # Format as HH:MM
+
+
+def naismith_hours(distance_km, ascent_m, descent_m, pace_kph):
+    """
+    Walking time in hours with Naismith's rule, plus a fifth of the flat time for rests.
+    Takes numbers or whole NumPy arrays.
+    """
+    # Base walking time (time for distance only)
+    base_time = distance_km / pace_kph
+    avg_rest_time = base_time/5
+    # Elevation adjustment (1 hour for every 600 meters of ascent)
+    ascent_time = ascent_m / 600.0
+    descent_time = descent_m / 1800.0
+    # Total time
+    return base_time + ascent_time + descent_time + avg_rest_time
+
+
+def naismith_rule(distance_km, ascent_m, descent_m, pace_kph):
+    """
+    Walking time of a trail as "hh:mm", see naismith_hours.
+    """
+    return float_to_duration(naismith_hours(distance_km, ascent_m, descent_m, pace_kph))
+
+
+def batch_walkinghr_scores(values):
+    x = duration_hours(values)
+    conditions = [
+        (4.5 <= x) & (x <= 5),
+        (4 < x) & (x <= 4.5),
+        (3.5 <= x) & (x <= 4),
+        (3 <= x) & (x < 3.5),
+        (5 < x) & (x <= 5.5),
+        (5.5 < x) & (x <= 6.5),
+        (6.5 < x) & (x <= 7.5),
+        (2.5 <= x) & (x < 3),
+        (2 <= x) & (x < 2.5),
+        (7.5 < x) & (x <= 8.5),
+        (1.5 <= x) & (x < 2),
+        (1 <= x) & (x < 1.5),
+        (8.5 < x) & (x <= 9),
+        (0 < x) & (x < 1),
+        (x == 0) | (x > 9),
+    ]
+    return np.select(conditions, [10, 9, 8, 7, 6.5, 6, 5.5, 5, 4.5, 4, 3, 2.5, 2, 1, 0], default=np.nan)
+
+
+def batch_kmh_valid(values):
+    x, rejected = _as_float(values)
+    return ~rejected & (x > 0) & (x < 15)
+
+
+# Score component -> (Trip_Collection.csv column, batch scorer)
+NUMERIC_COMPONENTS = {
+    "Trail Length": ("Trail Length", batch_trail_length_score),
+    "Incline": ("Incline", batch_incline_score),
+    "Decline": ("Decline", batch_decline_score),
+    "Incline Percentage": ("Inc_Pre", batch_inc_precentage_score),
+    "Decline Percentage": ("Dec_Pre", batch_dec_precentage_score),
+    "Walking Hours": ("Walking Hours", batch_walkinghr_scores),
+}
+
+
+def component_scores(df):
+    """
+    The unweighted 0-10 score of every component for every trip, in WEIGHTS order.
+    Returns (components, valid): a DataFrame on df's index, and a boolean array
+    that is False where the KMH check would reject the trip.
+    """
+    scores = {}
+    for name, (column, rubric) in LABEL_COMPONENTS.items():
+        scores[name] = lookup_scores(_column(df, column), rubric)
+    for name, (column, scorer) in NUMERIC_COMPONENTS.items():
+        scores[name] = scorer(_column(df, column))
+    components = pd.DataFrame({name: scores[name] for name in WEIGHTS}, index=df.index)
+    return components, batch_kmh_valid(_column(df, "KMH"))
+
+
+def weighted_total(components, valid, weights=WEIGHTS):
+    """
+    Total Score from component scores. Summed in the same order as
+    sum(weighted_scores.values()), so the floats match the scalar path exactly.
+    """
+    total = np.zeros(len(components))
+    for name, weight in weights.items():
+        total = total + components[name].to_numpy() * weight
+    total[~valid] = np.nan
+    return pd.Series(total, index=components.index, name="Total Score")
+
+
+def score_columns(components, weights=WEIGHTS):
+    """
+    The SCORE_COLUMNS values for every trip: component scores, then score * weight.
+    """
+    columns = {COMPONENT_COLUMNS[name]: components[name] for name in weights}
+    columns.update({CONTRIBUTION_COLUMNS[name]: components[name] * weight for name, weight in weights.items()})
+    return pd.DataFrame(columns, index=components.index)
+
+
+def score_trips(df, weights=WEIGHTS):
+    """
+    Scores every trip of a DataFrame with the Trip_Collection.csv columns in one pass.
+    Returns a DataFrame (same index) with one float column per component, in
+    weights order, plus "Total Score" - the same numbers update_tab1 computes
+    one trip at a time. Wherever the scalar functions would raise, the
+    component and the Total Score are NaN.
+    """
+    components, valid = component_scores(df)
+    result = components[list(weights)].copy()
+    result["Total Score"] = weighted_total(components, valid, weights)
+    return result
+
+
+def rankings(total_scores):
+    """
+    Position of every trip when sorted by score, best first (ties share a place).
+    """
+    return pd.to_numeric(total_scores, errors="coerce").rank(ascending=False, method="min")
+
+
+def _changed(old, new):
+    return ~np.isclose(old, new, rtol=0, atol=1e-9, equal_nan=True)
+
+
+def _stored(df, column):
+    if column in df:
+        return pd.to_numeric(df[column], errors="coerce")
+    return pd.Series(np.nan, index=df.index)
+
+
+def rescore_frame(df, weights=WEIGHTS):
+    """
+    Recomputes the Total Score and the SCORE_COLUMNS of every stored trip with
+    the current rubrics and weights. Returns (rescored_df, summary).
+    Trips the rubrics can no longer score keep their old values and are
+    counted as "unscored" in the summary.
+    """
+    rescored = df.copy()
+    summary = {
+        "trips": len(df),
+        "scores_changed": 0,
+        "rankings_changed": 0,
+        "components_changed": 0,
+        "columns_added": len([column for column in SCORE_COLUMNS if column not in df]),
+        "unscored": 0,
+    }
+    if df.empty:
+        for column in SCORE_COLUMNS:
+            if column not in rescored:
+                rescored[column] = pd.Series(dtype=float)
+        return rescored, summary
+
+    components, valid = component_scores(df)
+    new_total = weighted_total(components, valid, weights)
+    unscored = new_total.isna()
+
+    # Scores that only moved by float noise keep their stored value, so an
+    # unchanged collection is written back byte for byte
+    old_total = _stored(df, "Total Score")
+    new_total = new_total.where(~unscored & _changed(old_total, new_total), old_total)
+    rescored["Total Score"] = new_total
+
+    components_changed = np.zeros(len(df), dtype=bool)
+    for column, values in score_columns(components, weights).items():
+        old_values = _stored(df, column)
+        changed = _changed(old_values, values)
+        rescored[column] = values.where(~unscored & changed, old_values)
+        components_changed |= ~unscored.to_numpy() & changed
+
+    summary.update(
+        scores_changed=int(_changed(old_total, new_total).sum()),
+        rankings_changed=int((rankings(old_total).fillna(0) != rankings(new_total).fillna(0)).sum()),
+        components_changed=int(components_changed.sum()),
+        unscored=int(unscored.sum()),
+    )
+    return rescored, summary
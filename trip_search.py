@@ -0,0 +1,229 @@
+import re
+import threading
+
+
+# ---------------------------------------------------------------------------------
+#  Inverted n-gram index for the global search box
+# ---------------------------------------------------------------------------------
+def _grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def cell_grams(cells):
+    """
+    Every 1, 2 and 3 character substring of the cells. Grams never span two
+    cells, so a match is always inside a single value, like str.contains per cell.
+    """
+    grams = set()
+    for cell in cells:
+        for n in (1, 2, 3):
+            grams |= _grams(cell, n)
+    return grams
+
+
+class SearchIndex:
+    """
+    Case-insensitive substring search over the given columns of the collection.
+    Each row's values are split into 1-3 character grams with posting lists of
+    row labels. Queries of up to 3 characters are one posting list lookup, longer
+    ones intersect the lists of their trigrams and only the remaining candidates
+    are checked. The index follows the dataset cache generation, and only rows
+    that were added, removed or changed since the last generation are re-indexed.
+    """
+
+    def __init__(self, cache, columns):
+        self.cache = cache
+        self.columns = columns
+        self._lock = threading.Lock()
+        self._generation = None
+        self._cells = {}
+        self._postings = {}
+
+    def _row_cells(self, df):
+        # Same text as row.astype(str) gave the old row by row search
+        columns = [c for c in self.columns if c in df.columns]
+        texts = [df[c].astype(str).str.lower().tolist() for c in columns]
+        return dict(zip(df.index.tolist(), zip(*texts))) if texts else {}
+
+    def _add(self, label, cells):
+        self._cells[label] = cells
+        for gram in cell_grams(cells):
+            self._postings.setdefault(gram, set()).add(label)
+
+    def _remove(self, label):
+        for gram in cell_grams(self._cells.pop(label)):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(label)
+                if not postings:
+                    del self._postings[gram]
+
+    def _sync(self):
+        snapshot = self.cache.snapshot()
+        if snapshot.generation == self._generation:
+            return
+        rows = self._row_cells(snapshot.df)
+        for label in [label for label in self._cells if rows.get(label) != self._cells[label]]:
+            self._remove(label)
+        for label, cells in rows.items():
+            if label not in self._cells:
+                self._add(label, cells)
+        self._generation = snapshot.generation
+
+    def search(self, query):
+        """
+        Set of row labels with query somewhere in one of their values.
+        """
+        query = query.lower()
+        with self._lock:
+            self._sync()
+            if not query:
+                return set(self._cells)
+            if len(query) <= 3:
+                return set(self._postings.get(query, ()))
+
+            postings = sorted((self._postings.get(gram, set()) for gram in _grams(query, 3)), key=len)
+            candidates = set(postings[0])
+            for other in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= other
+            return {label for label in candidates if any(query in cell for cell in self._cells[label])}
+
+
+# ---------------------------------------------------------------------------------
+#  Typo-tolerant ranked search over trip names and areas
+# ---------------------------------------------------------------------------------
+FUZZY_LIMIT = 10
+
+
+def _words(text):
+    return re.findall(r"\w+", str(text).lower())
+
+
+def _trigrams(word):
+    # Padded like pg_trgm, so short words and word starts get their own grams
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(word):
+    """
+    Typos allowed in a query word: none below 3 characters, 1 up to 5, then 2.
+    """
+    if len(word) < 3:
+        return 0
+    return 1 if len(word) < 6 else 2
+
+
+def edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance (a swap of two neighbouring letters is one edit).
+    Stops early and returns limit + 1 once the distance is certain to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1]),
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def word_score(query, word):
+    """
+    How well a query word matches a word of the collection, 0 when it doesn't.
+    A whole word scores higher than a word the query is only the start of.
+    """
+    if query == word:
+        return 1.0
+    limit = max_edits(query)
+    distance = edit_distance(query, word, limit)
+    if distance <= limit:
+        return 1.0 - distance / (len(query) + 1)
+    # The user may still be typing: compare against the start of the word
+    prefixes = [word[:n] for n in (len(query) - 1, len(query), len(query) + 1) if 0 < n < len(word)]
+    distance = min([edit_distance(query, prefix, limit) for prefix in prefixes] or [limit + 1])
+    if distance <= limit:
+        return 0.9 * (1.0 - distance / (len(query) + 1))
+    return 0.0
+
+
+class FuzzyIndex:
+    """
+    Ranked, typo-tolerant search over the words of the given columns (the trip
+    names and areas). Words are indexed by their trigrams, so a query word is
+    only compared with the words sharing a trigram with it. Every query word has
+    to match a word of the row, and rows are ranked by the average match.
+    The word lists are rebuilt when the dataset cache generation changes.
+    """
+
+    def __init__(self, cache, columns):
+        self.cache = cache
+        self.columns = columns
+        self._lock = threading.Lock()
+        self._generation = None
+        self._word_rows = {}
+        self._gram_words = {}
+
+    def _sync(self):
+        snapshot = self.cache.snapshot()
+        if snapshot.generation == self._generation:
+            return
+        word_rows = {}
+        for column in [c for c in self.columns if c in snapshot.df.columns]:
+            for label, value in zip(snapshot.df.index.tolist(), snapshot.df[column].tolist()):
+                if isinstance(value, str):
+                    for word in _words(value):
+                        word_rows.setdefault(word, set()).add(label)
+        gram_words = {}
+        for word in word_rows:
+            for gram in _trigrams(word):
+                gram_words.setdefault(gram, set()).add(word)
+        self._word_rows, self._gram_words = word_rows, gram_words
+        self._generation = snapshot.generation
+
+    def _word_matches(self, query):
+        # Candidates share at least one trigram with the query word
+        candidates = set()
+        for gram in _trigrams(query):
+            candidates |= self._gram_words.get(gram, set())
+        matches = {}
+        for word in candidates:
+            score = word_score(query, word)
+            if score > 0:
+                for label in self._word_rows[word]:
+                    matches[label] = max(matches.get(label, 0.0), score)
+        return matches
+
+    def search(self, query, limit=FUZZY_LIMIT, labels=None):
+        """
+        Row labels of the best matches, best first. labels limits the search to those rows.
+        """
+        words = _words(query)
+        if not words:
+            return []
+        with self._lock:
+            self._sync()
+            scores = None
+            for word in words:
+                matches = self._word_matches(word)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {label: scores[label] + score for label, score in matches.items() if label in scores}
+                if not scores:
+                    return []
+        if labels is not None:
+            scores = {label: score for label, score in scores.items() if label in labels}
+        return sorted(scores, key=lambda label: -scores[label])[:limit]
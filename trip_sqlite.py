@@ -0,0 +1,243 @@
+import argparse
+import math
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import pandas as pd
+
+from trip_geo import GEO_COLUMNS
+from trip_scoring import SCORE_COLUMNS
+import trip_storage
+from trip_storage import TRIP_COLUMNS, collection_lock
+from trip_storage import read_collection as read_csv_collection
+
+
+# ---------------------------------------------------------------------------------
+#  SQLite storage backend
+#  Same functions as trip_storage, so trip_collection.py can use either module.
+# ---------------------------------------------------------------------------------
+NUMERIC_COLUMNS = [
+    "Trail Length", "Incline", "Inc_Pre", "Incline Degree", "Decline", "Dec_Pre",
+    "Decline Degree", "KMH", "Total Score"
+] + SCORE_COLUMNS + GEO_COLUMNS
+
+INDEXED_COLUMNS = ["Trip", "Coordinates", "Area", "Season", "Trail Length", "Total Score"]
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _index_name(column):
+    return "idx_trips_" + "".join(c if c.isalnum() else "_" for c in column.lower())
+
+
+def _schema_statements(columns=TRIP_COLUMNS):
+    column_defs = ",\n    ".join(
+        f"{_quote(c)} {'NUMERIC' if c in NUMERIC_COLUMNS else 'TEXT'}" for c in columns
+    )
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS trips (\n    id INTEGER PRIMARY KEY,\n    {column_defs}\n)",
+        # Bumped by every write, it's what the dataset cache watches
+        "CREATE TABLE IF NOT EXISTS meta (version INTEGER NOT NULL)",
+        "INSERT INTO meta (version) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM meta)",
+    ]
+    for column in INDEXED_COLUMNS:
+        statements.append(f"CREATE INDEX IF NOT EXISTS {_index_name(column)} ON trips ({_quote(column)})")
+    return statements
+
+
+def _add_missing_columns(conn, columns=TRIP_COLUMNS):
+    # Databases created before a column was added to the schema get it appended (NULL for old rows)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(trips)")}
+    for column in columns:
+        if column not in existing:
+            conn.execute(
+                f"ALTER TABLE trips ADD COLUMN {_quote(column)} {'NUMERIC' if column in NUMERIC_COLUMNS else 'TEXT'}"
+            )
+
+
+def connect(path, create=True):
+    """
+    Opens the database. With create=True the table, indexes and version
+    counter are created if they don't exist yet.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    if create:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            for statement in _schema_statements():
+                conn.execute(statement)
+            _add_missing_columns(conn)
+    return conn
+
+
+def _clean(value):
+    # Empty form fields and NaN are stored as NULL, like an empty CSV cell
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def _bump_version(conn):
+    conn.execute("UPDATE meta SET version = version + 1")
+
+
+def _insert_rows(conn, rows, columns=TRIP_COLUMNS):
+    placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+    column_list = ", ".join(["id"] + [_quote(c) for c in columns])
+    conn.executemany(
+        f"INSERT INTO trips ({column_list}) VALUES ({placeholders})",
+        [[int(index)] + [_clean(v) for v in values] for index, values in rows],
+    )
+
+
+# ---------------------------------------------------------------------------------
+#  Backend interface (mirrors trip_storage)
+# ---------------------------------------------------------------------------------
+_signature_connections = threading.local()
+
+
+def _signature_connection(path, inode):
+    # One connection per thread and database for the signature checks, opened
+    # again only when the file was replaced (a new inode)
+    connections = getattr(_signature_connections, "by_path", None)
+    if connections is None:
+        connections = _signature_connections.by_path = {}
+    key = os.path.abspath(path)
+    cached = connections.get(key)
+    if cached is not None and cached[0] == inode:
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+    conn = connect(path, create=False)
+    connections[key] = (inode, conn)
+    return conn
+
+
+def collection_signature(path):
+    """
+    Returns (inode, version) of the database, or None if it doesn't exist.
+    The version row changes inside every write transaction, which the file
+    mtime doesn't reliably do in WAL mode. Every process reads the same
+    version, unlike PRAGMA data_version which is counted per connection.
+    """
+    try:
+        inode = os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+    conn = _signature_connection(path, inode)
+    try:
+        version = conn.execute("SELECT version FROM meta").fetchone()[0]
+    except sqlite3.OperationalError:
+        # Not initialised yet
+        version = None
+    return (inode, version)
+
+
+def next_index(df):
+    """
+    Row label (the id column) for the next inserted trip, same as the CSV backend.
+    """
+    return trip_storage.next_index(df)
+
+
+def read_collection(path):
+    """
+    Reads all trips into a DataFrame shaped like pd.read_csv(csv_file_path, index_col=0).
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    with closing(connect(path)) as conn:
+        df = pd.read_sql_query("SELECT * FROM trips ORDER BY id", conn, index_col="id")
+    df.index.name = None
+    return df
+
+
+def write_collection(path, df):
+    """
+    Replaces every trip in one transaction.
+    """
+    columns = [c for c in TRIP_COLUMNS if c in df.columns]
+    rows = zip(df.index, df[columns].to_numpy(dtype=object).tolist())
+    with collection_lock(path), closing(connect(path)) as conn:
+        with conn:
+            conn.execute("DELETE FROM trips")
+            _insert_rows(conn, rows, columns)
+            _bump_version(conn)
+
+
+def append_trip(path, values, index, columns=TRIP_COLUMNS):
+    """
+    Inserts a single trip and returns it as a one-row DataFrame.
+    The duplicate name check runs again inside the transaction, against the Trip index.
+    """
+    if len(values) != len(columns):
+        raise ValueError(f"Expected {len(columns)} values for a trip, got {len(values)}.")
+    with collection_lock(path), closing(connect(path)) as conn:
+        with conn:
+            if trip_exists(conn, values[columns.index("Trip")]):
+                raise ValueError("This trip is already in the data!")
+            _insert_rows(conn, [(index, values)], columns)
+            _bump_version(conn)
+        row = pd.read_sql_query("SELECT * FROM trips WHERE id = ?", conn, params=(int(index),), index_col="id")
+    row.index.name = None
+    return row
+
+
+def remove_trip(path, df, trip):
+    """
+    Deletes the trip by its indexed name and returns the remaining rows of df.
+    """
+    with collection_lock(path), closing(connect(path)) as conn:
+        with conn:
+            conn.execute(f"DELETE FROM trips WHERE {_quote('Trip')} = ?", (trip,))
+            _bump_version(conn)
+    return df[df["Trip"] != trip]
+
+
+def clear_collection(path, columns=TRIP_COLUMNS):
+    """
+    Drops every trip, the table and its indexes stay in place.
+    """
+    with collection_lock(path), closing(connect(path)) as conn:
+        with conn:
+            conn.execute("DELETE FROM trips")
+            _bump_version(conn)
+    return pd.DataFrame(columns=columns)
+
+
+# ---------------------------------------------------------------------------------
+#  Indexed lookups
+# ---------------------------------------------------------------------------------
+def trip_exists(conn, trip):
+    row = conn.execute(f"SELECT 1 FROM trips WHERE {_quote('Trip')} = ? LIMIT 1", (trip,)).fetchone()
+    return row is not None
+
+
+# ---------------------------------------------------------------------------------
+#  One-shot importer from Trip_Collection.csv
+# ---------------------------------------------------------------------------------
+def import_csv(csv_path, db_path):
+    """
+    Copies every trip from the CSV into the database, replacing what's there.
+    Returns the number of imported trips.
+    """
+    df = read_csv_collection(csv_path)
+    write_collection(db_path, df)
+    return len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import Trip_Collection.csv into the SQLite backend.")
+    parser.add_argument("csv_path", nargs="?", default="Trip_Collection.csv")
+    parser.add_argument("db_path", nargs="?", default="Trip_Collection.db")
+    args = parser.parse_args()
+    count = import_csv(args.csv_path, args.db_path)
+    print(f"Imported {count} trips from {args.csv_path} into {args.db_path}")
@@ -0,0 +1,246 @@
+import io
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from trip_geo import GEO_COLUMNS
+from trip_scoring import SCORE_COLUMNS
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks on Windows, writes there are still atomic renames
+    fcntl = None
+
+
+# ---------------------------------------------------------------------------------
+#  Trip_Collection.csv schema
+# ---------------------------------------------------------------------------------
+# Entered through the Trips Calculation form
+FORM_COLUMNS = [
+    "Trip", "Coordinates", "Trail Link", "Area", "Accessibility", "Season", "Challenge",
+    "Terrain", "View", "Shade", "Water", "Circular?", "Trail Length", "Incline", "Inc_Pre",
+    "Incline Degree", "Decline", "Dec_Pre", "Decline Degree", "KMH", "Walking Hours", "Required Equipment",
+    "Weather", "Crowdness", "Nearby Attractions", "Entry Fee", "Distance", "Total Score"
+]
+
+# Followed by the per-criterion scores and weighted contributions,
+# and the Coordinates parsed into numbers
+TRIP_COLUMNS = FORM_COLUMNS + SCORE_COLUMNS + GEO_COLUMNS
+
+# Categorical columns offered in the Trips Filtering tab
+FILTER_COLUMNS = FORM_COLUMNS[3:11] + FORM_COLUMNS[21:-1]
+
+
+def read_header(path):
+    """
+    Returns (columns, line_terminator) of the CSV header, or (None, None)
+    if the file is missing or empty. The leading index column is dropped.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None, None
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        first_line = f.readline()
+    terminator = "\r\n" if first_line.endswith("\r\n") else "\n"
+    columns = pd.read_csv(io.StringIO(first_line), index_col=0, nrows=0).columns.tolist()
+    if not columns:
+        # A cleared collection is written as a bare index header
+        return None, None
+    return columns, terminator
+
+
+def check_schema(path, columns=TRIP_COLUMNS):
+    """
+    Raises a ValueError when the header on disk doesn't match the expected
+    column order, so a new row can never be appended under the wrong columns.
+    """
+    header, _ = read_header(path)
+    if header is not None and header != list(columns):
+        missing = [c for c in columns if c not in header]
+        extra = [c for c in header if c not in columns]
+        if not extra and all(c in SCORE_COLUMNS + GEO_COLUMNS for c in missing):
+            # Saved before these columns existed
+            raise ValueError(
+                f"The collection file is missing {len(missing)} score or lat / lon columns, add them "
+                f"once with: python trip_rescore.py. Nothing was saved."
+            )
+        raise ValueError(
+            f"The collection file doesn't match the expected columns "
+            f"(missing: {missing}, unexpected: {extra}). Nothing was saved."
+        )
+    return header is not None
+
+
+# ---------------------------------------------------------------------------------
+#  Locking & atomic writes
+# ---------------------------------------------------------------------------------
+_held_locks = threading.local()
+
+
+@contextmanager
+def collection_lock(path, exclusive=True):
+    """
+    Advisory fcntl lock shared by every process (gunicorn worker) using the collection.
+    It is taken on a "<path>.lock" side file, since the CSV itself gets replaced
+    by os.replace. Re-entrant within a thread, so a writer holding the lock can
+    call the other locked helpers.
+    """
+    held = getattr(_held_locks, "paths", None)
+    if held is None:
+        held = _held_locks.paths = {}
+    key = os.path.abspath(path)
+
+    if key in held:
+        if exclusive and not held[key]:
+            raise RuntimeError("Can't upgrade a shared collection lock to an exclusive one.")
+        yield
+        return
+
+    lock_file = open(path + ".lock", "a") if fcntl is not None else None
+    try:
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        held[key] = exclusive
+        yield
+    finally:
+        held.pop(key, None)
+        if lock_file is not None:
+            # Closing the file releases the flock
+            lock_file.close()
+
+
+def collection_signature(path):
+    """
+    Returns (mtime_ns, size, inode) for the given path, or None if it doesn't exist.
+    Any change to one of these means the file has to be read again.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def read_collection(path):
+    """
+    Reads the collection under a shared lock, so a reader never sees a half-appended row.
+    Returns an empty DataFrame when the file is missing or empty.
+    """
+    with collection_lock(path, exclusive=False):
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            return pd.read_csv(path, index_col=0)
+    return pd.DataFrame()
+
+
+def _fsync_directory(directory):
+    # Makes the rename itself durable, not supported on Windows
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_collection(path, df):
+    """
+    Replaces the whole collection: the frame is written to a temp file next to
+    the CSV, fsynced and renamed over it with os.replace, all under the exclusive lock.
+    Readers only ever see the old file or the new one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    with collection_lock(path):
+        fd, tmp_path = tempfile.mkstemp(prefix=".trip_collection-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                df.to_csv(f, index=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        _fsync_directory(directory)
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+# ---------------------------------------------------------------------------------
+#  Append-only write path
+# ---------------------------------------------------------------------------------
+def next_index(df):
+    """
+    Row label for the next appended trip.
+    """
+    if df.empty:
+        return 0
+    return int(df.index.max()) + 1
+
+
+def append_trip(path, values, index, columns=TRIP_COLUMNS):
+    """
+    Appends a single trip to the CSV without touching the existing rows.
+    The trip name is checked again under the lock, a duplicate raises a ValueError.
+    values: list in the same order as columns.
+    index: the row label to write in the index column.
+    Returns the appended row parsed back into a one-row DataFrame, exactly as
+    a full pd.read_csv(path, index_col=0) would see it.
+    """
+    if len(values) != len(columns):
+        raise ValueError(f"Expected {len(columns)} values for a trip, got {len(values)}.")
+
+    with collection_lock(path):
+        has_header = check_schema(path, columns)
+        if has_header and "Trip" in columns:
+            # The caller checked a cached snapshot, another worker may have saved the same trip since
+            stored = pd.read_csv(path, usecols=["Trip"])["Trip"]
+            if values[columns.index("Trip")] in stored.values:
+                raise ValueError("This trip is already in the data!")
+        row = pd.DataFrame([values], columns=columns, index=[index])
+
+        if has_header:
+            header_line = pd.DataFrame(columns=columns).to_csv(index=True)
+            _, terminator = read_header(path)
+            row_text = row.to_csv(header=False, index=True, lineterminator=terminator)
+            prefix = "" if _ends_with_newline(path) else terminator
+            with open(path, "a", encoding="utf-8", newline="") as f:
+                f.write(prefix + row_text)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            header_line = ""
+            row_text = row.to_csv(header=True, index=True)
+            write_collection(path, row)
+
+    return pd.read_csv(io.StringIO(header_line + row_text), index_col=0)
+
+
+def remove_trip(path, df, trip):
+    """
+    Rewrites the collection without the given trip and returns the remaining rows.
+    df is the current snapshot, taken under the exclusive lock.
+    """
+    df_remaining = df[df["Trip"] != trip]
+    write_collection(path, df_remaining)
+    return df_remaining
+
+
+def clear_collection(path, columns=TRIP_COLUMNS):
+    """
+    Drops every trip but keeps the header, so the append path still finds the expected columns.
+    """
+    df_cleared = pd.DataFrame(columns=columns)
+    write_collection(path, df_cleared)
+    return df_cleared
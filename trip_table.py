@@ -0,0 +1,113 @@
+import math
+import re
+
+import pandas as pd
+
+
+# ---------------------------------------------------------------------------------
+#  Server-side paging, sorting and filtering for DataTables
+#  (page_action / sort_action / filter_action = 'custom')
+# ---------------------------------------------------------------------------------
+PAGE_SIZE = 15
+
+# DataTable filter operators by their symbol, the names are used as they are
+FILTER_OPERATORS = {"=": "eq", "!=": "ne", "<": "lt", "<=": "le", ">": "gt", ">=": "ge"}
+FILTER_NAMES = {"eq", "ne", "lt", "le", "gt", "ge", "contains", "datestartswith"}
+
+_FILTER_PART = re.compile(r"^\s*\{(?P<column>[^}]+)\}\s*(?P<operator>\S+)\s*(?P<value>.*?)\s*$")
+
+
+def _filter_value(text, numeric=True):
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'`":
+        return text[1:-1].replace("\\" + text[0], text[0])
+    if not numeric:
+        return text
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_filter_query(filter_query):
+    """
+    Splits the DataTable filter_query ("{Area} = North && {Total Score} > 7")
+    into (column, operator name, value) parts. Parts that can't be read are skipped.
+    """
+    parts = []
+    for part in (filter_query or "").split(" && "):
+        match = _FILTER_PART.match(part)
+        if not match:
+            continue
+        operator = match.group("operator").lower()
+        # Case-sensitive ("s=") and insensitive ("icontains") variants filter the same way here
+        if operator not in FILTER_OPERATORS and operator not in FILTER_NAMES and operator[:1] in ("s", "i"):
+            operator = operator[1:]
+        operator = FILTER_OPERATORS.get(operator, operator)
+        if operator in FILTER_NAMES:
+            numeric = operator not in ("contains", "datestartswith")
+            parts.append((match.group("column"), operator, _filter_value(match.group("value"), numeric)))
+    return parts
+
+
+def filter_frame(df, filter_query):
+    """
+    Rows of df matching every part of the filter_query.
+    """
+    mask = pd.Series(True, index=df.index)
+    for column, operator, value in parse_filter_query(filter_query):
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if operator in ("contains", "datestartswith"):
+            text = series.astype(str)
+            if operator == "contains":
+                mask &= text.str.contains(value, case=False, regex=False)
+            else:
+                mask &= text.str.startswith(value)
+        elif isinstance(value, float):
+            numbers = pd.to_numeric(series, errors="coerce")
+            mask &= getattr(numbers, operator)(value)
+        elif operator in ("eq", "ne"):
+            equal = series.astype(str).str.lower() == value.lower()
+            mask &= equal if operator == "eq" else ~equal
+        else:
+            mask &= getattr(series.astype(str), operator)(value)
+    return df[mask]
+
+
+def sort_frame(df, sort_by, default=None):
+    """
+    Sorts by the DataTable sort_by list, or by default ([{"column_id", "direction"}])
+    when the user hasn't picked a column. The sort is stable, so rows with equal
+    values keep the collection order.
+    """
+    sort_by = [s for s in (sort_by or default or []) if s.get("column_id") in df.columns]
+    if not sort_by:
+        return df
+    return df.sort_values(
+        by=[s["column_id"] for s in sort_by],
+        ascending=[s.get("direction") == "asc" for s in sort_by],
+        kind="mergesort",
+    )
+
+
+def table_page(df, page_current, page_size=PAGE_SIZE):
+    """
+    Returns (rows of the requested page, page_count, clamped page_current).
+    """
+    page_size = page_size or PAGE_SIZE
+    page_count = max(1, math.ceil(len(df) / page_size))
+    page_current = min(max(page_current or 0, 0), page_count - 1)
+    start = page_current * page_size
+    return df.iloc[start:start + page_size], page_count, page_current
+
+
+def table_records(df, columns):
+    """
+    DataTable rows with the row label as the "id" key, so selected_row_ids
+    stay the same trips across pages, sorts and reloads.
+    """
+    records = df[columns].to_dict("records")
+    for trip_id, record in zip(df.index.tolist(), records):
+        record["id"] = trip_id
+    return records
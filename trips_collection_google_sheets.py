@@ -1,7 +1,7 @@
 import os
 import re
+import time
 import math
-import ast
 import numpy as np
 import pandas as pd
 import seaborn as sns
@@ -21,13 +21,19 @@ from dash.dash_table import DataTable
 import dash.exceptions as dash_exceptions
 
 from pathlib import Path
-from dash import dcc, html, Input, Output, State
+from dash import dcc, html, ClientsideFunction, Input, Output, State
 from dash.exceptions import PreventUpdate
 
 # Google API imports
 from googleapiclient.discovery import build
 from google.oauth2.service_account import Credentials
 
+from trip_bitmaps import BitmapIndex, filters_from_pairs
+from trip_cache import DatasetCache
+from trip_geo import CLUSTER_RADIUS, TripFeatures, feature_collection
+from trip_scoring import WEIGHTS, float_to_duration, naismith_rule
+from trip_search import FUZZY_LIMIT, FuzzyIndex
+
 # ---------------------------------------------------------------------------------
 #  Google Sheets Setup
 # ---------------------------------------------------------------------------------
@@ -74,6 +80,7 @@ def append_row_to_gsheet(row_data, headers):
         body={'values': [row_data]}
     )
     request.execute()
+    sheet_cache.invalidate()
 
 def clear_gsheet_except_headers():
     """
@@ -81,8 +88,9 @@ def clear_gsheet_except_headers():
     only the header row will remain.
     """
     # Get the last row and column
-    last_row = df_global.shape[0]  # Total number of rows
-    last_col = df_global.shape[1]  # Total number of columns
+    df_current = sheet_cache.get()
+    last_row = df_current.shape[0]  # Total number of rows
+    last_col = df_current.shape[1]  # Total number of columns
 
     # Convert column index to Excel-style column letters
     from string import ascii_uppercase
@@ -115,6 +123,7 @@ def clear_gsheet_except_headers():
             valueInputOption='RAW',
             body={'values': [headers]}
         ).execute()
+    sheet_cache.invalidate()
 
 def remove_trip_from_gsheet(trip_name):
     """
@@ -153,6 +162,7 @@ def remove_trip_from_gsheet(trip_name):
             spreadsheetId=SPREADSHEET_ID,
             body=body
         ).execute()
+        sheet_cache.invalidate()
 
         return True
     except Exception as e:
@@ -185,6 +195,7 @@ def update_row(spreadsheet_id, row_number, values_ek, values_tab):
             print(f"Successfully updated range: {range_name}")
         except Exception as e:
             print(f"Error updating range {range_name}: {e}")
+    sheet_cache.invalidate()
 
 
 
@@ -200,44 +211,48 @@ def safe_float_conversion(value):
 def weighted_scores (scr_area,scr_access,scr_season,scr_challenge,scr_terrain,scr_view,
                scr_shade,scr_entry,scr_water,scr_nearby,scr_circular,scr_length,scr_incline,scr_decline,scr_incline_pre,
                scr_decline_pre,scr_walking,scr_how_far,scr_required_eq,scr_weather,scr_crowdness):
-    score_val = {
-        "Area": (scr_area * 0.1),
-        "Accessibility": (scr_access * 0.05),
-        "Season": (scr_season * 0.03),
-        "Challenge": (scr_challenge * 0.08),
-        "Terrain": (scr_terrain * 0.075),
-        "View": (scr_view * 0.01),
-        "Shade": (scr_shade * 0.075),
-        "Entry Fee": (scr_entry * 0.025),
-        "Water": (scr_water * 0.05),
-        "Nearby Attractions": (scr_nearby * 0.05),
-        "Circular?": (scr_circular * 0.05),
-        "Trail Length": (scr_length * 0.075),
-        "Incline": (scr_incline * 0.02),
-        "Decline": (scr_decline * 0.015),
-        "Incline Percentage": (scr_incline_pre * 0.015),
-        "Decline Percentage": (scr_decline_pre * 0.01),
-        "Walking Hours": (scr_walking * 0.025),
-        "How Far?": (scr_how_far * 0.075),
-        "Required EQ": (scr_required_eq * 0.075),
-        "Weather": (scr_weather * 0.04),
-        "Crowdness": (scr_crowdness * 0.05),
-    }
+    # Same weights as the CSV app, kept in trip_scoring.WEIGHTS (argument order = WEIGHTS order)
+    scores = [scr_area, scr_access, scr_season, scr_challenge, scr_terrain, scr_view,
+              scr_shade, scr_entry, scr_water, scr_nearby, scr_circular, scr_length, scr_incline, scr_decline,
+              scr_incline_pre, scr_decline_pre, scr_walking, scr_how_far, scr_required_eq, scr_weather, scr_crowdness]
+    score_val = {name: score * weight for score, (name, weight) in zip(scores, WEIGHTS.items())}
     return sum (score_val.values())
 
-global df_global
-global df_copy
-global df_copy2
 # ---------------------------------------------------------------------------------
-#  Global DataFrame loaded from GSheets
+#  Shared copy of the sheet
+#  The Sheets API has no cheap "modified" marker, so the sheet is read again at
+#  most every SHEET_CACHE_SECONDS, or right after one of the write helpers above.
 # ---------------------------------------------------------------------------------
-df_global = load_data_from_gsheet()
-df_copy = df_global.copy()
+SHEET_CACHE_SECONDS = 30
+
+
+def sheet_signature(_):
+    return int(time.time() // SHEET_CACHE_SECONDS)
+
+
+sheet_cache = DatasetCache(SPREADSHEET_ID, reader=lambda _: load_data_from_gsheet(), signature=sheet_signature)
+
+# Typo-tolerant search over trip names and areas, for the editor's trips dropdown
+trip_names_index = FuzzyIndex(sheet_cache, ["Trip", "Area"])
+
+# Bitsets per filter value, for the compound filters of the Trips Filtering tab
+filter_bitmaps = BitmapIndex(sheet_cache)
+
+# GeoJSON features of the located trips (Coordinates parsed in one vectorised pass), per sheet read
+trip_features = TripFeatures(sheet_cache)
+
+
+def map_markers(df):
+    """
+    Data of the clustered map layer for the trips in df.
+    """
+    return feature_collection(trip_features.select(df.index).values())
 
 # ---------------------------------------------------------------------------------
 #  Dash App Initialization
 # ---------------------------------------------------------------------------------
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# Tab contents are rendered on demand, so callbacks may reference components that aren't on the page yet
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
 app.title = "The Trip Collection"
 
 # ---------------------------------------------------------------------------------
@@ -296,27 +311,10 @@ def link_validity(link, df):
         raise ValueError("Please insert a valid link to israelhiking.osm.org.il!")
     return link
 
-def float_to_duration(value):
-    hours = int(value)  
-    minutes = round((value - hours) * 60)
-    return f"{hours:02d}:{minutes:02d}"
-
 def duration_to_int(duration):
     hours, minutes = map(int, duration.split(":"))
     return hours + minutes / 60
 
-def naismith_rule(distance_km, ascent_m, descent_m, pace_kph):
-    # Base walking time (time for distance only)
-    base_time = distance_km / pace_kph
-    avg_rest_time = base_time / 5
-    # Elevation adjustment (1 hour for every 600 meters ascent)
-    ascent_time = ascent_m / 600.0
-    # Elevation adjustment for descent
-    descent_time = descent_m / 1800.0
-    total_time = base_time + ascent_time + descent_time + avg_rest_time
-    hr = float_to_duration(total_time)
-    return hr
-
 def is_decimal_number(input_value):
     return isinstance(input_value, float) and not isinstance(input_value, (str, bool))
 
@@ -995,7 +993,7 @@ output_style = {
 def tab1_layout():
 
     # If CSV exists and has data, read it to get initial min/max for the RangeSliders
-    df=df_global.copy()
+    df=sheet_cache.get().copy()
     # Ensure "Trail Length" column is numeric
     df["Trail Length"] = pd.to_numeric(df["Trail Length"], errors="coerce")
 
@@ -1003,20 +1001,7 @@ def tab1_layout():
     df = df.dropna(subset=["Trail Length"])
     if not df.empty:
         # Create markers
-        markers_israel = []
-        for i, (coord, name) in enumerate(zip(df['Coordinates'], df['Trip'])):
-            try:
-                position = ast.literal_eval(coord)
-                if isinstance(position, (list, tuple)) and len(position) == 2:
-                    markers_israel.append(
-                        dl.Marker(
-                            position=position,
-                            children=[dl.Popup(name)],
-                            id="israel-mark-" + str(i)
-                        )
-                    )
-            except (SyntaxError, ValueError):
-                pass
+        markers_israel = map_markers(df)
     else:
         return "No DF Available"
 
@@ -1110,10 +1095,15 @@ def tab1_layout():
                                     dl.Map(
                                         [
                                             dl.TileLayer(),
-                                            dl.LayerGroup(
+                                            # One clustered layer for every trip, the popup is filled in on click
+                                            dl.GeoJSON(
                                                 id="Israel-map-layer",
-                                                children=markers_israel
-                                            )
+                                                data=markers_israel,
+                                                cluster=True,
+                                                zoomToBoundsOnClick=True,
+                                                superClusterOptions={"radius": CLUSTER_RADIUS},
+                                            ),
+                                            dl.LayerGroup(id="trip-map-popup"),
                                         ],
                                         center=(32.2243079, 35.2682359),
                                         zoom=8,
@@ -1264,7 +1254,7 @@ def tab1_layout():
 # --------------- Callback --------------- #
 @app.callback(
     [
-        Output("Israel-map-layer", "children"),
+        Output("Israel-map-layer", "data"),
         Output("highest_score", "children"),
         Output("mcv", "children"),
         Output("mcd", "children"),
@@ -1303,7 +1293,7 @@ def tab1_layout():
 )
 def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks, trips_list_value):
     ctx = dash.callback_context
-    df = df_copy.copy()
+    df = sheet_cache.get().copy()
 
     # Ensure "Trail Length" is numeric
     df["Trail Length"] = pd.to_numeric(df["Trail Length"], errors="coerce")
@@ -1319,7 +1309,7 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
     df = df.dropna(subset=["Total Score", "Incline Degree", "Decline Degree"])
 
     # Prepare default (fallback) returns for an empty df
-    markers_israel = []
+    markers_israel = feature_collection([])
     link_trail_src = dash.no_update
     trip_details_div = dash.no_update
 
@@ -1349,7 +1339,7 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
 
         if df.empty:
             return (
-                [],  # Israel-map-layer
+                feature_collection([]),  # Israel-map-layer
                 "",  # highest_score
                 "",  # mcv
                 "",  # mcd
@@ -1422,7 +1412,7 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
     # If after filtering there's nothing, handle gracefully
     if filtered_df.empty:
         return (
-            [],             # Israel-map-layer
+            feature_collection([]),             # Israel-map-layer
             "N/A",          # highest_score
             "N/A",          # mcv
             "N/A",          # mcd
@@ -1446,20 +1436,7 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
         )
 
     # Build markers for the map
-    markers_israel = []
-    for i, (coord, name) in enumerate(zip(filtered_df['Coordinates'], filtered_df['Trip'])):
-        try:
-            position = ast.literal_eval(coord)
-            if isinstance(position, (list, tuple)) and len(position) == 2:
-                markers_israel.append(
-                    dl.Marker(
-                        position=position,
-                        children=[dl.Popup(name)],
-                        id="israel-mark-" + str(i)
-                    )
-                )
-        except (SyntaxError, ValueError):
-            pass
+    markers_israel = map_markers(filtered_df)
 
     # Recompute card info for the filtered DF
     highest_score = filtered_df["Total Score"].max()
@@ -1687,7 +1664,7 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
         df = df.dropna(subset=["Total Score", "Incline Degree", "Decline Degree"])
         if df.empty:
             return (
-                [],                     # Israel-map-layer (no markers)
+                feature_collection([]),                     # Israel-map-layer (no markers)
                 "",                     # highest_score
                 "",                     # mcv
                 "",                     # mcd
@@ -1737,7 +1714,7 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
 
         if filtered_df.empty:
             return (
-                [],                    # Israel-map-layer
+                feature_collection([]),                    # Israel-map-layer
                 "N/A",                # highest_score
                 "N/A",                # mcv
                 "N/A",                # mcd
@@ -1760,20 +1737,7 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
                 html.Div("No Trips match the selected filters", style={"color": "white"}),
             )
 
-        markers_israel = []
-        for i, (coord, name) in enumerate(zip(filtered_df['Coordinates'], filtered_df['Trip'])):
-            try:
-                position = ast.literal_eval(coord)  # parse "[lat, lon]" string
-                if isinstance(position, (list, tuple)) and len(position) == 2:
-                    markers_israel.append(
-                        dl.Marker(
-                            position=position,
-                            children=[dl.Popup(name)],
-                            id="israel-mark-" + str(i)
-                        )
-                    )
-            except (SyntaxError, ValueError):
-                pass
+        markers_israel = map_markers(filtered_df)
 
         highest_score = filtered_df["Total Score"].max()
         trip_hs = filtered_df.loc[filtered_df["Total Score"] == highest_score, 'Trip'].iloc[0]
@@ -1893,7 +1857,7 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
 
         if df.empty:
             return (
-                [],                     # Israel-map-layer
+                feature_collection([]),                     # Israel-map-layer
                 "",                     # highest_score
                 "",                     # mcv
                 "",                     # mcd
@@ -1953,20 +1917,7 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
                 html.Div("No Trips match the selected filters", style={"color": "white"}),
             )
 
-        markers_israel = []
-        for i, (coord, name) in enumerate(zip(filtered_df['Coordinates'], filtered_df['Trip'])):
-            try:
-                position = ast.literal_eval(coord)
-                if isinstance(position, (list, tuple)) and len(position) == 2:
-                    markers_israel.append(
-                        dl.Marker(
-                            position=position,
-                            children=[dl.Popup(name)],
-                            id="israel-mark-" + str(i)
-                        )
-                    )
-            except:
-                pass
+        markers_israel = map_markers(filtered_df)
 
         highest_score = filtered_df["Total Score"].max()
         trip_hs = filtered_df.loc[filtered_df["Total Score"] == highest_score, 'Trip'].iloc[0]
@@ -2122,9 +2073,40 @@ def update_tab1(length_value, score_value, n_clicks,update_clicks,reset_clicks,
         )
 
 
+@app.callback(
+    Output("trip-map-popup", "children"),
+    Input("Israel-map-layer", "clickData"),
+    prevent_initial_call=True
+)
+def trip_popup(feature):
+    """
+    Popup of a clicked trip, only built when it's clicked. A click on a cluster just zooms in.
+    """
+    if not feature or feature.get("properties", {}).get("cluster"):
+        raise PreventUpdate
+    df = sheet_cache.get()
+    label = feature["properties"].get("id")
+    if label not in df.index:
+        return []
+    trip = df.loc[label]
+    longitude, latitude = feature["geometry"]["coordinates"]
+    return [
+        dl.Popup(
+            position=[latitude, longitude],
+            children=[
+                html.B(trip.get("Trip", "")),
+                html.Div(f"{trip.get('Area', '')}"),
+                html.Div(f"{trip.get('Trail Length', '')} KM, {trip.get('Walking Hours', '')} Hours"),
+                html.Div(f"Total Score: {trip.get('Total Score', '')}"),
+                html.A("Trail Map", href=trip.get("Trail Link", ""), target="_blank"),
+            ],
+        )
+    ]
+
+
 
 def tab2_layout():
-    df1=df_global.copy()
+    df1=sheet_cache.get().copy()
     trip_options = df1["Trip"].unique().tolist() if not df1.empty else []
     trip_count = df1["Trip"].nunique() if not df1.empty else 0
 
@@ -2220,7 +2202,7 @@ def tab2_layout():
                                     dcc.Dropdown(
                                         id='trips_list',
                                         options=trip_options,
-                                        value=df_global['Trip'].iloc[0],
+                                        value=df1['Trip'].iloc[0],
                                         className="form-control"
                                     ),
                                     dbc.Button("Remove", id='remove_btn', color='success', n_clicks=0, style=button_style3),
@@ -2556,7 +2538,7 @@ def update_tab2(
     walkinghr_value = dash.no_update
 
     # Reload from GSheets to keep data fresh
-    df = df_global.copy()
+    df = sheet_cache.get().copy()
 
     # Update the trips dropdown
     if not df.empty and "Trip" in df.columns:
@@ -3220,7 +3202,7 @@ def update_tab2(
 
 def tab3_layout():
     # Load data from Google Sheets:
-    df = df_copy.copy()
+    df = sheet_cache.get().copy()
 
     # Check if empty or missing basic columns
     if df.empty or "Trip" not in df.columns:
@@ -3311,6 +3293,8 @@ def tab3_layout():
                                             {'name': 'Sub Filters', 'id': 'Sub Filters'}
                                         ],
                                         data=[],     # Will be set dynamically
+                                        # Sub filters of the same filter are alternatives, a row can be removed
+                                        row_deletable=True,
                                         style_table={
                                             'maxHeight': '200px',
                                             'maxWidth': '800px',
@@ -3498,29 +3482,35 @@ def tab3_layout():
     [
         Input('columns', 'value'),
         Input('reset_filters', 'n_clicks'),
-
+        Input('selected_filters', 'data'),
     ]
 )
-def update_sub_filter_options(selected_column, reset_clicks):
+def update_sub_filter_options(selected_column, reset_clicks, selected_filters):
 
     ctx = dash.callback_context
     triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
 
-    # Load from GSheets
-    df = load_data_from_gsheet()
+    # Load from the shared copy of the sheet
+    df = sheet_cache.get()
 
     if df.empty or selected_column not in df.columns or selected_column is None:
+        if triggered_id == 'selected_filters':
+            raise PreventUpdate
         return [], "",""
 
-    # Build sub-options for the chosen column
-    unique_vals = df[selected_column].dropna().unique().tolist()
-    sub_options = [{'label': str(v), 'value': v} for v in unique_vals]
-    
-
     # If triggered by reset_filters => reset to 'Area' (example) or any logic you choose
     if triggered_id == 'reset_filters':
         return [], "", ""
 
+    # Build sub-options for the chosen column, with the number of trips each value
+    # leaves when combined with the filters already in the list
+    _, facets = filter_bitmaps.select(filters_from_pairs(selected_filters), facet_columns=[selected_column])
+    sub_options = [{'label': f"{v} ({count})", 'value': v} for v, count in facets[selected_column].items()]
+
+    # A filter was added or removed, only the counts change
+    if triggered_id == 'selected_filters':
+        return sub_options, dash.no_update, dash.no_update
+
     # Otherwise triggered by 'columns' => user picked a new column
     return sub_options, "", selected_column
 
@@ -3560,7 +3550,7 @@ def display_filtered_trips(columns, col_sub, global_search,
 
     multi_trips_columns = dash.no_update
     # Load from Google Sheets
-    df4 = df_copy.copy()
+    df4 = sheet_cache.get().copy()
     if df4.empty:
         return [], [], "", [], [], []
 
@@ -3579,22 +3569,14 @@ def display_filtered_trips(columns, col_sub, global_search,
     # Column-based filter
     if col_sub:
         if col_sub in df4[columns].unique():
-            df4 = df4[df4[columns] == col_sub]
-
             # Initialize selected_filters_state if it's None
             if selected_filters_state is None:
                 selected_filters_state = []
 
-            # Check if columns already exists in selected_filters_state
-            existing_filter = next((filter_item for filter_item in selected_filters_state if filter_item['Filters'] == columns), None)
-
-            if existing_filter:
-                # If the column exists but the sub filter is different, update the sub filter
-                if existing_filter['Sub Filters'] != col_sub:
-                    existing_filter['Sub Filters'] = col_sub
-            else:
-                # Append the new filter if it doesn't exist
-                new_filter = {'Filters': columns, 'Sub Filters': col_sub}
+            # Another sub filter of a filter already in the list is an alternative (OR),
+            # a new filter narrows the results (AND)
+            new_filter = {'Filters': columns, 'Sub Filters': col_sub}
+            if new_filter not in selected_filters_state:
                 selected_filters_state.append(new_filter)
 
     elif col_sub == '' and columns == '':
@@ -3617,30 +3599,23 @@ def display_filtered_trips(columns, col_sub, global_search,
         ]
 
         # Dynamically add filter columns based on selected filters
-        if selected_filters_state:
-            for filter_entry in selected_filters_state:
-                filter_name = filter_entry.get('Filters')
-                if filter_name:
-                    column_name = f"Filter: {filter_name}"
-                    selected_trips_columns.append({'name': column_name, 'id': column_name})
-
-        # Apply all selected filters to the DataFrame
-        for filter_entry in selected_filters_state or []:
-            filter_column = filter_entry.get('Filters')
-            sub_filter = filter_entry.get('Sub Filters')
-            if filter_column in df4.columns and sub_filter:
-                df4 = df4[df4[filter_column] == sub_filter]
+        filters = filters_from_pairs(selected_filters_state)
+        for filter_name in filters:
+            column_name = f"Filter: {filter_name}"
+            selected_trips_columns.append({'name': column_name, 'id': column_name})
+
+        # Apply all selected filters at once, as bitwise operations on the value bitsets
+        if filters:
+            matching_labels, _ = filter_bitmaps.select(filters)
+            df4 = df4[df4.index.isin(matching_labels)]
         
         global df4_subset
         df4_subset = df4[['Trip', 'Total Score', 'Trail Link']].copy()
 
-        # Add each filter and its corresponding sub-filter to the data
-        for filter_entry in selected_filters_state or []:
-            filter_name = filter_entry.get('Filters')
-            sub_filter = filter_entry.get('Sub Filters')
-            if filter_name:
-                column_name = f"Filter: {filter_name}"
-                df4_subset[column_name] = sub_filter
+        # Add each filter with the trip's own value (one of the chosen sub filters)
+        for filter_name in filters:
+            column_name = f"Filter: {filter_name}"
+            df4_subset[column_name] = df4[filter_name] if filter_name in df4.columns else ""
 
         # Convert the DataFrame to a list of dictionaries
         selected_trips_data = df4_subset.to_dict('records')
@@ -3830,7 +3805,7 @@ def create_scatter_plot(df):
 
 
 def tab4_layout():
-    df5 = load_data_from_gsheet()
+    df5 = sheet_cache.get().copy()
 
     if df5.empty or 'Trip' not in df5.columns:
         return "No data available from Google Sheets"
@@ -4082,7 +4057,7 @@ def update_figures(n_intervals):
     Periodically refresh data from Google Sheets and recalculate all figures.
     If the sheet is empty or missing columns, we do PreventUpdate.
     """
-    df_c = df_global
+    df_c = sheet_cache.get().copy()
     if df_c.empty or 'Trip' not in df_c.columns:
         raise dash.exceptions.PreventUpdate
 
@@ -4278,7 +4253,7 @@ def update_figures(n_intervals):
     
     
 def tab5_layout():
-    df6=df_global.copy()
+    df6=sheet_cache.get().copy()
     trip_options_edit = df6["Trip"].unique().tolist() if not df6.empty else []
     trip_count_edit = df6["Trip"].nunique() if not df6.empty else 0
     return html.Div(
@@ -4534,7 +4509,6 @@ def tab5_layout():
         Input("load_btn_edit", "n_clicks"),
         Input("apply-btn", "n_clicks"),
         Input("confirm_apply_trip_edit", "submit_n_clicks"),
-        Input("kmh_edit", "value")
     ],
         State('df_edit_store', 'data'),
         State('load_clicks_store', 'data'),
@@ -4559,7 +4533,7 @@ def tab5_layout():
 )
 def handle_update_tab(
     trip_name,remove_clicks,confirm_remove_clicks,update_clicks,reset_clicks,
-    confirm_reset_clicks,load_clicks,apply_clicks,confirm_apply_clicks,kph,df_edit_data,
+    confirm_reset_clicks,load_clicks,apply_clicks,confirm_apply_clicks,df_edit_data,
     load_n_clicks,trip_name_input,accessibility,season_edit,trail_length_edit,circular_is,kmh_edit,walkinghr,
     challenge,terrain,view,shade,water,required,weather,crowdness,nearby,entryfee,how_far
 ):
@@ -4569,7 +4543,7 @@ def handle_update_tab(
         raise dash.exceptions.PreventUpdate
 
     # Work with a copy so we don't mutate the original
-    df_edit = df_copy.copy()
+    df_edit = sheet_cache.get().copy()
 
 
     if not df_edit.empty and "Trip" in df_edit.columns:
@@ -4632,7 +4606,7 @@ def handle_update_tab(
     dec_row = row.get("Decline","")
 
     distance_km = float(trail_length_edit) if trail_length_edit else 0
-    pace_kph = float(kph) if kph else 0  # Default pace
+    pace_kph = float(kmh_edit) if kmh_edit else 0  # Default pace
     ascent_m = float(inc_row) if inc_row else 0
     descent_m = float(dec_row) if dec_row else 0
 
@@ -5202,50 +5176,102 @@ def handle_update_tab(
         df_edit.to_dict("records"),  # 25 - df_edit_store.data
     )
 
-# Define the main layout with tabs
-app.layout = html.Div(
+# New walking time while typing a pace in the editor, computed in the browser
+# by editorWalkingTime in assets/trip_geometry.js (mirrors naismith_rule)
+app.clientside_callback(
+    ClientsideFunction(namespace="trips", function_name="editorWalkingTime"),
+    Output("walkinghr_edit", "value", allow_duplicate=True),
+    Input("kmh_edit", "value"),
     [
-        dcc.Tabs(id='tabs', value='tab1', children=[
-                dcc.Tab(
-                    label='Trips Stats ',
-                    children=tab1_layout(),
-                    style=tab_style,
-                    selected_style=selected_tab_style,
-                    value='tab1'
-                ),
-                dcc.Tab(
-                    label='Trips Filtering',
-                    children=tab3_layout(),
-                    style=tab_style,
-                    selected_style=selected_tab_style,
-                    value='tab3'
-                ),
-                dcc.Tab(
-                    label='Trips Dashboard',
-                    children=tab4_layout(),
-                    style=tab_style,
-                    selected_style=selected_tab_style,
-                    value='tab4'
-                ),
-                dcc.Tab(
-                    label='Trips Calculation',
-                    children=tab2_layout(),
-                    style=tab_style,
-                    selected_style=selected_tab_style,
-                    value='tab2'
-                ),
-                dcc.Tab(
-                    label='Trips Editor',
-                    children=tab5_layout(),
-                    style=tab_style,
-                    selected_style=selected_tab_style,
-                    value='tab5'
-                ),
-            ],
-        ),
-    ]
+        State("trail_length_edit", "value"),
+        State("trips_list_edit", "value"),
+        State("df_edit_store", "data"),
+    ],
+    prevent_initial_call=True
 )
 
+@app.callback(
+    Output("trips_list_edit", "options", allow_duplicate=True),
+    Input("trips_list_edit", "search_value"),
+    State("trips_list_edit", "value"),
+    prevent_initial_call=True
+)
+def search_trips_list_edit(search_value, trips_list_value):
+    """
+    Typo-tolerant search in the editor's trips dropdown. The typed text is set as
+    each match's search value, so the dropdown's own filter doesn't hide them.
+    """
+    df = sheet_cache.get()
+    if df.empty or "Trip" not in df.columns:
+        raise PreventUpdate
+    if not search_value:
+        return [{'label': t, 'value': t} for t in df["Trip"].unique()]
+    labels = trip_names_index.search(search_value, limit=FUZZY_LIMIT, labels=set(df.index))
+    trips = list(dict.fromkeys(df.loc[labels, "Trip"].tolist()))
+    options = [{'label': t, 'value': t, 'search': search_value} for t in trips]
+    if trips_list_value and trips_list_value not in trips:
+        options.append({'label': trips_list_value, 'value': trips_list_value})
+    return options
+
+
+# ---------------------------------------------------------------------------------
+#  Layout
+#  Built per page load. Only the selected tab is rendered up front, the other
+#  tabs are rendered from the cached sheet the first time they're opened.
+# ---------------------------------------------------------------------------------
+TABS = [
+    ("tab1", 'Trips Stats ', tab1_layout),
+    ("tab3", 'Trips Filtering', tab3_layout),
+    ("tab4", 'Trips Dashboard', tab4_layout),
+    ("tab2", 'Trips Calculation', tab2_layout),
+    ("tab5", 'Trips Editor', tab5_layout),
+]
+DEFAULT_TAB = "tab1"
+
+
+def serve_layout():
+    return html.Div(
+        [
+            dcc.Store(id='rendered-tabs', data=[DEFAULT_TAB]),
+            dcc.Tabs(
+                id='tabs',
+                value=DEFAULT_TAB,
+                children=[
+                    dcc.Tab(
+                        id=f"{value}-content",
+                        label=label,
+                        value=value,
+                        children=layout() if value == DEFAULT_TAB else None,
+                        style=tab_style,
+                        selected_style=selected_tab_style
+                    )
+                    for value, label, layout in TABS
+                ]
+            )
+        ]
+    )
+
+
+@app.callback(
+    [Output(f"{value}-content", "children") for value, _, _ in TABS] + [Output('rendered-tabs', 'data')],
+    Input('tabs', 'value'),
+    State('rendered-tabs', 'data'),
+    prevent_initial_call=True
+)
+def render_tab(selected_tab, rendered_tabs):
+    """
+    Renders a tab the first time it's selected. Tabs that are already on the
+    page keep their content (and whatever the user typed into it).
+    """
+    rendered_tabs = rendered_tabs or []
+    if selected_tab in rendered_tabs:
+        raise PreventUpdate
+    contents = [layout() if value == selected_tab else dash.no_update for value, _, layout in TABS]
+    return contents + [rendered_tabs + [selected_tab]]
+
+
+app.layout = serve_layout
+
 
 if __name__ == "__main__":
     app.run_server(host='100.74.93.47', port=8050, debug=True)
\ No newline at end of file